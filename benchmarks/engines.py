@@ -0,0 +1,128 @@
+"""
+Benchmark of the process and thread engines of the converter.
+
+A synthetic corpus is converted with each engine and the same number of workers,
+and the wall time of every run is reported:
+
+    python benchmarks/engines.py --files 16 --workers 4 --output engines.json
+
+The thread engine only runs the pandas parts of the conversion in parallel on
+free-threaded builds of Python (e.g. python3.13t), where the results are most
+interesting; elsewhere it mostly overlaps parsing, which releases the GIL.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import sysconfig
+import tempfile
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from txc2gtfs.converter import ENGINES, Engine, convert
+from txc2gtfs.synthetic import SyntheticSpec, parse_size, spec_for_size, write_corpus
+
+
+def time_engine(
+    engine: Engine,
+    paths: list[Path],
+    naptan: Path,
+    workdir: Path,
+    workers: int,
+    repeat: int,
+) -> dict[str, float | int]:
+    timings = []
+    for i in range(repeat):
+        output = workdir / f"{engine}-{i}" / "gtfs.zip"
+        output.parent.mkdir()
+        start = time.perf_counter()
+        convert(paths, output, num_workers=workers, naptan=naptan, engine=engine)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+    }
+
+
+def run_benchmarks(
+    files: int, size: int, workers: int, repeat: int = 3
+) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = Path(workdir) / "corpus"
+        paths = write_corpus(corpus, files, spec_for_size(size, SyntheticSpec()))
+        for engine in ENGINES:
+            result = results[engine] = time_engine(
+                engine, paths, corpus / "Stops.csv", Path(workdir), workers, repeat
+            )
+            print(f"{engine:<10} {result['median']:10.2f} s")
+
+    return {
+        "python": platform.python_version(),
+        "free_threaded": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+        "platform": platform.platform(),
+        "files": files,
+        "size": size,
+        "workers": workers,
+        "results": results,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=Path("engines.json"),
+        type=Path,
+        help="Path for the JSON results",
+    )
+    parser.add_argument(
+        "-n", "--files", default=8, type=int, help="Number of synthetic files"
+    )
+    parser.add_argument(
+        "-s",
+        "--size",
+        default="256KB",
+        type=parse_size,
+        help="Approximate size of each synthetic file, e.g. 256KB or 2MB",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        default=os.cpu_count() or 1,
+        type=int,
+        help="Number of workers of each engine",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        default=3,
+        type=int,
+        help="Number of timed conversions per engine",
+    )
+
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.files, args.size, args.workers, args.repeat)
+    args.output.write_text(json.dumps(results, indent=2))
+    speedup = (
+        results["results"]["processes"]["median"]
+        / results["results"]["threads"]["median"]
+    )
+    print(f"threads are {speedup:.2f}x as fast as processes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
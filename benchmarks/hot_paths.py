@@ -0,0 +1,230 @@
+"""
+Micro-benchmarks for the conversion hot paths.
+
+Each stage of the conversion is timed separately against the bundled TfL and TXC 2.1
+test files, so that a slowdown can be attributed to the stage that caused it. The
+results are written as JSON and, if a baseline is given, compared against it:
+
+    python benchmarks/hot_paths.py --output bench_output.json \\
+        --baseline benchmarks/baseline.json --threshold 0.2
+
+A benchmark regresses when its median time exceeds the baseline median by more than
+the threshold (a fraction, 0.2 meaning 20 %). The script exits with status 1 if any
+benchmark regressed. Record a new baseline with ``--save-baseline``.
+
+Note that ``get_calendar_dates`` and ``StopsTable.populate`` need the bank holidays and
+NaPTAN downloads, which are cached in ``~/.cache/txc2gtfs`` after the first run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from txc2gtfs.calendar import get_calendar
+from txc2gtfs.calendar_dates import get_calendar_dates
+from txc2gtfs.converter import parse_txc_to_sql_conn
+from txc2gtfs.data import get_path
+from txc2gtfs.gtfs import export_to_zip
+from txc2gtfs.stops import StopsTable
+from txc2gtfs.transxchange import (
+    generate_service_id,
+    get_gtfs_info,
+    get_sections,
+    get_services,
+    process_vehicle_journey,
+)
+from txc2gtfs.util.xml import NS
+
+_DATASETS = {
+    "tfl": "test_tfl_format",
+    "txc21": "test_txc21_format",
+}
+
+type Benchmark = tuple[str, Callable[[], Any], Callable[[], Any] | None]
+
+
+def time_call(
+    func: Callable[[], Any],
+    setup: Callable[[], Any] | None = None,
+    repeat: int = 5,
+) -> dict[str, float | int]:
+    """Time ``func`` ``repeat`` times, running ``setup`` untimed before each call"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+    }
+
+
+def gen_benchmarks(name: str, path: Path, workdir: Path) -> list[Benchmark]:
+    data = ET.parse(path)
+    sections = get_sections(data)
+    services = get_services(data)
+    journey = data.find("./txc:VehicleJourneys/txc:VehicleJourney", NS)
+    assert journey is not None
+    gtfs_info = get_gtfs_info(data)
+
+    # generate_service_id modifies its input, so it gets a fresh copy every time
+    service_id_input = gtfs_info.drop(columns="service_id")
+    service_id_copy = service_id_input.copy()
+
+    def reset_service_id_input() -> None:
+        nonlocal service_id_copy
+        service_id_copy = service_id_input.copy()
+
+    def populate_stops() -> None:
+        conn = sqlite3.connect(":memory:")
+        cur = conn.cursor()
+        StopsTable(cur).populate(cur, data, gtfs_info)
+        conn.close()
+
+    # Stage the file once, so that the export can be timed on its own
+    db = workdir / f"{name}.db"
+    with sqlite3.connect(db) as conn:
+        parse_txc_to_sql_conn(path, conn)
+    zip_path = workdir / f"{name}.zip"
+
+    return [
+        (f"{name}.get_gtfs_info", lambda: get_gtfs_info(data), None),
+        (
+            f"{name}.process_vehicle_journey",
+            lambda: process_vehicle_journey(journey, sections, services),
+            None,
+        ),
+        (
+            f"{name}.generate_service_id",
+            lambda: generate_service_id(service_id_copy),
+            reset_service_id_input,
+        ),
+        (f"{name}.get_calendar", lambda: get_calendar(gtfs_info), None),
+        (f"{name}.get_calendar_dates", lambda: get_calendar_dates(gtfs_info), None),
+        (f"{name}.StopsTable.populate", populate_stops, None),
+        (f"{name}.export_to_zip", lambda: export_to_zip(db, zip_path), None),
+    ]
+
+
+def run_benchmarks(repeat: int = 5, only: str | None = None) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, dataset in _DATASETS.items():
+            benchmarks = gen_benchmarks(name, Path(get_path(dataset)), Path(workdir))
+            for bench_name, func, setup in benchmarks:
+                if only is not None and only not in bench_name:
+                    continue
+                result = results[bench_name] = time_call(func, setup, repeat)
+                print(f"{bench_name:<40} {result['median'] * 1000:10.2f} ms")
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """Return the names of the benchmarks that regressed against the baseline"""
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<40} (no baseline)")
+            continue
+
+        ratio = result["median"] / baseline["results"][name]["median"]
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<40} {ratio:6.2f}x{'  REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=Path("bench_output.json"),
+        type=Path,
+        help="Path for the JSON results",
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        default=Path(__file__).parent / "baseline.json",
+        type=Path,
+        help="Baseline JSON results to compare against",
+    )
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        default=0.2,
+        type=float,
+        help="Allowed slowdown against the baseline, as a fraction of its median",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        default=5,
+        type=int,
+        help="Number of timed calls per benchmark",
+    )
+    parser.add_argument(
+        "-k",
+        "--only",
+        help="Only run benchmarks whose name contains this string",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline instead of comparing",
+    )
+
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.repeat, args.only)
+    args.output.write_text(json.dumps(current, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.is_file():
+        print(f"No baseline at {args.baseline}, skipping comparison")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed by more than "
+            f"{args.threshold:.0%}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark of the journey workers converting the VehicleJourneys of a single file.
+
+A large synthetic file is parsed once, and its journeys are converted with each
+number of journey workers in turn. The wall time of every run is reported, with
+its speedup over a single worker:
+
+    python3.13t benchmarks/journey_workers.py --size 4MB --workers 1 2 4 8
+
+Converting journeys holds the GIL, so the workers only run in parallel on
+free-threaded builds of Python (e.g. python3.13t). With the GIL enabled,
+``convert`` falls back to a single journey worker with a warning; the benchmark
+still times several, to show why.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import sysconfig
+import tempfile
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from txc2gtfs.synthetic import SyntheticSpec, parse_size, spec_for_size, write_txc
+from txc2gtfs.transxchange import iter_gtfs_info
+from txc2gtfs.util.xml import XMLTree, parse_xml
+
+
+def time_workers(data: XMLTree, workers: int, repeat: int) -> dict[str, float | int]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _batch in iter_gtfs_info(data, workers=workers):
+            pass
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+    }
+
+
+def run_benchmarks(
+    size: int, workers: Sequence[int], repeat: int = 3
+) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "large.xml"
+        with path.open("w", encoding="utf-8") as fp:
+            write_txc(fp, spec_for_size(size, SyntheticSpec()))
+        data = parse_xml(path, use_lxml=True)
+
+    results: dict[str, Any] = {}
+    for count in workers:
+        result = results[str(count)] = time_workers(data, count, repeat)
+        result["speedup"] = results[str(workers[0])]["median"] / result["median"]
+        print(
+            f"{count:>3} worker(s) {result['median']:10.2f} s {result['speedup']:6.2f}x"
+        )
+
+    return {
+        "python": platform.python_version(),
+        "free_threaded": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+        "gil_enabled": getattr(sys, "_is_gil_enabled", lambda: True)(),
+        "platform": platform.platform(),
+        "size": size,
+        "results": results,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=Path("journey_workers.json"),
+        type=Path,
+        help="Path for the JSON results",
+    )
+    parser.add_argument(
+        "-s",
+        "--size",
+        default="2MB",
+        type=parse_size,
+        help="Approximate size of the synthetic file, e.g. 2MB or 16MB",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        default=sorted({1, 2, os.cpu_count() or 1}),
+        type=int,
+        nargs="+",
+        help="Numbers of journey workers to time, the first being the reference",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        default=3,
+        type=int,
+        help="Number of timed conversions per number of workers",
+    )
+
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.size, args.workers, args.repeat)
+    args.output.write_text(json.dumps(results, indent=2))
+    if results["gil_enabled"]:
+        print("The GIL is enabled, so the journey workers do not run in parallel")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
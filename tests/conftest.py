@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.fixture
+def small_spec():
+    from txc2gtfs.synthetic import SyntheticSpec
+
+    return SyntheticSpec(
+        services=2,
+        journey_patterns=3,
+        timing_links=5,
+        vehicle_journeys=4,
+        operating_profiles=2,
+        bank_holiday_exceptions=0,
+        stops=100,
+    )
+
+
+@pytest.fixture
+def tiny_spec():
+    from txc2gtfs.synthetic import SyntheticSpec
+
+    return SyntheticSpec(services=2, journey_patterns=2, vehicle_journeys=3, stops=50)
+
+
+@pytest.fixture
+def write_synthetic_corpus(tmp_path, tiny_spec):
+    """Write a number of synthetic files, returning their paths and NaPTAN stops"""
+    from txc2gtfs.synthetic import write_corpus
+
+    def write(files):
+        paths = write_corpus(tmp_path / "corpus", files, tiny_spec)
+        return paths, tmp_path / "corpus" / "Stops.csv"
+
+    return write
+
+
+@pytest.fixture
+def corpus(write_synthetic_corpus):
+    return write_synthetic_corpus(2)
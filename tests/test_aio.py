@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def corpus(write_synthetic_corpus):
+    return write_synthetic_corpus(3)
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+def test_convert_async(tmp_path, corpus):
+    from zipfile import ZipFile
+
+    from txc2gtfs import convert_async
+
+    paths, naptan = corpus
+    output = tmp_path / "gtfs.zip"
+    events = asyncio.run(
+        _collect(convert_async(paths, output, num_workers=2, naptan=naptan))
+    )
+
+    assert sorted(event.path for event in events) == sorted(paths)
+    for event in events:
+        assert event.error is None
+        assert event.seconds > 0
+        assert event.rows["trips"] == 12
+    with ZipFile(output) as zf:
+        assert "stop_times.txt" in zf.namelist()
+
+
+def test_convert_async_failure(tmp_path, corpus):
+    from txc2gtfs import convert_async
+
+    paths, naptan = corpus
+    broken = tmp_path / "corpus" / "broken.xml"
+    broken.write_text("<TransXChange>")
+    output = tmp_path / "gtfs.zip"
+    events = []
+
+    async def run():
+        async for event in convert_async(
+            [*paths, broken], output, engine="threads", naptan=naptan
+        ):
+            events.append(event)  # noqa: PERF401
+
+    with pytest.raises(RuntimeError, match="1 file"):
+        asyncio.run(run())
+
+    # The other files are still converted and reported
+    assert len(events) == 4
+    (failed,) = [event for event in events if event.error]
+    assert failed.path == broken
+    assert not failed.rows
+    assert not output.exists()
+
+
+def test_convert_async_cancel(tmp_path, corpus):
+    from contextlib import aclosing
+
+    from txc2gtfs import convert_async
+
+    paths, naptan = corpus
+    output = tmp_path / "gtfs.zip"
+
+    async def run():
+        events = convert_async(paths, output, engine="threads", naptan=naptan)
+        async with aclosing(events):
+            async for event in events:
+                return event
+
+    event = asyncio.run(run())
+
+    assert event.error is None
+    assert not output.exists()
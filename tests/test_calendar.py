@@ -256,3 +256,58 @@ def test_get_calendar_txc21(test_txc21_data):
             pass
         else:
             raise e
+
+
+def test_canonical_service_ids():
+    from pandas import DataFrame
+
+    from txc2gtfs.calendar import canonicalize_service_ids
+
+    def calendar_row(service_id, saturday, sunday):
+        return {
+            "service_id": service_id,
+            **dict.fromkeys(
+                ["monday", "tuesday", "wednesday", "thursday", "friday"], 0
+            ),
+            "saturday": saturday,
+            "sunday": sunday,
+            "start_date": "20200201",
+            "end_date": "20200202",
+        }
+
+    trips = DataFrame(
+        {
+            "route_id": ["R1", "R2", "R3", "R4"],
+            "service_id": ["A_Saturday", "B_Saturday", "C_Saturday", "D_Sunday"],
+            "trip_id": ["T1", "T2", "T3", "T4"],
+        }
+    )
+    calendar = DataFrame(
+        [
+            calendar_row("A_Saturday", 1, 0),
+            calendar_row("B_Saturday", 1, 0),
+            calendar_row("C_Saturday", 1, 0),
+            calendar_row("D_Sunday", 0, 1),
+        ]
+    )
+    # C has the same days as A and B but an exception
+    calendar_dates = DataFrame(
+        {"service_id": ["C_Saturday"], "date": ["20200201"], "exception_type": [2]}
+    )
+
+    trips, calendar, calendar_dates = canonicalize_service_ids(
+        trips, calendar, calendar_dates
+    )
+
+    a, b, c, d = trips["service_id"]
+    assert a == b
+    assert len({a, c, d}) == 3
+    assert a.startswith("c") and len(a) == 13
+    assert calendar["service_id"].tolist() == [a, c, d]
+    assert calendar_dates["service_id"].tolist() == [c]
+
+    # The ids only depend on the calendar, so they match across files
+    _, calendar, _ = canonicalize_service_ids(
+        trips.iloc[:1], DataFrame([calendar_row("E_Saturday", 1, 0)]), None
+    )
+    assert calendar["service_id"].tolist() == [a]
@@ -0,0 +1,78 @@
+import pytest
+
+from txc2gtfs.data import get_path
+
+
+@pytest.fixture
+def test_files(tmp_path):
+    import shutil
+    from pathlib import Path
+
+    directory = tmp_path / "txc"
+    shutil.copytree(get_path("test_data_dir"), directory)
+    return sorted(Path(directory).glob("*.xml"))
+
+
+def test_updating_catalog(tmp_path, test_files):
+    import os
+
+    from txc2gtfs.catalog import update_catalog
+
+    db = tmp_path / "catalog.db"
+
+    update = update_catalog(db, test_files)
+    assert (update.files, update.updated, update.removed) == (3, 3, 0)
+
+    # Unchanged files are not read again
+    update = update_catalog(db, test_files)
+    assert (update.files, update.updated, update.removed) == (3, 0, 0)
+
+    stat = test_files[0].stat()
+    os.utime(test_files[0], (stat.st_atime, stat.st_mtime + 10))
+    test_files[1].unlink()
+    update = update_catalog(db, [test_files[0], test_files[2]])
+    assert (update.files, update.updated, update.removed) == (2, 1, 1)
+
+
+def test_selecting_from_catalog(tmp_path, test_files):
+    from txc2gtfs.catalog import select_paths, update_catalog
+
+    db = tmp_path / "catalog.db"
+    update_catalog(db, test_files, num_workers=2)
+
+    assert select_paths(db) == [path.resolve() for path in test_files]
+    assert [path.name for path in select_paths(db, "mode = 'bus'")] == [
+        "tfl_99-PIC-B-y05-4.xml"
+    ]
+    assert [
+        path.name
+        for path in select_paths(
+            db, "operator_code = 'LUL' AND line_name = 'Hammersmith & City'"
+        )
+    ] == ["tfl_1-HAM-_-y05-2675925.xml"]
+    assert [
+        path.name
+        for path in select_paths(
+            db, "start_date <= '2019-12-31' AND end_date >= '2019-07-14'"
+        )
+    ] == ["tfl_1-HAM-_-y05-2675925.xml", "tfl_33-RB5-_-y05-7.xml"]
+
+
+def test_catalog_records_revision_and_hash(tmp_path, test_files):
+    import sqlite3
+
+    from txc2gtfs.catalog import hash_file, update_catalog
+
+    db = tmp_path / "catalog.db"
+    update_catalog(db, test_files[:1])
+
+    with sqlite3.connect(db) as conn:
+        row = conn.execute("SELECT hash, revision, modified FROM files").fetchone()
+    assert row == (hash_file(test_files[0]), 3, "2019-02-25T16:13:42.184192+00:00")
+
+
+def test_selecting_from_missing_catalog(tmp_path):
+    from txc2gtfs.catalog import select_paths
+
+    with pytest.raises(FileNotFoundError):
+        select_paths(tmp_path / "catalog.db")
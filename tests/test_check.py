@@ -0,0 +1,76 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+
+@pytest.fixture
+def staged(tmp_path, corpus):
+    from txc2gtfs import convert
+
+    paths, naptan = corpus
+    convert(paths, tmp_path / "gtfs.zip", naptan=naptan, stage_only=True)
+    return tmp_path / "gtfs.db"
+
+
+def test_check_passes(tmp_path, staged, capsys):
+    from txc2gtfs import convert
+    from txc2gtfs.check import check_staging
+
+    with closing(sqlite3.connect(staged)) as conn:
+        results = check_staging(conn)
+        indexes = conn.execute(
+            "SELECT name FROM sqlite_master WHERE name LIKE 'check_%'"
+        ).fetchall()
+
+    assert results
+    assert all(result.ok for result in results)
+    assert not indexes
+
+    paths = sorted((tmp_path / "corpus").glob("*.xml"))
+    convert(
+        paths,
+        tmp_path / "gtfs.zip",
+        naptan=tmp_path / "corpus" / "Stops.csv",
+        check=True,
+    )
+    assert "Integrity checks: 8 of 8 passed" in capsys.readouterr().out
+
+
+def test_check_problems(staged):
+    from txc2gtfs.check import check_staging, format_report
+
+    with closing(sqlite3.connect(staged)) as conn:
+        (trip_id,) = conn.execute(
+            "SELECT trip_id FROM stop_times ORDER BY trip_id LIMIT 1"
+        ).fetchone()
+        conn.executescript(f"""
+UPDATE stop_times SET stop_id = 'MISSING' WHERE rowid IN (1, 2);
+DELETE FROM agency WHERE rowid = 1;
+INSERT INTO trips(route_id, service_id, trip_id) VALUES ('R', 'S', 'T');
+-- Rows repeated in full are dropped by the export
+INSERT INTO stop_times SELECT * FROM stop_times WHERE rowid = 3;
+UPDATE stop_times SET stop_sequence = 1, arrival_time = '04:00:00'
+WHERE trip_id = '{trip_id}' AND stop_sequence = 2;
+""")
+        results = {result.description: result for result in check_staging(conn)}
+
+    missing_stops = results["stop_times.stop_id not in stops"]
+    assert (missing_stops.keys, missing_stops.rows) == (1, 2)
+    assert missing_stops.examples == ["MISSING"]
+    assert results["routes.agency_id not in agency"].keys == 1
+    assert results["trips.route_id not in routes"].examples == ["R"]
+    assert results["trips.service_id not in calendar or calendar_dates"].examples == [
+        "S"
+    ]
+    assert results["trips.trip_id not in stop_times"].examples == ["T"]
+    assert results["trips with a repeated stop_sequence"].examples == [trip_id]
+    assert results["trips whose times go backwards"].examples == [trip_id]
+    assert results["stop_times.trip_id not in trips"].ok
+
+    report = format_report(list(results.values()), 0.5)
+    assert report.splitlines()[0] == "Integrity checks: 1 of 8 passed in 0.5 s"
+    assert (
+        "  stop_times.stop_id not in stops: 1 stop_id(s) in 2 row(s), e.g. MISSING"
+        in report
+    )
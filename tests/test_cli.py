@@ -0,0 +1,64 @@
+import pytest
+
+# Budget for importing the CLI, in microseconds. It only has to cover the standard
+# library modules needed to parse the arguments.
+_CLI_IMPORT_BUDGET_US = 150_000
+
+_HEAVY_MODULES = ["pandas", "lxml", "multiprocessing", "sqlite3", "numpy"]
+
+
+def run_python(code, *args):
+    import subprocess
+    import sys
+
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_cli_import_time_budget():
+    # -X importtime reports "self | cumulative | name" in microseconds on stderr
+    result = run_python("import txc2gtfs.cli", "-X", "importtime")
+    cumulative = {
+        line.rsplit("|", 1)[1].strip(): int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+    }
+    assert cumulative["txc2gtfs.cli"] < _CLI_IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--help"],
+        [],
+        ["--workers", "many", "in.xml"],
+        ["scan", "--help"],
+        ["catalog", "--help"],
+    ],
+)
+def test_cli_does_not_load_heavy_modules(argv):
+    code = f"""
+import sys
+from txc2gtfs.cli import main
+try:
+    main({argv!r})
+except SystemExit:
+    pass
+print("loaded:", *(m for m in {_HEAVY_MODULES!r} if m in sys.modules))
+"""
+    assert run_python(code).stdout.splitlines()[-1] == "loaded:"
+
+
+def test_convert_is_loaded_lazily():
+    code = """
+import sys
+import txc2gtfs
+assert "pandas" not in sys.modules
+assert callable(txc2gtfs.convert)
+assert "pandas" in sys.modules
+"""
+    run_python(code)
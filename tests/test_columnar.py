@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def staging_db(tmp_path):
+    db = tmp_path / "gtfs.db"
+    with sqlite3.connect(db) as conn:
+        conn.execute(
+            "CREATE TABLE stops (id CHAR(12) PRIMARY KEY, name VARCHAR, lat REAL, "
+            "lon REAL)"
+        )
+        conn.execute("INSERT INTO stops VALUES ('S1', 'Stop 1', 51.5, -0.1)")
+        conn.execute(
+            "CREATE TABLE stop_times (trip_id TEXT, arrival_time TEXT, "
+            "departure_time TEXT, stop_id TEXT, stop_sequence INTEGER, "
+            "timepoint INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO stop_times VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                ("T2", "08:00:00", "08:00:00", "S1", 1, 0),
+                ("T1", "24:05:30", "24:06:00", "S1", 2, 0),
+                ("T1", "23:59:00", "23:59:00", "S1", 1, 0),
+                # Staged twice, e.g. by appending
+                ("T1", "23:59:00", "23:59:00", "S1", 1, 0),
+            ],
+        )
+    return db
+
+
+def test_export_to_parquet(staging_db, tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from txc2gtfs.columnar import export_to_columnar
+
+    written = export_to_columnar(staging_db, tmp_path / "gtfs", batch_size=2)
+    assert sorted(path.name for path in written) == [
+        "stop_times.parquet",
+        "stops.parquet",
+    ]
+
+    stop_times = pq.read_table(tmp_path / "gtfs" / "stop_times.parquet")
+    assert stop_times.schema.field("arrival_time").type == pa.int32()
+    assert pa.types.is_dictionary(stop_times.schema.field("trip_id").type)
+    assert stop_times.to_pydict()["arrival_time"] == [86340, 86730, 28800]
+    assert stop_times.column("trip_id").to_pylist() == ["T1", "T1", "T2"]
+    assert pq.ParquetFile(tmp_path / "gtfs" / "stop_times.parquet").num_row_groups == 2
+
+    stops = pq.read_table(tmp_path / "gtfs" / "stops.parquet")
+    assert stops.column_names == ["stop_id", "stop_name", "stop_lat", "stop_lon"]
+
+
+def test_export_to_arrow(staging_db, tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow as pa
+
+    from txc2gtfs.columnar import export_to_columnar
+
+    export_to_columnar(staging_db, tmp_path / "gtfs", "arrow", batch_size=2)
+    with pa.ipc.open_stream(tmp_path / "gtfs" / "stop_times.arrows") as reader:
+        stop_times = reader.read_all()
+    assert stop_times.num_rows == 3
+    assert stop_times.to_pydict()["departure_time"] == [86340, 86760, 28800]
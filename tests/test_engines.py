@@ -0,0 +1,26 @@
+import pytest
+
+
+def test_thread_engine(tmp_path, small_spec):
+    from zipfile import ZipFile
+
+    from txc2gtfs import convert
+    from txc2gtfs.synthetic import write_corpus
+
+    paths = write_corpus(tmp_path / "corpus", 3, small_spec)
+    naptan = tmp_path / "corpus" / "Stops.csv"
+
+    tables = {}
+    for engine in ("processes", "threads"):
+        output = tmp_path / engine / "gtfs.zip"
+        output.parent.mkdir()
+        convert(paths, output, num_workers=2, naptan=naptan, engine=engine)
+        with ZipFile(output) as zf:
+            # Rows are staged in the order the workers finish
+            tables[engine] = {
+                name: sorted(zf.read(name).splitlines()) for name in zf.namelist()
+            }
+    assert tables["threads"] == tables["processes"]
+
+    with pytest.raises(ValueError, match="processes"):
+        convert(paths, tmp_path / "gtfs.zip", memory_report="m.json", engine="threads")
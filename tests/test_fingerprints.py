@@ -0,0 +1,88 @@
+import pytest
+
+from txc2gtfs.data import get_path
+
+
+@pytest.fixture
+def test_tfl_data():
+    return get_path("test_tfl_format")
+
+
+def test_trip_fingerprint_depends_on_template():
+    from txc2gtfs.fingerprints import get_trip_fingerprint
+
+    template = [("A", 0), ("B", 120), ("C", 300)]
+    fingerprint = get_trip_fingerprint("JPS_1_Sunday_0507", "S_1", template)
+
+    assert fingerprint == get_trip_fingerprint("JPS_1_Sunday_0507", "S_1", template)
+    assert fingerprint != get_trip_fingerprint("JPS_1_Sunday_0507", "S_2", template)
+    assert fingerprint != get_trip_fingerprint(
+        "JPS_1_Sunday_0507", "S_1", [("A", 0), ("B", 180), ("C", 300)]
+    )
+
+
+def test_trip_fingerprints_sync_between_workers():
+    import sqlite3
+
+    from txc2gtfs.fingerprints import TripFingerprints
+
+    conn = sqlite3.connect(":memory:")
+    first, second = TripFingerprints(), TripFingerprints()
+    first.sync(conn.cursor())
+    second.sync(conn.cursor())
+
+    first.add(b"trip")
+    assert b"trip" in first
+    assert b"trip" not in second
+
+    first.stage(conn.cursor())
+    second.sync(conn.cursor())
+    assert b"trip" in second
+
+    # Fingerprints written along with the rows of a file are kept once committed
+    first.commit()
+    first.discard()
+    assert b"trip" in first
+
+    # Pending fingerprints of a file that failed are forgotten
+    second.add(b"other")
+    second.discard()
+    assert b"other" not in second
+    assert len(second) == 1
+
+
+def test_repeated_trips_are_skipped(test_tfl_data):
+    import xml.etree.ElementTree as ET
+
+    from txc2gtfs.fingerprints import TripFingerprints
+    from txc2gtfs.transxchange import get_gtfs_info
+
+    data = ET.parse(test_tfl_data)
+    seen = TripFingerprints()
+
+    assert not get_gtfs_info(data, seen).empty
+    assert len(seen) > 0
+    assert get_gtfs_info(data, seen).empty
+
+
+def test_converting_overlapping_files(tmp_path, test_tfl_data):
+    import shutil
+    from zipfile import ZipFile
+
+    import pandas as pd
+
+    from txc2gtfs import convert
+
+    for name in ("a.xml", "b.xml"):
+        shutil.copy(test_tfl_data, tmp_path / name)
+
+    def read_stop_times(inputs, output):
+        convert(inputs, output)
+        with ZipFile(output) as zf, zf.open("stop_times.txt") as fp:
+            return pd.read_csv(fp)
+
+    single = read_stop_times([tmp_path / "a.xml"], tmp_path / "single.zip")
+    both = read_stop_times(
+        [tmp_path / "a.xml", tmp_path / "b.xml"], tmp_path / "both.zip"
+    )
+    pd.testing.assert_frame_equal(single, both)
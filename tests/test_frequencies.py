@@ -0,0 +1,95 @@
+import pytest
+
+
+def make_trips(departures, template=((0, "A"), (300, "B"), (720, "C"))):
+    import pandas as pd
+
+    from txc2gtfs.frequencies import format_gtfs_time
+
+    stop_times, trips = [], []
+    for departure in departures:
+        trip_id = f"T_{format_gtfs_time(departure)}"
+        trips.append(("R1", "S1", trip_id, "Somewhere", 1))
+        for sequence, (offset, stop_id) in enumerate(template, start=1):
+            time = format_gtfs_time(departure + offset)
+            stop_times.append((trip_id, time, time, stop_id, sequence, 0))
+
+    return (
+        pd.DataFrame(
+            stop_times,
+            columns=[
+                "trip_id",
+                "arrival_time",
+                "departure_time",
+                "stop_id",
+                "stop_sequence",
+                "timepoint",
+            ],
+        ),
+        pd.DataFrame(
+            trips,
+            columns=[
+                "route_id",
+                "service_id",
+                "trip_id",
+                "trip_headsign",
+                "direction_id",
+            ],
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "starts, runs",
+    [
+        ([0, 10, 20, 30], [(0, 3)]),
+        ([0, 10, 20, 25, 30, 35, 40], [(0, 2), (3, 6)]),
+        ([0, 10, 25, 45], []),
+        ([0, 0, 0], []),
+    ],
+)
+def test_find_runs(starts, runs):
+    import numpy as np
+
+    from txc2gtfs.frequencies import _find_runs
+
+    assert list(_find_runs(np.array(starts), 3)) == runs
+
+
+def test_even_headway_becomes_frequency():
+    from txc2gtfs.frequencies import get_frequencies
+
+    # Every 10 minutes from 07:00 to 08:00, and an irregular trip at 09:13
+    departures = [7 * 3600 + i * 600 for i in range(7)] + [9 * 3600 + 13 * 60]
+    stop_times, trips = make_trips(departures)
+
+    stop_times, trips, frequencies = get_frequencies(stop_times, trips)
+
+    assert frequencies.to_dict("records") == [
+        {
+            "trip_id": "T_07:00:00",
+            "start_time": "07:00:00",
+            # After the last departure at 08:00, but before the next would be
+            "end_time": "08:00:01",
+            "headway_secs": 600,
+            "exact_times": 1,
+        }
+    ]
+    assert sorted(trips["trip_id"]) == ["T_07:00:00", "T_09:13:00"]
+    assert len(stop_times) == 2 * 3
+
+
+def test_different_templates_are_not_merged():
+    import pandas as pd
+
+    from txc2gtfs.frequencies import get_frequencies
+
+    fast = make_trips([0, 600, 1200])
+    slow = make_trips([1800, 2400], template=((0, "A"), (400, "B"), (900, "C")))
+    stop_times = pd.concat([fast[0], slow[0]])
+    trips = pd.concat([fast[1], slow[1]])
+
+    _, remaining, frequencies = get_frequencies(stop_times, trips)
+
+    assert len(frequencies) == 1
+    assert len(remaining) == 3
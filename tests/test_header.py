@@ -0,0 +1,134 @@
+from datetime import date
+
+import pytest
+
+from txc2gtfs.data import get_path
+
+
+@pytest.fixture
+def test_tfl_data():
+    return get_path("test_tfl_format")
+
+
+def test_reading_header(test_tfl_data):
+    from pathlib import Path
+
+    from txc2gtfs.header import read_header
+
+    header = read_header(Path(test_tfl_data))
+
+    assert [
+        (service.code, service.start_date, service.end_date)
+        for service in header.services
+    ] == [("1-HAM-_-y05-2675925", date(2019, 7, 13), date(2019, 7, 14))]
+
+
+@pytest.mark.parametrize(
+    "start, end, overlaps",
+    [
+        (date(2019, 7, 1), date(2019, 7, 13), True),
+        (date(2019, 7, 14), None, True),
+        (date(2019, 7, 15), date(2019, 8, 1), False),
+        (date(2019, 6, 1), date(2019, 7, 12), False),
+        (None, date(2019, 7, 12), False),
+        (None, None, True),
+    ],
+)
+def test_window_overlaps(start, end, overlaps):
+    from txc2gtfs.util.dates import DateWindow
+
+    assert DateWindow(start, end).overlaps(date(2019, 7, 13), date(2019, 7, 14)) is (
+        overlaps
+    )
+
+
+def test_window_prunes_services(test_tfl_data):
+    import xml.etree.ElementTree as ET
+
+    from txc2gtfs.transxchange import get_gtfs_info, get_services
+    from txc2gtfs.util.dates import DateWindow
+
+    data = ET.parse(test_tfl_data)
+
+    assert get_services(data, DateWindow(date(2019, 8, 1))) == {}
+    assert get_gtfs_info(data, window=DateWindow(end=date(2019, 7, 1))).empty
+
+    services = get_services(data, DateWindow(date(2019, 7, 14), date(2019, 8, 1)))
+    journey_patterns = services["1-HAM-_-y05-2675925"].journey_patterns
+    assert set(journey_patterns["start_date"]) == {"20190714"}
+    assert set(journey_patterns["end_date"]) == {"20190714"}
+
+
+def test_converting_skips_files_outside_window(tmp_path, test_tfl_data, capsys):
+    import sqlite3
+    from pathlib import Path
+
+    from txc2gtfs.converter import parse_txc_to_sql_conn
+    from txc2gtfs.util.dates import DateWindow
+
+    with sqlite3.connect(tmp_path / "gtfs.db") as conn:
+        parse_txc_to_sql_conn(
+            Path(test_tfl_data), conn, window=DateWindow(date(2020, 1, 1))
+        )
+        tables = conn.execute("SELECT name FROM sqlite_master").fetchall()
+
+    assert tables == []
+    assert "No service of file" in capsys.readouterr().out
+
+
+def test_reading_operators_and_lines(test_tfl_data):
+    from pathlib import Path
+
+    from txc2gtfs.header import read_header
+
+    header = read_header(Path(test_tfl_data))
+
+    assert header.operators == {"OId_LUL": {"OId_LUL", "LUL"}}
+    assert header.services[0].operator_ref == "OId_LUL"
+    assert header.services[0].mode == "underground"
+    assert header.services[0].line_names == ["Hammersmith & City"]
+
+
+@pytest.mark.parametrize(
+    "criteria, matches",
+    [
+        ({"operators": ["lul"]}, True),
+        ({"operators": ["OId_LUL", "TFL"]}, True),
+        ({"operators": ["ABC"]}, False),
+        ({"modes": ["Underground"]}, True),
+        ({"modes": ["bus"]}, False),
+        ({"lines": ["hammersmith & city"]}, True),
+        ({"operators": ["LUL"], "lines": ["Circle"]}, False),
+    ],
+)
+def test_service_filter(test_tfl_data, criteria, matches):
+    from pathlib import Path
+
+    from txc2gtfs.header import ServiceFilter, read_header
+
+    header = read_header(Path(test_tfl_data))
+    service_filter = ServiceFilter.create(**criteria)
+
+    assert service_filter is not None
+    assert service_filter.matches(header.services[0], header.operators) is matches
+
+
+def test_empty_service_filter():
+    from txc2gtfs.header import ServiceFilter
+
+    assert ServiceFilter.create() is None
+    assert ServiceFilter.create([], None, []) is None
+
+
+def test_filter_prunes_services(test_tfl_data):
+    import xml.etree.ElementTree as ET
+
+    from txc2gtfs.header import ServiceFilter
+    from txc2gtfs.transxchange import get_services
+
+    data = ET.parse(test_tfl_data)
+
+    assert get_services(data, service_filter=ServiceFilter.create(modes=["bus"])) == {}
+    assert list(
+        get_services(data, service_filter=ServiceFilter.create(operators=["LUL"]))
+    ) == ["1-HAM-_-y05-2675925"]
@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "number, digits",
+    [(0, "0"), (9, "9"), (10, "a"), (35, "z"), (36, "10"), (1295, "zz")],
+)
+def test_to_base36(number, digits):
+    from txc2gtfs.ids import to_base36
+
+    assert to_base36(number) == digits
+    assert int(digits, 36) == number
+
+
+@pytest.fixture
+def staging_db(tmp_path):
+    db = tmp_path / "gtfs.db"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE routes (id CHAR PRIMARY KEY, short_name VARCHAR)")
+        conn.executemany(
+            "INSERT INTO routes VALUES (?, ?)", [("R_B", "2"), ("R_A", "1")]
+        )
+        conn.execute(
+            "CREATE TABLE trips (route_id TEXT, service_id TEXT, trip_id TEXT, "
+            "trip_headsign TEXT, direction_id INTEGER)"
+        )
+        # Staged in any order, e.g. by several workers
+        conn.executemany(
+            "INSERT INTO trips VALUES (?, ?, ?, ?, ?)",
+            [
+                ("R_B", "S_Sunday", "JPS_2_Sunday_0900", "Town", 0),
+                ("R_A", "S_Saturday", "JPS_1_Saturday_0800", "Town", 1),
+                ("R_A", "S_Saturday", "JPS_1_Saturday_0700", "Town", 1),
+            ],
+        )
+        conn.execute(
+            "CREATE TABLE stop_times (trip_id TEXT, arrival_time TEXT, "
+            "departure_time TEXT, stop_id TEXT, stop_sequence INTEGER, "
+            "timepoint INTEGER)"
+        )
+        conn.execute(
+            "INSERT INTO stop_times VALUES "
+            "('JPS_1_Saturday_0800', '08:00:00', '08:00:00', 'S1', 1, 1)"
+        )
+    return db
+
+
+def test_building_compact_ids(staging_db, tmp_path):
+    import csv
+
+    from txc2gtfs.ids import build_compact_ids, read_compact_ids, write_id_mapping
+
+    with sqlite3.connect(staging_db) as conn:
+        build_compact_ids(conn)
+        # Rebuilding gives the same ids
+        build_compact_ids(conn)
+        compact_ids = read_compact_ids(conn)
+        write_id_mapping(conn, tmp_path / "gtfs_ids.csv")
+
+    assert compact_ids == {
+        "trip": {
+            "JPS_1_Saturday_0700": "0",
+            "JPS_1_Saturday_0800": "1",
+            "JPS_2_Sunday_0900": "2",
+        },
+        "service": {"S_Saturday": "0", "S_Sunday": "1"},
+        "route": {"R_A": "0", "R_B": "1"},
+    }
+
+    with open(tmp_path / "gtfs_ids.csv", newline="") as fp:
+        rows = list(csv.reader(fp))
+    assert rows[0] == ["kind", "compact_id", "id"]
+    assert ["trip", "1", "JPS_1_Saturday_0800"] in rows
+    assert len(rows) == 1 + 3 + 2 + 2
+
+
+def test_export_with_compact_ids(staging_db, tmp_path):
+    from zipfile import ZipFile
+
+    import pandas as pd
+
+    from txc2gtfs.gtfs import export_to_zip
+    from txc2gtfs.ids import build_compact_ids
+
+    with sqlite3.connect(staging_db) as conn:
+        conn.execute("CREATE TABLE stops (id CHAR, name VARCHAR, lat REAL, lon REAL)")
+        conn.execute("CREATE TABLE agency (id CHAR, name VARCHAR)")
+        conn.execute(
+            "CREATE TABLE calendar (service_id TEXT, start_date TEXT, end_date TEXT)"
+        )
+        conn.execute("INSERT INTO calendar VALUES ('S_Sunday', '20250101', '20251231')")
+        build_compact_ids(conn)
+
+    export_to_zip(staging_db, tmp_path / "gtfs.zip", compact_ids=True)
+
+    def read(name):
+        with ZipFile(tmp_path / "gtfs.zip") as zf, zf.open(name) as fp:
+            return pd.read_csv(fp, dtype=str)
+
+    assert read("routes.txt")["route_id"].tolist() == ["1", "0"]
+    trips = read("trips.txt")
+    assert trips["trip_id"].tolist() == ["2", "1", "0"]
+    assert trips["service_id"].tolist() == ["1", "0", "0"]
+    assert trips["route_id"].tolist() == ["1", "0", "0"]
+    assert read("stop_times.txt")["trip_id"].tolist() == ["1"]
+    assert read("calendar.txt")["service_id"].tolist() == ["1"]
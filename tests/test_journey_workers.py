@@ -0,0 +1,58 @@
+import pytest
+
+
+def test_journey_workers(small_spec):
+    import copy
+    import io
+    import xml.etree.ElementTree as ET
+
+    import pandas as pd
+    from pandas.testing import assert_frame_equal
+
+    from txc2gtfs.fingerprints import TripFingerprints
+    from txc2gtfs.synthetic import write_txc
+    from txc2gtfs.transxchange import get_gtfs_info, iter_gtfs_info
+    from txc2gtfs.util.xml import NS
+
+    buffer = io.StringIO()
+    write_txc(buffer, small_spec)
+    data = ET.ElementTree(ET.fromstring(buffer.getvalue().encode("utf-8")))
+    # Repeat journeys of the first chunks at the end of the document
+    container = data.find("./txc:VehicleJourneys", NS)
+    journeys = len(container)
+    for journey in list(container)[:3]:
+        container.append(copy.deepcopy(journey))
+
+    sequential_seen, parallel_seen = TripFingerprints(), TripFingerprints()
+    sequential = get_gtfs_info(data, sequential_seen)
+    parallel = pd.concat(
+        iter_gtfs_info(data, parallel_seen, batch_size=4, workers=3),
+        ignore_index=True,
+    )
+
+    assert sequential["vehicle_journey_id"].nunique() == journeys
+    assert_frame_equal(parallel, sequential)
+    assert len(parallel_seen) == len(sequential_seen)
+
+    # Without fingerprints, the repeated journeys are kept in document order
+    assert_frame_equal(get_gtfs_info(data, workers=3), get_gtfs_info(data))
+
+
+@pytest.mark.parametrize("gil_enabled", [True, False])
+def test_journey_workers_need_free_threading(
+    tmp_path, small_spec, monkeypatch, capsys, gil_enabled
+):
+    import sys
+    from zipfile import ZipFile
+
+    from txc2gtfs import convert
+    from txc2gtfs.synthetic import write_corpus
+
+    monkeypatch.setattr(sys, "_is_gil_enabled", lambda: gil_enabled, raising=False)
+    paths = write_corpus(tmp_path / "corpus", 1, small_spec)
+    output = tmp_path / "gtfs.zip"
+    convert(paths, output, naptan=tmp_path / "corpus" / "Stops.csv", journey_workers=2)
+
+    assert ("The GIL is enabled" in capsys.readouterr().out) == gil_enabled
+    with ZipFile(output) as zf:
+        assert "stop_times.txt" in zf.namelist()
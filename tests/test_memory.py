@@ -0,0 +1,54 @@
+import pytest
+
+from txc2gtfs.data import get_path
+
+
+@pytest.fixture
+def test_txc21_data():
+    return get_path("test_txc21_format")
+
+
+def test_memory_probe_records_stages(test_txc21_data):
+    from pathlib import Path
+
+    from txc2gtfs.memory import MemoryProbe
+
+    path = Path(test_txc21_data)
+    with MemoryProbe(path, top=3) as probe:
+        data = [bytes(1024) for _ in range(1024)]
+        probe.stage("xml_tree", journeys=len(data))
+
+    record = probe.record
+    assert record.input_bytes == path.stat().st_size
+    assert record.journeys == 1024
+    assert record.peak_rss > 0
+
+    stage = record.stages[0]
+    assert stage.name == "xml_tree"
+    assert stage.traced_current >= 1024 * 1024
+    assert len(stage.top_allocators) <= 3
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".json"])
+def test_writing_memory_report(tmp_path, test_txc21_data, suffix):
+    import json
+    from pathlib import Path
+
+    import pandas as pd
+
+    from txc2gtfs.memory import MemoryProbe, write_memory_report
+
+    with MemoryProbe(Path(test_txc21_data)) as probe:
+        probe.stage("xml_tree")
+        probe.stage("gtfs_info", gtfs_info_rows=10)
+
+    report = tmp_path / f"memory{suffix}"
+    write_memory_report([probe.record], report)
+
+    if suffix == ".csv":
+        rows = pd.read_csv(report)
+        assert rows.loc[0, "gtfs_info_rows"] == 10
+        assert rows.loc[0, "xml_tree_peak_rss"] > 0
+    else:
+        records = json.loads(report.read_text())
+        assert [s["name"] for s in records[0]["stages"]] == ["xml_tree", "gtfs_info"]
@@ -0,0 +1,48 @@
+import pytest
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    from txc2gtfs.profiling import prepare_profile_dir
+
+    path = tmp_path / "profile"
+    prepare_profile_dir(path)
+    return path
+
+
+def busy_function(n):
+    return sum(i * i for i in range(n))
+
+
+def test_profiled_task_dumps_worker_stats(profile_dir):
+    import os
+
+    from txc2gtfs.profiling import ProfiledTask
+
+    task = ProfiledTask(busy_function, profile_dir)
+    assert task(1000) == busy_function(1000)
+
+    assert (profile_dir / f"worker-{os.getpid()}.pstats").is_file()
+
+
+def test_profiled_task_in_pool(profile_dir):
+    import multiprocessing
+
+    from txc2gtfs.profiling import ProfiledTask, write_profile_report
+
+    with multiprocessing.Pool(2) as pool:
+        pool.map(ProfiledTask(busy_function, profile_dir), [10000] * 8)
+
+    assert list(profile_dir.glob("worker-*.pstats"))
+
+    report = write_profile_report(profile_dir)
+    assert report.is_file()
+    assert (profile_dir / "combined.pstats").is_file()
+    assert "busy_function" in report.read_text()
+
+
+def test_profile_report_requires_stats(profile_dir):
+    from txc2gtfs.profiling import write_profile_report
+
+    with pytest.raises(FileNotFoundError):
+        write_profile_report(profile_dir)
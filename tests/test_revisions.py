@@ -0,0 +1,154 @@
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+
+from txc2gtfs.data import get_path
+
+
+def make_revision(name, digest, revision, modified=None, codes=("S1",)):
+    from txc2gtfs.revisions import FileRevision
+
+    return FileRevision(Path(name), digest, revision, modified, list(codes))
+
+
+def test_highest_revision_is_kept():
+    from txc2gtfs.revisions import select_latest_revisions
+
+    selection = select_latest_revisions(
+        [
+            make_revision("a.xml", "1", 2),
+            make_revision("b.xml", "2", 3),
+            make_revision("c.xml", "3", None),
+            make_revision("d.xml", "4", 1, codes=("S2",)),
+        ]
+    )
+
+    assert selection.paths == [Path("b.xml"), Path("d.xml")]
+    assert selection.superseded == [Path("a.xml"), Path("c.xml")]
+    assert selection.duplicates == []
+
+
+def test_latest_modification_breaks_ties():
+    from txc2gtfs.revisions import select_latest_revisions
+
+    selection = select_latest_revisions(
+        [
+            make_revision("a.xml", "1", 3, datetime(2025, 2, 1, tzinfo=UTC)),
+            # Naive datetimes are taken to be in UTC
+            make_revision("b.xml", "2", 3, datetime(2025, 1, 1)),
+            make_revision("c.xml", "3", 3),
+        ]
+    )
+
+    assert selection.paths == [Path("a.xml")]
+
+
+def test_duplicates_and_files_without_services():
+    from txc2gtfs.revisions import select_latest_revisions
+
+    selection = select_latest_revisions(
+        [
+            make_revision("a.xml", "1", 1),
+            make_revision("b.xml", "1", 1),
+            make_revision("c.xml", "2", None, codes=()),
+        ]
+    )
+
+    assert selection.paths == [Path("a.xml"), Path("c.xml")]
+    assert selection.duplicates == [Path("b.xml")]
+
+
+def test_superseded_services_of_kept_files():
+    from txc2gtfs.revisions import select_latest_revisions
+
+    selection = select_latest_revisions(
+        [
+            make_revision("a.xml", "1", 2, codes=("S1", "S2")),
+            make_revision("b.xml", "2", 2, codes=("S2",)),
+            make_revision("c.xml", "3", 1, codes=("S2",)),
+        ]
+    )
+
+    # a.xml is kept for S1, but S2 is converted from b.xml only
+    assert selection.paths == [Path("a.xml"), Path("b.xml")]
+    assert selection.superseded == [Path("c.xml")]
+    assert selection.services == {Path("a.xml"): frozenset({"S1"})}
+
+
+def test_converting_latest_services(tmp_path, tiny_spec):
+    import io
+    import sqlite3
+    from contextlib import closing
+    from dataclasses import replace
+
+    from txc2gtfs import convert
+    from txc2gtfs.synthetic import write_corpus, write_txc
+
+    # a.xml holds SYN-1 and SYN-2, b.xml a later revision of SYN-1 with more trips
+    spec = tiny_spec
+    write_corpus(tmp_path, 1, spec)
+    naptan = tmp_path / "Stops.csv"
+    paths = [tmp_path / "a.xml", tmp_path / "b.xml"]
+    for path, file_spec, revision in (
+        (paths[0], spec, "1"),
+        (paths[1], replace(spec, services=1, vehicle_journeys=5), "2"),
+    ):
+        fp = io.StringIO()
+        write_txc(fp, file_spec, code="SYN")
+        path.write_text(
+            fp.getvalue().replace(
+                'RevisionNumber="1"', f'RevisionNumber="{revision}"', 1
+            )
+        )
+
+    convert(
+        paths,
+        tmp_path / "gtfs.zip",
+        naptan=naptan,
+        latest_revisions=True,
+        stage_only=True,
+    )
+    with closing(sqlite3.connect(tmp_path / "gtfs.db")) as conn:
+        trips = dict(
+            conn.execute(
+                "SELECT substr(trip_id, 1, 9), COUNT(*) FROM trips GROUP BY 1"
+            ).fetchall()
+        )
+    assert trips == {"JPS_SYN-1": 2 * 5, "JPS_SYN-2": 2 * 3}
+
+
+@pytest.fixture
+def revised_files(tmp_path):
+    import shutil
+
+    source = Path(get_path("test_tfl_format"))
+    paths = [tmp_path / name for name in ("a.xml", "b.xml", "c.xml")]
+    shutil.copy(source, paths[0])
+    shutil.copy(source, paths[1])
+    paths[2].write_bytes(
+        source.read_bytes().replace(b'RevisionNumber="3"', b'RevisionNumber="4"', 1)
+    )
+    return paths
+
+
+def test_reading_revisions(tmp_path, revised_files):
+    from txc2gtfs.catalog import update_catalog
+    from txc2gtfs.revisions import (
+        read_catalog_revisions,
+        read_revisions,
+        select_latest_revisions,
+    )
+
+    update_catalog(tmp_path / "catalog.db", revised_files)
+
+    for revisions in (
+        read_revisions(revised_files, num_workers=2),
+        read_catalog_revisions(tmp_path / "catalog.db", revised_files),
+    ):
+        assert [revision.revision for revision in revisions] == [3, 3, 4]
+
+        selection = select_latest_revisions(revisions)
+        assert selection.paths == [revised_files[2]]
+        assert selection.superseded == [revised_files[0]]
+        assert selection.duplicates == [revised_files[1]]
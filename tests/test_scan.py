@@ -0,0 +1,60 @@
+import pytest
+
+from txc2gtfs.data import get_path
+
+
+@pytest.fixture
+def test_data():
+    return get_path("test_data_dir")
+
+
+@pytest.fixture
+def test_tfl_data():
+    return get_path("test_tfl_format")
+
+
+@pytest.fixture
+def test_txc21_data():
+    return get_path("test_txc21_format")
+
+
+def test_scanning_tfl_file(test_tfl_data):
+    from pathlib import Path
+
+    from txc2gtfs.scan import scan_file
+
+    scan = scan_file(Path(test_tfl_data))
+
+    assert scan.services == 1
+    assert scan.journey_patterns == 43
+    assert scan.sections == 43
+    assert scan.timing_links == 507
+    assert scan.vehicle_journeys == 600
+    assert scan.stops == 43
+    assert scan.peak_memory > scan.size
+
+
+def test_scan_estimates_stop_times(test_txc21_data):
+    import xml.etree.ElementTree as ET
+    from pathlib import Path
+
+    from txc2gtfs.scan import scan_file
+    from txc2gtfs.stop_times import get_stop_times
+    from txc2gtfs.transxchange import get_gtfs_info
+
+    scan = scan_file(Path(test_txc21_data))
+    stop_times = get_stop_times(get_gtfs_info(ET.parse(test_txc21_data)))
+
+    assert scan.stop_times_rows == len(stop_times)
+
+
+def test_manifest_roundtrip(tmp_path, test_data):
+    from txc2gtfs.scan import read_manifest, scan_files, write_manifest
+    from txc2gtfs.util.paths import iterate_paths
+
+    scans = list(scan_files(iterate_paths([test_data]), num_workers=2))
+    totals = write_manifest(scans, tmp_path / "manifest.json")
+
+    assert totals["files"] == len(scans) == 3
+    assert totals["vehicle_journeys"] == sum(s.vehicle_journeys for s in scans)
+    assert read_manifest(tmp_path / "manifest.json") == scans
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+
+@pytest.mark.parametrize("transport", ["unix", "tcp"])
+def test_serving_jobs(tmp_path, corpus, transport):
+    from zipfile import ZipFile
+
+    from txc2gtfs.serve import ConversionService, make_server, submit
+
+    paths, naptan = corpus
+    service = ConversionService("threads", 2, naptan)
+    address = tmp_path / "txc2gtfs.sock" if transport == "unix" else ("127.0.0.1", 0)
+    server = make_server(address, service)
+    if transport == "tcp":
+        address = server.server_address[:2]
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        for i in range(2):
+            output = tmp_path / f"job{i}" / "gtfs.zip"
+            output.parent.mkdir()
+            result = submit(address, paths, output, compact_ids=True)
+
+            assert result["output"] == str(output)
+            assert result["paths"] == [str(output), str(output.parent / "gtfs_ids.csv")]
+            assert result["files"] == 2
+            assert result["staged_rows"]["trips"] == 24
+            with ZipFile(output) as zf:
+                assert "stop_times.txt" in zf.namelist()
+
+        with pytest.raises(RuntimeError, match=r"\(400\).*naptan"):
+            submit(address, paths, tmp_path / "gtfs.zip", naptan="Stops.csv")
+        assert service.status()["jobs"] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+        thread.join()
+
+
+def test_failed_job_waits_for_its_files(tmp_path, corpus, monkeypatch):
+    import time
+
+    import txc2gtfs.converter
+    from txc2gtfs.serve import ConversionService
+
+    paths, naptan = corpus
+    broken = tmp_path / "corpus" / "broken.xml"
+    broken.write_text("<TransXChange>")
+    parse = txc2gtfs.converter._parse_txc_to_db
+    done = []
+
+    def slow_parse(options, txc_file):
+        if txc_file != broken:
+            time.sleep(0.5)
+        result = parse(options, txc_file)
+        done.append(txc_file)
+        return result
+
+    monkeypatch.setattr(txc2gtfs.converter, "_parse_txc_to_db", slow_parse)
+    service = ConversionService("threads", 2, naptan)
+    try:
+        with pytest.raises(Exception, match="TransXChange"):
+            service.run(
+                {
+                    "input": [str(broken), *map(str, paths)],
+                    "output": str(tmp_path / "gtfs.zip"),
+                }
+            )
+        # No file is still writing to the staging database once the job failed
+        assert sorted(done) == sorted(paths)
+        assert service.status()["failed"] == 1
+    finally:
+        service.close()
@@ -0,0 +1,127 @@
+import io
+
+import pytest
+
+
+def test_simplify_drops_points_within_tolerance():
+    import numpy as np
+
+    from txc2gtfs.shapes import simplify
+
+    # About 1 m off a 1 km straight line
+    lons = np.linspace(-0.1, -0.1 + 0.0146, 50)
+    lats = np.full(50, 51.5)
+    lats[1:-1] += np.tile([1e-5, -1e-5], 24)
+    coords = np.column_stack((lats, lons))
+
+    simplified = simplify(coords, 2.0)
+    assert simplified.tolist() == coords[[0, -1]].tolist()
+
+    assert len(simplify(coords, 0)) == 50
+
+
+def test_simplify_keeps_corners():
+    import numpy as np
+
+    from txc2gtfs.shapes import simplify
+
+    coords = np.array(
+        [
+            [51.5, -0.1],
+            [51.5, -0.099],
+            [51.5, -0.098],
+            [51.501, -0.098],
+            [51.502, -0.098],
+        ]
+    )
+    assert simplify(coords, 2.0).tolist() == coords[[0, 2, 4]].tolist()
+
+
+@pytest.fixture
+def synthetic_tree():
+    import xml.etree.ElementTree as ET
+
+    from txc2gtfs.synthetic import SyntheticSpec, write_txc
+
+    fp = io.StringIO()
+    write_txc(fp, SyntheticSpec(timing_links=4, track_points=5, stops=100))
+    fp.seek(0)
+    return ET.parse(fp)
+
+
+def test_route_geometries(synthetic_tree):
+    from txc2gtfs.shapes import get_route_geometries
+
+    geometries = get_route_geometries(synthetic_tree)
+    assert sorted(geometries) == ["R_SYN-1-1-1", "R_SYN-1-1-2"]
+    for coords in geometries.values():
+        assert coords.shape == (4 * 5, 2)
+
+
+def test_shapes_table(synthetic_tree):
+    import sqlite3
+
+    from txc2gtfs.shapes import ShapesTable
+
+    with sqlite3.connect(":memory:") as conn:
+        cur = conn.cursor()
+        table = ShapesTable(cur, tolerance=0)
+        table.populate(cur, synthetic_tree, None)
+        assert sorted(table.route_shapes) == ["R_SYN-1-1-1", "R_SYN-1-1-2"]
+
+        # Populating again, e.g. from another file, does not duplicate the shapes
+        ShapesTable(cur, tolerance=0).populate(cur, synthetic_tree, None)
+        for shape_id in table.route_shapes.values():
+            sequences = [
+                row[0]
+                for row in cur.execute(
+                    "SELECT shape_pt_sequence FROM shapes WHERE shape_id = ? "
+                    "ORDER BY shape_pt_sequence",
+                    (shape_id,),
+                )
+            ]
+            assert sequences == list(range(1, 21))
+
+
+def _track(*points):
+    locations = "".join(
+        f"<Location><Longitude>{lon}</Longitude><Latitude>{lat}</Latitude></Location>"
+        for lat, lon in points
+    )
+    return f"<Track><Mapping>{locations}</Mapping></Track>"
+
+
+def test_route_geometries_merge_shared_end_points():
+    import xml.etree.ElementTree as ET
+
+    from txc2gtfs.shapes import get_route_geometries
+
+    a, b, c, d = (51.5, -0.1), (51.5, -0.099), (51.501, -0.099), (51.502, -0.098)
+    # The links, and the two sections of the route, meet at shared points
+    data = ET.ElementTree(
+        ET.fromstring(f"""
+<TransXChange xmlns="http://www.transxchange.org.uk/">
+  <RouteSections>
+    <RouteSection id="RS1">
+      <RouteLink id="RL1">{_track(a, b)}</RouteLink>
+      <RouteLink id="RL2">{_track(b, c)}</RouteLink>
+    </RouteSection>
+    <RouteSection id="RS2">
+      <RouteLink id="RL3">{_track(c, d)}</RouteLink>
+    </RouteSection>
+  </RouteSections>
+  <Routes>
+    <Route id="R1">
+      <RouteSectionRef>RS1</RouteSectionRef>
+      <RouteSectionRef>RS2</RouteSectionRef>
+    </Route>
+  </Routes>
+</TransXChange>
+""")
+    )
+    assert get_route_geometries(data)["R1"].tolist() == [
+        list(a),
+        list(b),
+        list(c),
+        list(d),
+    ]
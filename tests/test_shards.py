@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import pytest
+
+
+@pytest.mark.parametrize("text, index, count", [("0/1", 0, 1), ("2/4", 2, 4)])
+def test_parse_shard(text, index, count):
+    from txc2gtfs.shards import Shard
+
+    shard = Shard.parse(text)
+    assert (shard.index, shard.count) == (index, count)
+    assert str(shard) == text
+
+
+@pytest.mark.parametrize("text", ["4/4", "1", "a/2", "-1/2", "0/0"])
+def test_invalid_shard(text):
+    from txc2gtfs.shards import Shard
+
+    with pytest.raises(ValueError, match="shard"):
+        Shard.parse(text)
+
+
+@pytest.mark.parametrize("by", ["hash", "cost"])
+def test_every_file_in_one_shard(by):
+    from txc2gtfs.shards import Shard, select_shard
+
+    paths = [Path(f"/data/file{i:02}.xml") for i in range(20)]
+    costs = {path.resolve(): (i * 7919) % 100 for i, path in enumerate(paths)}
+
+    shards = [select_shard(paths, Shard(i, 3), by, costs) for i in range(3)]
+    assert sorted(path for shard in shards for path in shard) == paths
+    # Files keep their order within a shard
+    assert all(shard == sorted(shard) for shard in shards)
+
+    if by == "cost":
+        loads = [sum(costs[path.resolve()] for path in shard) for shard in shards]
+        assert max(loads) - min(loads) <= max(costs.values())
+
+
+def test_sharded_conversion(tmp_path):
+    import shutil
+    import sqlite3
+    from zipfile import ZipFile
+
+    from txc2gtfs import convert
+    from txc2gtfs.merge import merge_partials
+    from txc2gtfs.synthetic import SyntheticSpec, write_corpus
+
+    spec = SyntheticSpec(
+        services=2, journey_patterns=2, vehicle_journeys=3, stops=50, track_points=3
+    )
+    paths = write_corpus(tmp_path / "corpus", 4, spec)
+    # A copy of a file, whose trips are dropped as duplicates by the merge
+    paths.append(shutil.copy(paths[0], tmp_path / "corpus" / "copy.xml"))
+    naptan = tmp_path / "corpus" / "Stops.csv"
+
+    (tmp_path / "whole").mkdir()
+    convert(paths, tmp_path / "whole" / "gtfs.zip", naptan=naptan, shapes=True)
+
+    # Each shard converted in a directory of its own, as on a node of its own
+    parts = []
+    for i in range(3):
+        node = tmp_path / f"node{i}"
+        node.mkdir()
+        parts.append(node / "part.db")
+        convert(paths, parts[-1], naptan=naptan, shapes=True, shard=f"{i}/3")
+
+    merge_partials(parts, tmp_path / "gtfs.zip")
+
+    def read(path):
+        with ZipFile(path) as zf:
+            return {name: sorted(zf.read(name).splitlines()) for name in zf.namelist()}
+
+    assert read(tmp_path / "gtfs.zip") == read(tmp_path / "whole" / "gtfs.zip")
+
+    # A stop of the first shard that differs in the last one: the lowest shard
+    # wins, in whatever order the parts are given
+    with sqlite3.connect(parts[0]) as conn:
+        stop_ids = {stop_id for (stop_id,) in conn.execute("SELECT id FROM stops")}
+    conn.close()
+    with sqlite3.connect(parts[2]) as conn:
+        (stop_id,) = next(
+            row
+            for row in conn.execute("SELECT id FROM stops ORDER BY id")
+            if row[0] in stop_ids
+        )
+        conn.execute("UPDATE stops SET name = 'Shard 2' WHERE id = ?", (stop_id,))
+    conn.close()
+    merge_partials(parts, tmp_path / "gtfs.zip")
+    merge_partials(parts[::-1], tmp_path / "reversed.zip")
+    with ZipFile(tmp_path / "gtfs.zip") as zf, ZipFile(tmp_path / "reversed.zip") as rz:
+        assert zf.namelist() == rz.namelist()
+        for name in zf.namelist():
+            assert zf.read(name) == rz.read(name)
+        assert b"Shard 2" not in zf.read("stops.txt")
+
+    with pytest.raises(ValueError, match=r"Shards \[2\] are missing"):
+        merge_partials(parts[:2], tmp_path / "gtfs.zip")
+    with pytest.raises(ValueError, match="not a partial"):
+        merge_partials([tmp_path / "whole" / "gtfs.db"], tmp_path / "gtfs.zip")
+
+
+def test_merging_calendar_dates(tmp_path):
+    import sqlite3
+    from zipfile import ZipFile
+
+    from txc2gtfs.merge import create_merge_indexes, merge_partials
+    from txc2gtfs.shards import Shard, write_shard_manifest
+
+    # S1 has two exception dates, one of them in both shards
+    rows = [
+        [("S1", "20250101", 2), ("S1", "20250526", 2)],
+        [("S1", "20250526", 2), ("S2", "20250101", 1)],
+    ]
+    parts = []
+    for index, shard_rows in enumerate(rows):
+        parts.append(tmp_path / f"part{index}.db")
+        with sqlite3.connect(parts[-1]) as conn:
+            write_shard_manifest(conn, Shard(index, 2), [])
+            conn.execute(
+                "CREATE TABLE calendar_dates (service_id TEXT, date TEXT, "
+                "exception_type INTEGER)"
+            )
+            conn.executemany("INSERT INTO calendar_dates VALUES (?, ?, ?)", shard_rows)
+            create_merge_indexes(conn)
+        conn.close()
+
+    assert merge_partials(parts, tmp_path / "gtfs.zip")["calendar_dates.txt"] == 3
+    with ZipFile(tmp_path / "gtfs.zip") as zf:
+        assert zf.read("calendar_dates.txt").decode().splitlines() == [
+            '"service_id","date","exception_type"',
+            '"S1","20250101",2',
+            '"S1","20250526",2',
+            '"S2","20250101",1',
+        ]
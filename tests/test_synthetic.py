@@ -0,0 +1,212 @@
+import pytest
+
+
+def parse_spec(spec):
+    import io
+    import xml.etree.ElementTree as ET
+
+    from txc2gtfs.synthetic import write_txc
+
+    buffer = io.StringIO()
+    write_txc(buffer, spec)
+    return ET.ElementTree(ET.fromstring(buffer.getvalue().encode("utf-8")))
+
+
+def test_synthetic_document_shape(small_spec):
+    from txc2gtfs.transxchange import get_gtfs_info
+    from txc2gtfs.util.xml import NS
+
+    data = parse_spec(small_spec)
+
+    patterns = small_spec.services * small_spec.journey_patterns
+    journeys = data.findall("./txc:VehicleJourneys/txc:VehicleJourney", NS)
+    assert len(journeys) == patterns * small_spec.vehicle_journeys
+
+    # Every journey visits one stop more than it has timing links
+    gtfs_info = get_gtfs_info(data)
+    assert len(gtfs_info) == len(journeys) * (small_spec.timing_links + 1)
+    assert gtfs_info["weekdays"].nunique() == small_spec.operating_profiles
+
+
+def test_journey_pattern_sections(small_spec):
+    from dataclasses import replace
+
+    from txc2gtfs.transxchange import get_gtfs_info
+
+    spec = replace(small_spec, sections=3, timing_links=2)
+    gtfs_info = get_gtfs_info(parse_spec(spec))
+
+    # The sections of a pattern make up one trip through all of their stops
+    journeys = spec.services * spec.journey_patterns * spec.vehicle_journeys
+    assert gtfs_info["trip_id"].nunique() == journeys
+    for _, trip in gtfs_info.groupby("trip_id"):
+        assert trip["stop_sequence"].tolist() == list(range(1, 3 * 2 + 2))
+        assert trip["stop_id"].is_unique
+        assert trip["arrival_time"].is_monotonic_increasing
+        assert trip["trip_id"].iloc[0].startswith(f"JPS_{trip['service_ref'].iloc[0]}-")
+
+
+def test_gtfs_info_batches(small_spec):
+    import pandas as pd
+    from pandas.testing import assert_frame_equal
+
+    from txc2gtfs.calendar import get_calendar
+    from txc2gtfs.transxchange import (
+        GtfsInfoSummary,
+        generate_service_id,
+        get_gtfs_info,
+        iter_gtfs_info,
+    )
+
+    data = parse_spec(small_spec)
+    gtfs_info = get_gtfs_info(data)
+
+    batches = list(iter_gtfs_info(data, batch_size=5))
+    assert [len(batch) for batch in batches[:-1]] == [5 * 6] * (len(batches) - 1)
+
+    summary = GtfsInfoSummary()
+    for batch in batches:
+        summary.add(batch)
+
+    # Batches get the same service_ids as the whole document at once
+    whole = generate_service_id(gtfs_info.drop(columns="service_id"))
+    assert_frame_equal(pd.concat(batches, ignore_index=True), whole, check_dtype=False)
+    assert_frame_equal(get_calendar(summary.frame), get_calendar(whole))
+
+
+def test_failed_file_leaves_no_rows(tmp_path, small_spec, monkeypatch):
+    import sqlite3
+    from contextlib import closing
+
+    import txc2gtfs.converter
+    from txc2gtfs import convert
+    from txc2gtfs.synthetic import write_corpus
+
+    paths = write_corpus(tmp_path / "corpus", 2, small_spec)
+    naptan = tmp_path / "corpus" / "Stops.csv"
+    output = tmp_path / "gtfs.zip"
+    get_calendar = txc2gtfs.converter.get_calendar
+    calls = []
+
+    # The second file fails once the stop_times of its journeys are staged
+    def failing_calendar(gtfs_info):
+        calls.append(gtfs_info)
+        if len(calls) == 2:
+            raise RuntimeError("Calendar failed")
+        return get_calendar(gtfs_info)
+
+    monkeypatch.setattr(txc2gtfs.converter, "get_calendar", failing_calendar)
+    with pytest.raises(RuntimeError, match="Calendar failed"):
+        convert(paths, output, naptan=naptan, stage_only=True)
+
+    def count(conn, sql):
+        return conn.execute(sql).fetchone()[0]
+
+    spec = small_spec
+    trips = spec.services * spec.journey_patterns * spec.vehicle_journeys
+    orphans = (
+        "SELECT COUNT(*) FROM stop_times "
+        "WHERE trip_id NOT IN (SELECT trip_id FROM trips)"
+    )
+    with closing(sqlite3.connect(tmp_path / "gtfs.db")) as conn:
+        assert count(conn, "SELECT COUNT(*) FROM trips") == trips
+        assert count(conn, "SELECT COUNT(*) FROM trip_fingerprints") == trips
+        assert count(conn, orphans) == 0
+    assert not list(tmp_path.glob(".gtfs-*.db"))
+
+    # The trips of the failed file are staged when it is converted again
+    convert(paths[1:], output, naptan=naptan, stage_only=True, append_to_existing=True)
+    with closing(sqlite3.connect(tmp_path / "gtfs.db")) as conn:
+        assert count(conn, "SELECT COUNT(*) FROM trips") == 2 * trips
+        assert count(conn, orphans) == 0
+
+
+def test_synthetic_document_is_deterministic(small_spec):
+    import io
+
+    from txc2gtfs.synthetic import write_txc
+
+    first, second = io.StringIO(), io.StringIO()
+    write_txc(first, small_spec)
+    write_txc(second, small_spec)
+    assert first.getvalue() == second.getvalue()
+
+
+@pytest.mark.parametrize("size", ["16KB", "256KB", "2MB"])
+def test_spec_for_size(size):
+    import io
+
+    from txc2gtfs.synthetic import parse_size, spec_for_size, write_txc
+
+    target = parse_size(size)
+    buffer = io.StringIO()
+    write_txc(buffer, spec_for_size(target))
+    assert abs(len(buffer.getvalue()) - target) / target < 0.05
+
+
+def test_large_document_keeps_every_journey(tmp_path):
+    import sqlite3
+    from contextlib import closing
+
+    from txc2gtfs import convert
+    from txc2gtfs.synthetic import (
+        MAX_VEHICLE_JOURNEYS,
+        SyntheticSpec,
+        parse_size,
+        spec_for_size,
+        write_corpus,
+    )
+    from txc2gtfs.util.xml import NS, parse_xml
+
+    spec = spec_for_size(
+        parse_size("1.05MB"),
+        SyntheticSpec(
+            journey_patterns=1,
+            timing_links=2,
+            operating_profiles=1,
+            bank_holiday_exceptions=0,
+            stops=20,
+        ),
+    )
+    # More journeys than fit in a single pattern, one per minute
+    assert spec.services > 1
+    assert spec.vehicle_journeys <= MAX_VEHICLE_JOURNEYS
+    (path,) = write_corpus(tmp_path / "corpus", 1, spec)
+    assert path.stat().st_size > parse_size("1MB")
+
+    journeys = parse_xml(path).findall("./txc:VehicleJourneys/txc:VehicleJourney", NS)
+    convert(
+        [path],
+        tmp_path / "gtfs.zip",
+        naptan=tmp_path / "corpus" / "Stops.csv",
+        stage_only=True,
+    )
+    with closing(sqlite3.connect(tmp_path / "gtfs.db")) as conn:
+        (trips,) = conn.execute("SELECT COUNT(DISTINCT trip_id) FROM trips").fetchone()
+    assert trips == len(journeys)
+
+    with pytest.raises(ValueError, match="at most"):
+        write_corpus(
+            tmp_path / "full",
+            1,
+            SyntheticSpec(vehicle_journeys=MAX_VEHICLE_JOURNEYS + 1),
+        )
+
+
+def test_converting_synthetic_corpus(tmp_path, small_spec):
+    from zipfile import ZipFile
+
+    import pandas as pd
+
+    from txc2gtfs import convert
+    from txc2gtfs.synthetic import write_corpus
+
+    paths = write_corpus(tmp_path / "corpus", 3, small_spec)
+    output = tmp_path / "gtfs.zip"
+    convert(paths, output, naptan=tmp_path / "corpus" / "Stops.csv")
+
+    with ZipFile(output) as zf, zf.open("trips.txt") as fp:
+        trips = pd.read_csv(fp)
+    assert trips["route_id"].nunique() == 3 * small_spec.services * (
+        small_spec.journey_patterns
+    )
@@ -0,0 +1,51 @@
+import pytest
+
+
+def test_convert_to_tables(tmp_path, corpus):
+    from zipfile import ZipFile
+
+    import pandas as pd
+
+    from txc2gtfs import convert, convert_to_tables
+
+    paths, naptan = corpus
+    tables = convert_to_tables(paths, naptan=naptan)
+
+    convert(paths, tmp_path / "gtfs.zip", naptan=naptan)
+    with ZipFile(tmp_path / "gtfs.zip") as zf:
+        assert sorted(f"{name}.txt" for name in tables) == sorted(zf.namelist())
+        for name, table in tables.items():
+            with zf.open(f"{name}.txt") as fp:
+                feed = pd.read_csv(fp)
+            assert list(table.columns) == list(feed.columns)
+            assert len(table) == len(feed)
+
+    stop_times = tables["stop_times"]
+    assert stop_times["trip_id"].dtype == "category"
+    assert stop_times["arrival_time"].dtype == "Int32"
+    assert stop_times["arrival_time"].min() >= 5 * 3600
+    assert tables["stops"]["stop_lat"].dtype == "float64"
+
+
+def test_iter_tables(corpus):
+    pytest.importorskip("pyarrow")
+    import pyarrow as pa
+
+    from txc2gtfs import iter_tables
+
+    paths, naptan = corpus
+    tables = iter_tables(
+        paths, "arrow", ["stop_times", "frequencies", "trips"], naptan=naptan
+    )
+
+    # Frequencies were not staged
+    assert [name for name, _ in tables] == ["stop_times", "trips"]
+
+    _, trips = next(
+        iter_tables(paths, "arrow", ["trips"], compact_ids=True, naptan=naptan)
+    )
+    assert pa.types.is_dictionary(trips.schema.field("trip_id").type)
+    assert "0" in trips["trip_id"].to_pylist()
+
+    with pytest.raises(ValueError, match="Unknown GTFS tables"):
+        next(iter_tables(paths, tables=["pathways"]))
@@ -0,0 +1,77 @@
+import pytest
+
+
+def test_get_transfers():
+    import numpy as np
+    import pandas as pd
+
+    from txc2gtfs.transfers import get_transfers, haversine
+
+    rng = np.random.default_rng(1)
+    n = 500
+    stops = pd.DataFrame(
+        {
+            "id": [f"S{i}" for i in range(n)],
+            "lat": rng.uniform(53.40, 53.45, n),
+            "lon": rng.uniform(-2.30, -2.20, n),
+        }
+    )
+    transfers = get_transfers(stops, 250)
+
+    lat, lon = stops["lat"].to_numpy(), stops["lon"].to_numpy()
+    distances = haversine(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    a, b = np.nonzero((distances <= 250) & ~np.eye(n, dtype=bool))
+    ids = stops["id"].to_numpy()
+    assert set(zip(transfers["from_stop_id"], transfers["to_stop_id"])) == set(
+        zip(ids[a], ids[b])
+    )
+    assert (transfers["transfer_type"] == 2).all()
+    assert (transfers["min_transfer_time"] <= np.ceil(250 / 1.2)).all()
+
+
+def test_get_transfers_edge_cases():
+    import pandas as pd
+
+    from txc2gtfs.transfers import get_transfers
+
+    # 99.9 m apart along a meridian, and a stop without coordinates
+    stops = pd.DataFrame(
+        {
+            "id": ["A", "B", "C"],
+            "lat": [51.5, 51.5 + 99.9 / 111_195, None],
+            "lon": [-0.1, -0.1, -0.1],
+        }
+    )
+    transfers = get_transfers(stops, 150, walking_speed=1.0)
+    assert transfers.values.tolist() == [["A", "B", 2, 100], ["B", "A", 2, 100]]
+    assert get_transfers(stops, 50).empty
+    assert get_transfers(stops.iloc[:1], 150).empty
+
+
+def test_convert_transfers(tmp_path, corpus):
+    from zipfile import ZipFile
+
+    import pandas as pd
+
+    from txc2gtfs import convert
+
+    paths, naptan = corpus
+    output = tmp_path / "gtfs.zip"
+    convert(paths, output, naptan=naptan, transfers=True, transfer_radius=2000)
+
+    with ZipFile(output) as zf:
+        with zf.open("stops.txt") as fp:
+            stop_ids = set(pd.read_csv(fp)["stop_id"])
+        with zf.open("transfers.txt") as fp:
+            transfers = pd.read_csv(fp)
+    assert len(transfers) > 0
+    assert set(transfers["from_stop_id"]) <= stop_ids
+    assert list(transfers.columns) == [
+        "from_stop_id",
+        "to_stop_id",
+        "transfer_type",
+        "min_transfer_time",
+    ]
+
+    with pytest.raises(ValueError, match="shards"):
+        convert(paths, tmp_path / "part.db", transfers=True, shard="0/2")
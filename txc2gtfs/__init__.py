@@ -1,3 +1,26 @@
-from txc2gtfs.converter import convert
+from typing import TYPE_CHECKING
 
-__all__ = ["convert"]
+if TYPE_CHECKING:
+    from txc2gtfs.aio import convert_async
+    from txc2gtfs.converter import convert
+    from txc2gtfs.tables import convert_to_tables, iter_tables
+
+__all__ = ["convert", "convert_async", "convert_to_tables", "iter_tables"]
+
+
+def __getattr__(name: str) -> object:
+    # The converter pulls in pandas and lxml, which are only loaded once a
+    # conversion is actually requested to keep e.g. ``txc2gtfs --help`` fast
+    if name == "convert":
+        from txc2gtfs.converter import convert
+
+        return convert
+    if name == "convert_async":
+        from txc2gtfs.aio import convert_async
+
+        return convert_async
+    if name in ("convert_to_tables", "iter_tables"):
+        from txc2gtfs import tables
+
+        return getattr(tables, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
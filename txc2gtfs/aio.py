@@ -0,0 +1,172 @@
+"""
+Asyncio interface of the converter.
+
+:func:`convert_async` runs a conversion without blocking the event loop. The files
+are handed to a pool of worker processes one by one through
+``loop.run_in_executor``. Every file is reported as soon as it is done, as a
+:class:`FileEvent` with its timing, the rows it staged or the error it failed with:
+
+    async for event in convert_async(paths, "gtfs.zip", num_workers=4):
+        print(event.path.name, event.seconds, event.rows, event.error)
+
+The feed is written once all files are done, before the iteration ends. A file
+that fails is reported like the others, and the conversion of the rest goes on,
+but the feed is not written as it might hold part of the failed file: the
+iteration then raises once all files are done. Cancelling the task iterating over
+the events, or leaving the loop early within :func:`contextlib.aclosing`, cancels
+the files that have not started yet and waits for the workers to finish the
+files they are converting, so that none is stopped halfway through writing to the
+staging database; the feed is then not written either.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .converter import Engine, FileResult, convert
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+
+@dataclass(frozen=True)
+class FileEvent:
+    """Completion of a file: its conversion time and staged rows, or its error"""
+
+    path: Path
+    seconds: float
+    rows: dict[str, int] = field(default_factory=dict)
+    error: str | None = None
+
+
+class _EventExecutor(Executor):
+    """
+    Executor handed to ``convert``, which runs the file tasks on a pool from the
+    event loop and reports each file to a queue as it completes.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        pool: Executor,
+        events: asyncio.Queue[FileEvent],
+    ) -> None:
+        self._loop = loop
+        self._pool = pool
+        self._events = events
+        self._lock = threading.Lock()
+        self._futures: list[concurrent.futures.Future[FileResult]] = []
+        self._cancelled = False
+
+    def submit(  # type: ignore[override]
+        self, fn: Callable[[Path], FileResult], /, path: Path
+    ) -> concurrent.futures.Future[FileResult]:
+        # Called from the thread of the conversion, which waits for all files
+        with self._lock:
+            if self._cancelled:
+                raise concurrent.futures.CancelledError
+            future = asyncio.run_coroutine_threadsafe(self._run(fn, path), self._loop)
+            self._futures.append(future)
+        return future
+
+    async def _run(self, fn: Callable[[Path], FileResult], path: Path) -> FileResult:
+        start = time.perf_counter()
+        try:
+            result = await self._loop.run_in_executor(self._pool, fn, path)
+        except Exception as e:
+            await self._events.put(
+                FileEvent(
+                    path, time.perf_counter() - start, error=f"{type(e).__name__}: {e}"
+                )
+            )
+            raise
+        await self._events.put(
+            FileEvent(path, time.perf_counter() - start, result.rows)
+        )
+        return result
+
+    def cancel(self) -> None:
+        """Cancel the files that have not started, and any that come later"""
+        with self._lock:
+            self._cancelled = True
+            for future in self._futures:
+                future.cancel()
+
+
+async def convert_async(
+    input: Iterable[StrPath],
+    output: StrPath,
+    num_workers: int = 1,
+    engine: Engine = "processes",
+    **options: Any,
+) -> AsyncIterator[FileEvent]:
+    """
+    Convert TransXChange files into a GTFS feed on ``num_workers`` worker
+    processes (or threads, with ``engine="threads"``), generating a
+    :class:`FileEvent` as each file is done. The other ``options`` are those of
+    :func:`txc2gtfs.convert`. Errors of the conversion as a whole, e.g. of
+    writing the feed, are raised once the events of the files are generated.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[FileEvent] = asyncio.Queue()
+    pool: Executor
+    if engine == "threads":
+        pool = ThreadPoolExecutor(num_workers)
+    else:
+        # Forking a process with an event loop and other threads running is unsafe
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        pool = ProcessPoolExecutor(num_workers, mp_context=context)
+    executor = _EventExecutor(loop, pool, events)
+    conversion = loop.run_in_executor(
+        None,
+        partial(convert, input, output, engine=engine, executor=executor, **options),
+    )
+    event: asyncio.Future[FileEvent] | None = None
+    failed = 0
+    try:
+        while not conversion.done():
+            event = asyncio.ensure_future(events.get())
+            await asyncio.wait({event, conversion}, return_when=asyncio.FIRST_COMPLETED)
+            if event.done():
+                file_event = event.result()
+                failed += file_event.error is not None
+                yield file_event
+
+        # The events of all files are queued before the conversion is done
+        while not events.empty():
+            file_event = events.get_nowait()
+            failed += file_event.error is not None
+            yield file_event
+        try:
+            conversion.result()
+        except Exception as e:
+            if failed:
+                raise RuntimeError(
+                    f"Converting {failed} file(s) failed, see their events"
+                ) from e
+            raise
+    finally:
+        if event is not None:
+            event.cancel()
+        if not conversion.done():
+            executor.cancel()
+        # Let the workers finish the files they are converting
+        await loop.run_in_executor(None, partial(pool.shutdown, cancel_futures=True))
+        # Its error, if any, is raised above unless the iteration was left early
+        try:
+            await conversion
+        except (asyncio.CancelledError, Exception):
+            pass
@@ -1,7 +1,7 @@
 import json
 from dataclasses import dataclass
 from datetime import datetime
-from functools import total_ordering
+from functools import cache, total_ordering
 from typing import cast
 
 import pandas as pd
@@ -42,17 +42,19 @@ class BankHoliday:
         )
 
 
-def get_bank_holidays() -> set[BankHoliday]:
+@cache
+def get_bank_holidays() -> frozenset[BankHoliday]:
+    """UK bank holidays, read once per process and shared by every file and thread"""
     bank_holidays_path = download_cached(_BANK_HOLIDAYS_JSON_URL)
 
     with bank_holidays_path.open("r", encoding="utf-8") as fp:
         bank_holidays: dict[str, dict[str, str | list[Event]]] = json.load(fp)
 
-        return {
+        return frozenset(
             BankHoliday.from_event(event)
             for division in bank_holidays.values()
             for event in cast(list[Event], division["events"])
-        }
+        )
 
 
 def get_bank_holiday_dates(gtfs_info: pd.DataFrame) -> list[str]:
@@ -1,3 +1,5 @@
+import hashlib
+
 import pandas as pd
 
 from txc2gtfs.util.xml import NS, XMLElement
@@ -67,3 +69,57 @@ def get_calendar(gtfs_info: pd.DataFrame):
             "end_date",
         ]
     ]
+
+
+def get_calendar_fingerprint(row: pd.Series, exceptions: list[tuple[str, int]]) -> str:
+    """
+    Compact service_id of a calendar: a hash of its weekday mask, operating period
+    and exception dates, so that services with identical calendars share an id in
+    every file and worker.
+    """
+    mask = "".join(str(int(row[day])) for day in _DAYS_OF_THE_WEEK)
+    start_date = row["start_date"] if isinstance(row["start_date"], str) else ""
+    end_date = row["end_date"] if isinstance(row["end_date"], str) else ""
+    digest = hashlib.blake2b(digest_size=6)
+    digest.update(f"{mask}\0{start_date}\0{end_date}".encode())
+    for date, exception_type in sorted(exceptions):
+        digest.update(f"\0{date}:{exception_type}".encode())
+    return f"c{digest.hexdigest()}"
+
+
+def canonicalize_service_ids(
+    trips: pd.DataFrame,
+    calendar: pd.DataFrame,
+    calendar_dates: pd.DataFrame | None,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame | None]:
+    """
+    Replace the service_ids of the trips, calendar and calendar_dates by the
+    fingerprint of their calendar, keeping a single row per distinct calendar.
+    """
+    exceptions: dict[str, list[tuple[str, int]]] = {}
+    if calendar_dates is not None:
+        for service_id, date, exception_type in calendar_dates.itertuples(index=False):
+            exceptions.setdefault(service_id, []).append((date, exception_type))
+
+    service_ids = {
+        row["service_id"]: get_calendar_fingerprint(
+            row, exceptions.get(row["service_id"], [])
+        )
+        for _, row in calendar.iterrows()
+    }
+
+    trips = trips.assign(service_id=trips["service_id"].map(service_ids))
+    calendar = (
+        calendar.assign(service_id=calendar["service_id"].map(service_ids))
+        .drop_duplicates(subset=["service_id"])
+        .reset_index(drop=True)
+    )
+    if calendar_dates is not None:
+        calendar_dates = (
+            calendar_dates.assign(
+                service_id=calendar_dates["service_id"].map(service_ids)
+            )
+            .drop_duplicates()
+            .reset_index(drop=True)
+        )
+    return trips, calendar, calendar_dates
@@ -0,0 +1,228 @@
+"""
+Catalog of the metadata of TransXChange files.
+
+The catalog is a small SQLite database with the size, modification time, content
+hash and revision of every file, and the service codes, operators, operating
+periods, modes and line names from its header. It is updated incrementally: only
+files whose size or modification time changed are read again, with a streaming
+header read. Files are then selected from the catalog with a query on its
+``catalog`` view, which has a row per file, service, line name and operator code:
+
+    path, size, mtime, hash, revision, modified, service_code, operator_ref,
+    operator_code, mode, line_name, start_date, end_date
+
+Dates are stored as ISO strings (YYYY-MM-DD), so they can be compared as such.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .header import Header, read_header
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    hash TEXT,
+    revision INTEGER,
+    modified TEXT
+);
+CREATE TABLE IF NOT EXISTS services (
+    path TEXT REFERENCES files(path) ON DELETE CASCADE,
+    code TEXT,
+    operator_ref TEXT,
+    mode TEXT,
+    start_date TEXT,
+    end_date TEXT
+);
+CREATE INDEX IF NOT EXISTS services_path ON services(path);
+CREATE TABLE IF NOT EXISTS operators (
+    path TEXT REFERENCES files(path) ON DELETE CASCADE,
+    id TEXT,
+    code TEXT
+);
+CREATE INDEX IF NOT EXISTS operators_path ON operators(path);
+CREATE TABLE IF NOT EXISTS lines (
+    path TEXT REFERENCES files(path) ON DELETE CASCADE,
+    service_code TEXT,
+    name TEXT
+);
+CREATE INDEX IF NOT EXISTS lines_path ON lines(path);
+CREATE VIEW IF NOT EXISTS catalog AS
+SELECT
+    f.path, f.size, f.mtime, f.hash, f.revision, f.modified,
+    s.code AS service_code, s.operator_ref, o.code AS operator_code, s.mode,
+    l.name AS line_name, s.start_date, s.end_date
+FROM files f
+LEFT JOIN services s ON s.path = f.path
+LEFT JOIN operators o ON o.path = f.path AND o.id = s.operator_ref
+LEFT JOIN lines l ON l.path = f.path AND l.service_code = s.code;
+"""
+
+
+@dataclass
+class CatalogEntry:
+    path: str
+    size: int
+    mtime: float
+    hash: str
+    header: Header
+
+
+@dataclass
+class CatalogUpdate:
+    files: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+def hash_file(path: Path) -> str:
+    """Hash of the content of a file, identifying byte-for-byte duplicates"""
+    with open(path, "rb") as fp:
+        digest = hashlib.file_digest(fp, lambda: hashlib.blake2b(digest_size=16))
+    return digest.hexdigest()
+
+
+def read_entry(path: Path) -> CatalogEntry:
+    stat = path.stat()
+    return CatalogEntry(
+        str(path.resolve()),
+        stat.st_size,
+        stat.st_mtime,
+        hash_file(path),
+        read_header(path),
+    )
+
+
+def read_entries(paths: list[Path], num_workers: int = 1) -> Iterator[CatalogEntry]:
+    """Read the catalog entries of the files, in any order"""
+    if num_workers <= 1 or len(paths) <= 1:
+        yield from map(read_entry, paths)
+        return
+
+    import multiprocessing
+
+    with multiprocessing.Pool(num_workers) as pool:
+        yield from pool.imap_unordered(read_entry, paths, chunksize=16)
+
+
+def connect(db: StrPath) -> sqlite3.Connection:
+    """Open a catalog, creating it if needed"""
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _insert(cur: sqlite3.Cursor, entry: CatalogEntry) -> None:
+    header = entry.header
+    cur.execute("DELETE FROM files WHERE path = ?", (entry.path,))
+    cur.execute(
+        "INSERT INTO files(path, size, mtime, hash, revision, modified) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            entry.path,
+            entry.size,
+            entry.mtime,
+            entry.hash,
+            header.revision_number,
+            header.modification_datetime.isoformat()
+            if header.modification_datetime is not None
+            else None,
+        ),
+    )
+    cur.executemany(
+        "INSERT INTO services(path, code, operator_ref, mode, start_date, end_date) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                entry.path,
+                service.code,
+                service.operator_ref,
+                service.mode,
+                service.start_date.isoformat() if service.start_date else None,
+                service.end_date.isoformat() if service.end_date else None,
+            )
+            for service in header.services
+        ),
+    )
+    cur.executemany(
+        "INSERT INTO operators(path, id, code) VALUES (?, ?, ?)",
+        (
+            (entry.path, operator_id, code)
+            for operator_id, codes in header.operators.items()
+            for code in sorted(codes)
+        ),
+    )
+    cur.executemany(
+        "INSERT INTO lines(path, service_code, name) VALUES (?, ?, ?)",
+        (
+            (entry.path, service.code, name)
+            for service in header.services
+            for name in service.line_names
+        ),
+    )
+
+
+def update_catalog(
+    db: StrPath, paths: Iterable[Path], num_workers: int = 1
+) -> CatalogUpdate:
+    """
+    Add the files to the catalog, reading only those that are new or whose size or
+    modification time changed, and remove the files that no longer exist.
+    """
+    update = CatalogUpdate()
+    with connect(db) as conn:
+        known = {
+            path: (size, mtime)
+            for path, size, mtime in conn.execute("SELECT path, size, mtime FROM files")
+        }
+
+        changed = []
+        for path in paths:
+            update.files += 1
+            stat = path.stat()
+            if known.get(str(path.resolve())) != (stat.st_size, stat.st_mtime):
+                changed.append(path)
+
+        cur = conn.cursor()
+        for entry in read_entries(changed, num_workers):
+            _insert(cur, entry)
+            update.updated += 1
+
+        removed = [(path,) for path in known if not Path(path).exists()]
+        cur.executemany("DELETE FROM files WHERE path = ?", removed)
+        update.removed = len(removed)
+
+    conn.close()
+    return update
+
+
+def select_paths(db: StrPath, query: str | None = None) -> list[Path]:
+    """
+    Select the files of the catalog matching ``query``, an SQL condition on the
+    columns of the ``catalog`` view, e.g. ``mode = 'bus' AND end_date >=
+    '2025-01-01'``. Without a query, all files are selected.
+    """
+    if not Path(db).is_file():
+        raise FileNotFoundError(f"No catalog at {db}, create it with txc2gtfs catalog")
+
+    sql = "SELECT DISTINCT path FROM catalog"
+    if query:
+        sql += f" WHERE {query}"
+    sql += " ORDER BY path"
+
+    with connect(db) as conn:
+        paths = [Path(path) for (path,) in conn.execute(sql)]
+    conn.close()
+    return paths
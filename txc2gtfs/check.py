@@ -0,0 +1,228 @@
+"""
+Integrity checks of the staging database, run before the feed is written.
+
+Every reference between the staged tables is checked with an anti-join, i.e. the
+rows whose key is not found in the table they refer to, e.g. stop_times whose stop
+is missing from NaPTAN or trips without a calendar. The stop_times of each trip
+are checked for repeated stop_sequences and for times going backwards, in a single
+pass over an index in the order of the trip, sequence and times. The referenced
+keys are indexed first, so that every check is a scan of one table with index
+lookups into the other; the indexes are dropped again once the checks are done.
+
+Rows that are repeated in full are not problems, as the export drops them.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass, field
+
+# Number of offending keys listed in the report of a check
+_EXAMPLES = 3
+
+
+@dataclass(frozen=True)
+class _Reference:
+    """Rows of ``table`` whose ``column`` is in none of the ``parents``"""
+
+    table: str
+    column: str
+    parents: tuple[tuple[str, str], ...]
+    description: str
+    # NULL only refers to nothing, e.g. a trip without a shape
+    optional: bool = False
+
+
+_REFERENCES = (
+    _Reference("stop_times", "stop_id", (("stops", "id"),), "stop_times.stop_id"),
+    _Reference("stop_times", "trip_id", (("trips", "trip_id"),), "stop_times.trip_id"),
+    _Reference("trips", "route_id", (("routes", "id"),), "trips.route_id"),
+    _Reference(
+        "trips",
+        "service_id",
+        (("calendar", "service_id"), ("calendar_dates", "service_id")),
+        "trips.service_id",
+    ),
+    _Reference("trips", "shape_id", (("shapes", "shape_id"),), "trips.shape_id", True),
+    _Reference("routes", "agency_id", (("agency", "id"),), "routes.agency_id"),
+    _Reference(
+        "frequencies", "trip_id", (("trips", "trip_id"),), "frequencies.trip_id"
+    ),
+    _Reference("trips", "trip_id", (("stop_times", "trip_id"),), "trips.trip_id"),
+    _Reference(
+        "transfers", "from_stop_id", (("stops", "id"),), "transfers.from_stop_id"
+    ),
+    _Reference("transfers", "to_stop_id", (("stops", "id"),), "transfers.to_stop_id"),
+)
+
+# Indexes of the keys the checks look up, in addition to the primary keys
+_INDEXES = {
+    "check_trips": ("trips", ("trip_id",)),
+    "check_calendar": ("calendar", ("service_id",)),
+    "check_calendar_dates": ("calendar_dates", ("service_id",)),
+    # Covers the order check, which reads the stop_times of each trip in order
+    "check_stop_times": (
+        "stop_times",
+        ("trip_id", "stop_sequence", "arrival_time", "departure_time", "stop_id"),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class CheckResult:
+    """Outcome of a check: the number of offending keys, with a few of them"""
+
+    description: str
+    # Column whose values are counted, e.g. the stop_id of the missing stops
+    key: str
+    keys: int = 0
+    rows: int = 0
+    examples: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.keys == 0
+
+
+def _earlier(a: str, b: str) -> str:
+    """SQL condition of the HH:MM:SS time ``a`` being earlier than ``b``"""
+    # Hours may exceed 24, and in principle 99
+    return f"(length({a}), {a}) < (length({b}), {b})"
+
+
+def _check_reference(
+    conn: sqlite3.Connection, reference: _Reference, existing: set[str]
+) -> CheckResult | None:
+    if reference.table not in existing:
+        return None
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({reference.table})")}
+    if reference.column not in columns:
+        return None
+
+    column = f"c.{reference.column}"
+    conditions = [
+        f"NOT EXISTS (SELECT 1 FROM {parent} AS p WHERE p.{key} = {column})"
+        for parent, key in reference.parents
+        if parent in existing
+    ]
+    if reference.optional:
+        conditions.insert(0, f"{column} IS NOT NULL")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    missing = conn.execute(
+        f"SELECT {column}, COUNT(*) FROM {reference.table} AS c {where} "
+        f"GROUP BY {column} ORDER BY {column}"
+    ).fetchall()
+
+    parents = " or ".join(parent for parent, _ in reference.parents)
+    return CheckResult(
+        f"{reference.description} not in {parents}",
+        reference.column,
+        len(missing),
+        sum(count for _, count in missing),
+        [str(key) for key, _ in missing[:_EXAMPLES]],
+    )
+
+
+def _check_order(conn: sqlite3.Connection) -> list[CheckResult]:
+    # The rows of each trip are compared with the previous one in the order of
+    # the index, skipping rows that repeat the previous one in full. Only the few
+    # offending rows are grouped by trip.
+    problems = conn.execute(f"""
+SELECT trip_id, MAX(repeated), MAX(backwards)
+FROM (
+    SELECT
+        trip_id,
+        stop_sequence = previous_sequence AS repeated,
+        {_earlier("departure_time", "arrival_time")}
+        OR {_earlier("arrival_time", "previous_departure")} AS backwards,
+        stop_sequence IS previous_sequence
+        AND arrival_time IS previous_arrival
+        AND departure_time IS previous_departure
+        AND stop_id IS previous_stop AS duplicate
+    FROM (
+        SELECT
+            trip_id,
+            stop_sequence,
+            arrival_time,
+            departure_time,
+            stop_id,
+            LAG(stop_sequence) OVER w AS previous_sequence,
+            LAG(arrival_time) OVER w AS previous_arrival,
+            LAG(departure_time) OVER w AS previous_departure,
+            LAG(stop_id) OVER w AS previous_stop
+        FROM stop_times
+        WINDOW w AS (
+            PARTITION BY trip_id
+            ORDER BY stop_sequence, arrival_time, departure_time, stop_id
+        )
+    )
+)
+WHERE (repeated OR backwards) AND NOT duplicate
+GROUP BY trip_id
+ORDER BY trip_id
+""").fetchall()
+
+    repeated = [trip_id for trip_id, is_repeated, _ in problems if is_repeated]
+    backwards = [trip_id for trip_id, _, is_backwards in problems if is_backwards]
+    return [
+        CheckResult(
+            "trips with a repeated stop_sequence",
+            "trip_id",
+            len(repeated),
+            examples=repeated[:_EXAMPLES],
+        ),
+        CheckResult(
+            "trips whose times go backwards",
+            "trip_id",
+            len(backwards),
+            examples=backwards[:_EXAMPLES],
+        ),
+    ]
+
+
+def check_staging(conn: sqlite3.Connection) -> list[CheckResult]:
+    """
+    Check the references between the staged tables and the order of the
+    stop_times of every trip, returning the results of all checks that apply
+    """
+    existing = {
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    indexes = [name for name, (table, _) in _INDEXES.items() if table in existing]
+    for name in indexes:
+        table, columns = _INDEXES[name]
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})"
+        )
+    try:
+        results = [
+            result
+            for reference in _REFERENCES
+            if (result := _check_reference(conn, reference, existing)) is not None
+        ]
+        if "stop_times" in existing:
+            results.extend(_check_order(conn))
+    finally:
+        for name in indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.commit()
+    return results
+
+
+def format_report(results: list[CheckResult], seconds: float) -> str:
+    """Summary of the checks, with a line for each check that failed"""
+    failed = [result for result in results if not result.ok]
+    lines = [
+        f"Integrity checks: {len(results) - len(failed)} of {len(results)} passed "
+        f"in {seconds:.1f} s"
+    ]
+    for result in failed:
+        line = f"  {result.description}: {result.keys} {result.key}(s)"
+        if result.rows:
+            line += f" in {result.rows} row(s)"
+        line += f", e.g. {', '.join(result.examples)}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -1,18 +1,23 @@
 import argparse
-import multiprocessing
-from collections.abc import Sequence
+import os
+import sys
+from collections.abc import Callable, Sequence
+from datetime import date
 from pathlib import Path
 
-from . import convert
 
-
-def main(argv: Sequence[str] | None = None) -> None:
-    parser = argparse.ArgumentParser(description="")
+def _convert(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="txc2gtfs",
+        description="Convert TransXChange files into a GTFS feed",
+        epilog="Other commands: scan, catalog, merge, serve (run 'txc2gtfs <command> "
+        "--help' for details)",
+    )
     parser.add_argument(
         "input",
         type=Path,
-        nargs="+",
-        help="Path to TransXChange XML files",
+        nargs="*",
+        help="Path to TransXChange XML files (optional with --catalog)",
     )
     parser.add_argument(
         "-o",
@@ -30,20 +35,428 @@ def main(argv: Sequence[str] | None = None) -> None:
     parser.add_argument(
         "-j",
         "--workers",
-        default=multiprocessing.cpu_count(),
+        default=os.cpu_count() or 1,
         type=int,
         help="Number of workers to use when processing the data",
     )
+    parser.add_argument(
+        "--engine",
+        choices=["processes", "threads"],
+        default="processes",
+        help="Run the workers as processes or as threads sharing the reference data "
+        "(default: processes)",
+    )
+    parser.add_argument(
+        "--journey-workers",
+        default=1,
+        type=int,
+        help="Number of threads converting the journeys of each file, on "
+        "free-threaded builds of Python only; ignored with a warning when the GIL "
+        "is enabled (default: 1)",
+    )
     parser.add_argument(
         "--max-file-size",
         default=2000,
         type=int,
         help="Maximum input file size, in megabytes",
     )
+    parser.add_argument(
+        "--frequencies",
+        action="store_true",
+        help="Write runs of evenly spaced trips as frequencies.txt entries",
+    )
+    parser.add_argument(
+        "--shapes",
+        action="store_true",
+        help="Write shapes.txt from the Track geometry of the routes",
+    )
+    parser.add_argument(
+        "--shape-tolerance",
+        metavar="METRES",
+        default=2.0,
+        type=float,
+        help="Tolerance of the simplification of the shapes (default: 2.0)",
+    )
+    parser.add_argument(
+        "--transfers",
+        action="store_true",
+        help="Write transfers.txt with walking transfers between nearby stops",
+    )
+    parser.add_argument(
+        "--transfer-radius",
+        metavar="METRES",
+        default=200.0,
+        type=float,
+        help="Largest walking distance of a transfer (default: 200.0)",
+    )
+    parser.add_argument(
+        "--canonical-calendars",
+        action="store_true",
+        help="Share a single compact service_id between services with identical "
+        "calendars",
+    )
+    parser.add_argument(
+        "--compact-ids",
+        action="store_true",
+        help="Use short base 36 trip, service and route ids, and write the mapping "
+        "back to the original ids next to the output zip",
+    )
+    parser.add_argument(
+        "--columnar",
+        choices=["parquet", "arrow"],
+        help="Also write the GTFS tables as typed Parquet files or Arrow IPC streams "
+        "to a directory next to the output zip (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Check the staged tables for missing stops, trips, routes, calendars "
+        "and agencies, and the order of the stop_times of every trip, before "
+        "writing the feed",
+    )
+    parser.add_argument(
+        "--from-date",
+        metavar="YYYY-MM-DD",
+        type=date.fromisoformat,
+        help="Only convert services that operate on or after this date",
+    )
+    parser.add_argument(
+        "--to-date",
+        metavar="YYYY-MM-DD",
+        type=date.fromisoformat,
+        help="Only convert services that operate on or before this date",
+    )
+    parser.add_argument(
+        "--operator",
+        dest="operators",
+        metavar="CODE",
+        action="append",
+        help="Only convert services of this operator, by its id, OperatorCode or "
+        "NationalOperatorCode (can be given several times)",
+    )
+    parser.add_argument(
+        "--mode",
+        dest="modes",
+        action="append",
+        help="Only convert services of this mode, e.g. bus or underground (can be "
+        "given several times)",
+    )
+    parser.add_argument(
+        "--line",
+        dest="lines",
+        metavar="NAME",
+        action="append",
+        help="Only convert services with this line name (can be given several times)",
+    )
+    parser.add_argument(
+        "--catalog",
+        metavar="DB",
+        type=Path,
+        help="Select the input files from this catalog, written by 'txc2gtfs "
+        "catalog', instead of globbing them (restricted to the given inputs if any)",
+    )
+    parser.add_argument(
+        "--query",
+        metavar="SQL",
+        help="SQL condition selecting files from the catalog, e.g. \"mode = 'bus' "
+        "AND operator_code = 'LUL'\"",
+    )
+    parser.add_argument(
+        "--latest-revisions",
+        action="store_true",
+        help="Only convert the file with the latest revision of every service, "
+        "and skip files with the same content as another",
+    )
+    parser.add_argument(
+        "--naptan",
+        metavar="CSV",
+        type=Path,
+        help="Use this NaPTAN Stops.csv instead of downloading the latest one",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        help="Manifest written by 'txc2gtfs scan', used to convert the most "
+        "expensive files first",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Only convert shard I of N of the files, writing a partial staging "
+        "database to --output for 'txc2gtfs merge'",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=["hash", "cost"],
+        default="hash",
+        help="Assign the files to shards by the hash of their name, or by their "
+        "estimated cost from --manifest (default: hash)",
+    )
+    parser.add_argument(
+        "--memory-report",
+        metavar="PATH",
+        type=Path,
+        help="Track the memory use of converting each file and write it to PATH "
+        "(CSV if PATH ends in .csv, JSON otherwise)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        type=Path,
+        help="Profile the conversion with cProfile, writing per-worker statistics "
+        "and an aggregated report to DIR",
+    )
+
+    args = parser.parse_args(argv)
+    if not args.input and args.catalog is None:
+        parser.error("the following arguments are required: input (or --catalog)")
+    if args.query is not None and args.catalog is None:
+        parser.error("--query requires --catalog")
+    if args.engine == "threads" and (args.memory_report or args.profile):
+        parser.error("--memory-report and --profile require --engine processes")
+    shard = None
+    if args.shard is not None:
+        from .shards import Shard
+
+        try:
+            shard = Shard.parse(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.shard_by == "cost" and args.manifest is None:
+            parser.error("--shard-by cost requires --manifest")
+        if args.compact_ids or args.columnar:
+            parser.error("--compact-ids and --columnar do not apply to shards")
+        if args.transfers:
+            parser.error("--transfers does not apply to shards")
+
+    # Imported here, as it loads pandas and lxml
+    from .converter import convert
+
+    convert(
+        args.input,
+        args.output,
+        args.append,
+        args.workers,
+        profile_dir=args.profile,
+        naptan=args.naptan,
+        memory_report=args.memory_report,
+        manifest=args.manifest,
+        frequencies=args.frequencies,
+        shapes=args.shapes,
+        shape_tolerance=args.shape_tolerance,
+        transfers=args.transfers,
+        transfer_radius=args.transfer_radius,
+        columnar=args.columnar,
+        from_date=args.from_date,
+        to_date=args.to_date,
+        operators=args.operators,
+        modes=args.modes,
+        lines=args.lines,
+        catalog=args.catalog,
+        query=args.query,
+        latest_revisions=args.latest_revisions,
+        canonical_calendars=args.canonical_calendars,
+        compact_ids=args.compact_ids,
+        engine=args.engine,
+        journey_workers=args.journey_workers,
+        shard=shard,
+        shard_by=args.shard_by,
+        check=args.check,
+    )
+
+
+def _scan(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="txc2gtfs scan",
+        description="Count the elements of TransXChange files in a fast streaming "
+        "pass and estimate the cost of converting them",
+    )
+    parser.add_argument(
+        "input",
+        type=Path,
+        nargs="+",
+        help="Path to TransXChange XML files",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=Path.cwd() / "manifest.json",
+        type=Path,
+        help="Output path for the manifest",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        default=os.cpu_count() or 1,
+        type=int,
+        help="Number of workers to use when scanning the files",
+    )
 
     args = parser.parse_args(argv)
 
-    convert(args.input, args.output, args.append, args.workers)
+    from .scan import scan_files, write_manifest
+    from .util.paths import iterate_paths
+
+    totals = write_manifest(
+        scan_files(iterate_paths(args.input), args.workers), args.output
+    )
+    print(
+        f"Scanned {totals['files']} file(s), {totals['size'] / (1 << 20):.1f} MB: "
+        f"{totals['services']} services, {totals['journey_patterns']} journey "
+        f"patterns, {totals['timing_links']} timing links, "
+        f"{totals['vehicle_journeys']} vehicle journeys"
+    )
+    print(
+        f"Estimated {totals['stop_times_rows']} stop_times rows, peak memory of "
+        f"{totals['max_peak_memory'] / (1 << 20):.0f} MB per worker"
+    )
+    print(f"Manifest written to {args.output}")
+
+
+def _catalog(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="txc2gtfs catalog",
+        description="Add the metadata of TransXChange files to a catalog, reading "
+        "only the files that are new or changed since the last update",
+    )
+    parser.add_argument(
+        "input",
+        type=Path,
+        nargs="+",
+        help="Path to TransXChange XML files",
+    )
+    parser.add_argument(
+        "-c",
+        "--catalog",
+        default=Path.cwd() / "catalog.db",
+        type=Path,
+        help="Path of the catalog",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        default=os.cpu_count() or 1,
+        type=int,
+        help="Number of workers to use when reading the files",
+    )
+
+    args = parser.parse_args(argv)
+
+    from .catalog import update_catalog
+    from .util.paths import iterate_paths
+
+    update = update_catalog(args.catalog, iterate_paths(args.input), args.workers)
+    print(
+        f"Catalogued {update.files} file(s) in {args.catalog}: {update.updated} "
+        f"read, {update.removed} removed"
+    )
+
+
+def _merge(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="txc2gtfs merge",
+        description="Merge the partial staging databases written by 'txc2gtfs "
+        "--shard' into a single GTFS feed",
+    )
+    parser.add_argument(
+        "input",
+        type=Path,
+        nargs="+",
+        help="Partial staging databases of all shards",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=Path.cwd() / "gtfs.zip",
+        type=Path,
+        help="Output path for the GTFS zip file",
+    )
+
+    args = parser.parse_args(argv)
+
+    from .merge import merge_partials
+
+    try:
+        rows = merge_partials(args.input, args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    print(
+        f"Merged {len(args.input)} shard(s) into {args.output}: "
+        + ", ".join(f"{count} {name}" for name, count in rows.items())
+    )
+
+
+def _serve(argv: Sequence[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="txc2gtfs serve",
+        description="Serve conversion jobs posted as JSON to /convert, keeping the "
+        "reference data and a pool of workers loaded between jobs",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        type=Path,
+        help="Listen on this Unix socket instead of a TCP port",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Host to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        default=8642,
+        type=int,
+        help="Port to listen on (default: 8642)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        default=os.cpu_count() or 1,
+        type=int,
+        help="Number of workers converting the files of the jobs",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["processes", "threads"],
+        default="threads",
+        help="Run the workers as processes or as threads (default: threads)",
+    )
+    parser.add_argument(
+        "--naptan",
+        metavar="CSV",
+        type=Path,
+        help="Use this NaPTAN Stops.csv instead of downloading the latest one",
+    )
+
+    args = parser.parse_args(argv)
+
+    from .serve import serve
+
+    serve(
+        args.socket if args.socket is not None else (args.host, args.port),
+        args.engine,
+        args.workers,
+        args.naptan,
+    )
+
+
+_COMMANDS: dict[str, Callable[[Sequence[str]], None]] = {
+    "scan": _scan,
+    "catalog": _catalog,
+    "merge": _merge,
+    "serve": _serve,
+}
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # Without a command, the arguments are those of the conversion
+    if argv and argv[0] in _COMMANDS:
+        _COMMANDS[argv[0]](argv[1:])
+    else:
+        _convert(argv)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+"""
+Columnar export of the GTFS tables.
+
+Next to the GTFS zip, every table of the staging database can be written as a
+Parquet file or an Arrow IPC stream, so that it can be loaded without parsing CSV.
+The rows are streamed from the staging database in batches, each of which becomes a
+row group (Parquet) or record batch (Arrow). Unlike the CSV files the columns are
+typed: GTFS times are integer seconds since midnight, ids are dictionary encoded
+and the other columns keep the type they were staged with. Tables with trips are
+sorted by trip_id, so that the row groups of a trip are contiguous.
+
+The same typed tables can be read into memory as Arrow tables or pandas DataFrames,
+see :func:`txc2gtfs.convert_to_tables`.
+
+Requires pyarrow, e.g. ``pip install txc2gtfs[columnar]``, except for DataFrames.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+
+from .gtfs import COLUMN_NAMES, table_exists
+from .ids import ID_COLUMNS, compact_id_expression
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+    from _typeshed import StrPath
+
+type ColumnarFormat = Literal["parquet", "arrow"]
+
+FORMATS: tuple[ColumnarFormat, ...] = ("parquet", "arrow")
+
+_SUFFIXES: dict[ColumnarFormat, str] = {"parquet": ".parquet", "arrow": ".arrows"}
+
+_BATCH_SIZE = 100_000
+
+# Staging table -> (columns identifying a row, or None if whole rows are, and the
+# order of the rows)
+_TABLES: dict[str, tuple[list[str] | None, list[str]]] = {
+    "agency": (["id"], ["id"]),
+    "stops": (["id"], ["id"]),
+    "routes": (["id"], ["id"]),
+    "trips": (["trip_id"], ["trip_id"]),
+    "stop_times": (None, ["trip_id", "stop_sequence"]),
+    "calendar": (["service_id"], ["service_id"]),
+    "calendar_dates": (None, ["service_id", "date"]),
+    "frequencies": (None, ["trip_id", "start_time"]),
+    "shapes": (None, ["shape_id", "shape_pt_sequence"]),
+    "transfers": (["from_stop_id", "to_stop_id"], ["from_stop_id", "to_stop_id"]),
+}
+
+# Staged GTFS tables, in the order they are written
+TABLES = tuple(_TABLES)
+
+# GTFS times, whose hours may exceed 24, as seconds since midnight
+_TIME_COLUMNS = {"arrival_time", "departure_time", "start_time", "end_time"}
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Columnar output requires pyarrow, install it with "
+            "'pip install txc2gtfs[columnar]'"
+        ) from e
+    return pyarrow
+
+
+def _time_to_seconds(column: str) -> str:
+    """SQL expression converting a HH:MM:SS column into seconds"""
+    hours_end = f"instr({column}, ':')"
+    return (
+        f"CAST(substr({column}, 1, {hours_end} - 1) AS INTEGER) * 3600"
+        f" + CAST(substr({column}, {hours_end} + 1, 2) AS INTEGER) * 60"
+        f" + CAST(substr({column}, -2) AS INTEGER)"
+    )
+
+
+def _get_field(name: str, declared_type: str) -> pa.Field:
+    """Arrow type of a staged column, from its name and declared SQLite type"""
+    import pyarrow as pa
+
+    declared_type = declared_type.upper()
+    if name in _TIME_COLUMNS:
+        arrow_type = pa.int32()
+    elif name.endswith("_id") and "INT" not in declared_type:
+        arrow_type = pa.dictionary(pa.int32(), pa.string())
+    elif "INT" in declared_type or declared_type == "SHORT":
+        arrow_type = pa.int64()
+    elif declared_type in ("REAL", "FLOAT", "DOUBLE"):
+        arrow_type = pa.float64()
+    else:
+        arrow_type = pa.string()
+    return pa.field(name, arrow_type)
+
+
+def _get_dtype(name: str, declared_type: str) -> str:
+    """pandas dtype of a staged column, as :func:`_get_field`"""
+    declared_type = declared_type.upper()
+    if name in _TIME_COLUMNS:
+        return "Int32"
+    if name.endswith("_id") and "INT" not in declared_type:
+        return "category"
+    if "INT" in declared_type or declared_type == "SHORT":
+        return "Int64"
+    if declared_type in ("REAL", "FLOAT", "DOUBLE"):
+        return "float64"
+    return "string"
+
+
+def _get_column(table: str, name: str, compact_ids: bool) -> str:
+    if name in _TIME_COLUMNS:
+        return _time_to_seconds(name)
+    if compact_ids and name in ID_COLUMNS.get(table, {}):
+        return f"{compact_id_expression(table, name)} AS {name}"
+    return name
+
+
+def _select_table(
+    conn: sqlite3.Connection, table: str, compact_ids: bool = False
+) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Query streaming the unique rows of a staging table, and the GTFS name and
+    declared type of its columns. With ``compact_ids``, the ids are replaced by
+    their compact ids.
+    """
+    columns = [
+        (name, declared_type)
+        for _, name, declared_type, *_ in conn.execute(f"PRAGMA table_info({table})")
+        # Left behind by to_sql with index=True in older versions
+        if name != "index"
+    ]
+    names = {name for name, _ in columns}
+    key, order = _TABLES[table]
+    order = [column for column in order if column in names]
+
+    select = ", ".join(_get_column(table, name, compact_ids) for name, _ in columns)
+    if key is None:
+        query = f"SELECT DISTINCT {select} FROM {table}"
+    else:
+        # Keep the first row staged for every key
+        query = (
+            f"SELECT {select} FROM {table} WHERE rowid IN "
+            f"(SELECT min(rowid) FROM {table} GROUP BY {', '.join(key)})"
+        )
+    if order:
+        query += f" ORDER BY {', '.join(order)}"
+
+    renames = COLUMN_NAMES.get(table, {})
+    return query, [(renames.get(name, name), type) for name, type in columns]
+
+
+def _get_query(
+    conn: sqlite3.Connection, table: str, compact_ids: bool = False
+) -> tuple[str, pa.Schema]:
+    """Query streaming the unique rows of a staging table, and their schema"""
+    import pyarrow as pa
+
+    query, columns = _select_table(conn, table, compact_ids)
+    return query, pa.schema(_get_field(name, type) for name, type in columns)
+
+
+def _iter_batches(
+    cur: sqlite3.Cursor, schema: pa.Schema, batch_size: int
+) -> Iterator[pa.RecordBatch]:
+    import pyarrow as pa
+
+    while rows := cur.fetchmany(batch_size):
+        arrays = []
+        for field, values in zip(schema, zip(*rows, strict=True), strict=True):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(
+                    pa.array(values, pa.string()).dictionary_encode().cast(field.type)
+                )
+            else:
+                arrays.append(pa.array(values, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_batches(
+    conn: sqlite3.Connection,
+    table: str,
+    batch_size: int = _BATCH_SIZE,
+    compact_ids: bool = False,
+) -> Iterator[pa.RecordBatch]:
+    """Stream a staging table as typed record batches, with GTFS field names"""
+    _import_pyarrow()
+    query, schema = _get_query(conn, table, compact_ids)
+    yield from _iter_batches(conn.execute(query), schema, batch_size)
+
+
+def read_table(
+    conn: sqlite3.Connection, table: str, compact_ids: bool = False
+) -> pa.Table:
+    """Read a staging table as a typed Arrow table, with GTFS field names"""
+    pa = _import_pyarrow()
+    query, schema = _get_query(conn, table, compact_ids)
+    batches = _iter_batches(conn.execute(query), schema, _BATCH_SIZE)
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def read_frame(
+    conn: sqlite3.Connection, table: str, compact_ids: bool = False
+) -> pd.DataFrame:
+    """Read a staging table as a typed DataFrame, with GTFS field names"""
+    import pandas as pd
+
+    query, columns = _select_table(conn, table, compact_ids)
+    frame = pd.read_sql_query(query, conn)
+    frame.columns = [name for name, _ in columns]
+    return frame.astype({name: _get_dtype(name, type) for name, type in columns})
+
+
+def export_to_columnar(
+    db: Path,
+    directory: StrPath,
+    format: ColumnarFormat = "parquet",
+    batch_size: int = _BATCH_SIZE,
+    compact_ids: bool = False,
+) -> list[Path]:
+    """
+    Write every staged GTFS table to ``directory`` as ``<table>.parquet`` or, for
+    Arrow, as an IPC stream ``<table>.arrows``. Returns the written paths.
+
+    With ``compact_ids``, the trip, service and route ids are replaced by the
+    compact ids of the ``compact_ids`` table (see :mod:`txc2gtfs.ids`).
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown columnar format {format!r}, expected {FORMATS}")
+    pa = _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    with sqlite3.connect(db) as conn:
+        for table in _TABLES:
+            if not table_exists(conn, table):
+                continue
+
+            path = directory / f"{table}{_SUFFIXES[format]}"
+            query, schema = _get_query(conn, table, compact_ids)
+            batches = _iter_batches(conn.execute(query), schema, batch_size)
+            if format == "parquet":
+                with pq.ParquetWriter(path, schema) as writer:
+                    for batch in batches:
+                        writer.write_batch(batch)
+            else:
+                with pa.ipc.new_stream(path, schema) as writer:
+                    for batch in batches:
+                        writer.write_batch(batch)
+            written.append(path)
+
+    return written
@@ -49,76 +49,415 @@ MIT.
 
 from __future__ import annotations
 
+import itertools
 import multiprocessing
+import os
 import sqlite3
-import xml.etree.ElementTree as ET
-from collections.abc import Generator, Iterable
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from contextlib import closing
+from dataclasses import dataclass, field, replace
+from datetime import date
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
+
+import pandas as pd
 
 from .agency import AgencyTable
-from .calendar import get_calendar
+from .bank_holidays import get_bank_holidays
+from .calendar import canonicalize_service_ids, get_calendar
 from .calendar_dates import get_calendar_dates
-from .gtfs import export_to_zip
+from .catalog import select_paths
+from .check import check_staging, format_report
+from .columnar import ColumnarFormat, export_to_columnar
+from .fingerprints import TripFingerprints
+from .frequencies import get_frequencies
+from .gtfs import export_to_zip, table_exists
+from .header import ServiceFilter, is_selected, read_header
+from .ids import build_compact_ids, write_id_mapping
+from .memory import FileMemory, MemoryProbe, write_memory_report
+from .merge import create_merge_indexes
+from .profiling import ProfiledTask, prepare_profile_dir, write_profile_report
+from .revisions import (
+    read_catalog_revisions,
+    read_revisions,
+    select_latest_revisions,
+)
 from .routes import RoutesTable
+from .scan import read_manifest
+from .shapes import ShapesTable
+from .shards import Shard, ShardBy, select_shard, write_shard_manifest
 from .stop_times import get_stop_times
-from .stops import StopsTable
-from .transxchange import get_gtfs_info
+from .stops import StopsTable, get_naptan_stops
+from .transfers import stage_transfers
+from .transxchange import GtfsInfoSummary, iter_gtfs_info
 from .trips import get_trips
+from .util.dates import DateWindow
+from .util.paths import iterate_paths
+from .util.table import Table
+from .util.xml import parse_xml
 
 if TYPE_CHECKING:
     from _typeshed import StrPath
 
+type Engine = Literal["processes", "threads"]
+
+ENGINES: tuple[Engine, ...] = ("processes", "threads")
+
+# Seconds a worker waits for the others to finish copying their files into the
+# staging database
+_BUSY_TIMEOUT = 600.0
+
+
+def parse_txc_to_sql_conn(
+    path: Path,
+    conn: sqlite3.Connection,
+    naptan: Path | None = None,
+    probe: MemoryProbe | None = None,
+    seen: TripFingerprints | None = None,
+    frequencies: bool = False,
+    shape_tolerance: float | None = None,
+    window: DateWindow | None = None,
+    service_filter: ServiceFilter | None = None,
+    canonical_calendars: bool = False,
+    use_lxml: bool = False,
+    journey_workers: int = 1,
+) -> dict[str, int]:
+    """
+    Stage the GTFS rows of a TransXChange file, returning the number of rows staged
+    in its trips, stop_times, calendar, calendar_dates and frequencies tables. The
+    result is empty if the file was skipped.
+    """
+    # Skip files none of whose services are selected, from their header only
+    if window is not None or service_filter is not None:
+        header = read_header(path)
+        if header.services and not any(
+            is_selected(service, header.operators, window, service_filter)
+            for service in header.services
+        ):
+            print(
+                f"UserWarning: No service of file {path.name} operates during the "
+                "date window and matches the filters, skipping."
+            )
+            return {}
 
-def parse_txc_to_sql_conn(path: Path, conn: sqlite3.Connection) -> None:
     # If type is string, it is a direct filepath to XML
-    data = ET.parse(path)
+    data = parse_xml(path, use_lxml)
+    if probe is not None:
+        probe.stage("xml_tree")
+
+    # Stream the GTFS info containing data about trips, calendar, stop_times and
+    # calendar_dates in batches of journeys, skipping trips that have already been
+    # seen or whose services are not selected. The stop_times of each batch go
+    # straight to the staging database, unless frequencies need all of them; only
+    # the trips and the distinct calendar and route columns are kept until the end.
+    batches = iter_gtfs_info(
+        data, seen, window, service_filter, workers=journey_workers
+    )
+    first = next(batches, None)
+    if first is None:
+        print(
+            f"UserWarning: No trips of file {path.name} are left to convert, as "
+            "they have already been converted or their services are not selected, "
+            "skipping."
+        )
+        return {}
+
+    summary = GtfsInfoSummary()
+    trip_batches: list[pd.DataFrame] = []
+    stop_time_batches: list[pd.DataFrame] = []
+    journeys = gtfs_info_rows = gtfs_info_bytes = stop_time_rows = 0
+    for gtfs_info in itertools.chain([first], batches):
+        if probe is not None:
+            journeys += gtfs_info["vehicle_journey_id"].nunique()
+            gtfs_info_rows += len(gtfs_info)
+            gtfs_info_bytes = max(
+                gtfs_info_bytes, int(gtfs_info.memory_usage(deep=True).sum())
+            )
+
+        summary.add(gtfs_info)
+        trip_batches.append(get_trips(gtfs_info))
 
-    # Parse GTFS info containing data about trips, calendar, stop_times and
-    # calendar_dates
-    gtfs_info = get_gtfs_info(data)
+        stop_times = get_stop_times(gtfs_info)
+        stop_time_rows += len(stop_times)
+        if frequencies:
+            stop_time_batches.append(stop_times)
+        elif len(stop_times) > 0:
+            stop_times.to_sql(
+                name="stop_times", con=conn, index=False, if_exists="append"
+            )
+
+    if probe is not None:
+        probe.stage(
+            "gtfs_info",
+            journeys=journeys,
+            gtfs_info_rows=gtfs_info_rows,
+            gtfs_info_bytes=gtfs_info_bytes,
+        )
 
-    # Parse stop_times
-    stop_times = get_stop_times(gtfs_info)
+    if stop_time_rows == 0:
+        print(
+            f"UserWarning: File {path.name} did not contain valid stop_sequence "
+            "data, skipping."
+        )
+        return {}
 
     # Parse trips
-    trips = get_trips(gtfs_info)
+    trips = pd.concat(trip_batches, ignore_index=True)
+
+    # Replace runs of evenly spaced trips by frequencies
+    frequency_rows = None
+    if frequencies:
+        stop_times, trips, frequency_rows = get_frequencies(
+            pd.concat(stop_time_batches, ignore_index=True), trips
+        )
+        stop_times.to_sql(name="stop_times", con=conn, index=False, if_exists="append")
 
     # Parse calendar
-    calendar = get_calendar(gtfs_info)
+    calendar = get_calendar(summary.frame)
 
     # Parse calendar_dates
-    calendar_dates = get_calendar_dates(gtfs_info)
+    calendar_dates = get_calendar_dates(summary.frame)
 
-    if len(stop_times) > 0:
-        cur = conn.cursor()
-        for cls in (AgencyTable, StopsTable, RoutesTable):
-            table = cls(cur)
-            table.populate(cur, data, gtfs_info)
-            conn.commit()
-
-        stop_times.to_sql(name="stop_times", con=conn, index=False, if_exists="append")
-        trips.to_sql(name="trips", con=conn, index=False, if_exists="append")
-        calendar.to_sql(name="calendar", con=conn, index=False, if_exists="append")
+    # Share a single service_id between the services with identical calendars
+    if canonical_calendars:
+        trips, calendar, calendar_dates = canonicalize_service_ids(
+            trips, calendar, calendar_dates
+        )
+    if probe is not None:
+        probe.stage("tables")
+
+    cur = conn.cursor()
+    tables: list[Table] = [
+        AgencyTable(cur),
+        StopsTable(cur, naptan),
+        RoutesTable(cur),
+    ]
+    shapes = None
+    if shape_tolerance is not None:
+        shapes = ShapesTable(cur, shape_tolerance)
+        tables.append(shapes)
+    for table in tables:
+        # The tables only need the calendar and route columns of the GTFS info
+        table.populate(cur, data, summary.frame)
+        conn.commit()
+
+    if shapes is not None:
+        trips = trips.assign(shape_id=trips["route_id"].map(shapes.route_shapes))
+
+    trips.to_sql(name="trips", con=conn, index=False, if_exists="append")
+    calendar.to_sql(name="calendar", con=conn, index=False, if_exists="append")
+
+    if calendar_dates is not None:
+        calendar_dates.to_sql(
+            name="calendar_dates", con=conn, index=False, if_exists="append"
+        )
 
-        if calendar_dates is not None:
-            calendar_dates.to_sql(
-                name="calendar_dates", con=conn, index=False, if_exists="append"
-            )
-    else:
-        print(
-            f"UserWarning: File {path.name} did not contain valid stop_sequence "
-            "data, skipping."
+    if frequency_rows is not None and not frequency_rows.empty:
+        frequency_rows.to_sql(
+            name="frequencies", con=conn, index=False, if_exists="append"
         )
 
+    if seen is not None:
+        seen.stage(cur)
+        conn.commit()
+
+    if probe is not None:
+        probe.stage("staging")
+
+    return {
+        "trips": len(trips),
+        "stop_times": len(stop_times) if frequencies else stop_time_rows,
+        "calendar": len(calendar),
+        "calendar_dates": len(calendar_dates) if calendar_dates is not None else 0,
+        "frequencies": len(frequency_rows) if frequency_rows is not None else 0,
+    }
+
+
+@dataclass(frozen=True)
+class _TaskOptions:
+    """Options of the conversion of a single file, sent along to the workers"""
 
-def _iterate_paths(input: Iterable[StrPath]) -> Generator[Path, None, None]:
-    for path in input:
-        path = Path(path)
-        if path.is_dir():
-            yield from path.glob("*.xml")
-            continue
-        yield path
+    db: Path
+    # Identifies the run, so that a worker process reused for another run starts
+    # with fresh trip fingerprints
+    run_id: str
+    naptan: Path | None = None
+    track_memory: bool = False
+    frequencies: bool = False
+    # Shapes are only generated if a tolerance is given
+    shape_tolerance: float | None = None
+    window: DateWindow | None = None
+    service_filter: ServiceFilter | None = None
+    # Codes of the services to convert of files that hold superseded ones
+    latest_services: dict[Path, frozenset[str]] = field(default_factory=dict)
+    canonical_calendars: bool = False
+    use_lxml: bool = False
+    journey_workers: int = 1
+
+
+# Trip fingerprints of the run each worker is working on. Workers are either
+# processes, with a single thread each, or threads.
+_worker = threading.local()
+
+
+def _get_trip_fingerprints(run_id: str) -> TripFingerprints:
+    fingerprints: tuple[str, TripFingerprints] | None = getattr(
+        _worker, "trip_fingerprints", None
+    )
+    if fingerprints is None or fingerprints[0] != run_id:
+        fingerprints = _worker.trip_fingerprints = (run_id, TripFingerprints())
+    return fingerprints[1]
+
+
+@dataclass
+class FileResult:
+    """Rows staged from a file, and the memory used to convert it if tracked"""
+
+    rows: dict[str, int]
+    memory: FileMemory | None = None
+
+
+def _publish(conn: sqlite3.Connection, staged: Path) -> None:
+    """
+    Copy the tables of a file staged in a database of its own into the staging
+    database, in a single transaction
+    """
+    conn.execute("ATTACH DATABASE ? AS file", (str(staged),))
+    try:
+        tables = conn.execute(
+            "SELECT name, sql FROM file.sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        with conn:
+            # Take the write lock first, so that no other worker creates a table
+            # in between
+            conn.execute("BEGIN IMMEDIATE")
+            for name, sql in tables:
+                if not table_exists(conn, name):
+                    conn.execute(sql)
+                columns = ", ".join(
+                    f'"{column}"'
+                    for _, column, *_ in conn.execute(
+                        f'PRAGMA file.table_info("{name}")'
+                    )
+                )
+                conn.execute(
+                    f'INSERT OR IGNORE INTO main."{name}" ({columns}) '
+                    f'SELECT {columns} FROM file."{name}"'
+                )
+    finally:
+        conn.execute("DETACH DATABASE file")
+
+
+def _parse_txc_to_db(options: _TaskOptions, txc_file: Path) -> FileResult:
+    seen = _get_trip_fingerprints(options.run_id)
+    service_filter = options.service_filter
+    if (codes := options.latest_services.get(txc_file)) is not None:
+        service_filter = replace(service_filter or ServiceFilter(), codes=codes)
+
+    # The file is staged in a database of its own, which is copied into the
+    # staging database in one transaction once the file is done, so that a file
+    # failing halfway leaves none of its rows behind
+    fd, name = tempfile.mkstemp(".db", f".{options.db.stem}-", options.db.parent)
+    os.close(fd)
+    staged = Path(name)
+    # Close the connection, which a worker kept across conversions would otherwise
+    # hold on to along with the write-ahead log
+    with closing(sqlite3.connect(options.db, timeout=_BUSY_TIMEOUT)) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        seen.sync(conn.cursor())
+        conn.commit()
+        try:
+            with closing(sqlite3.connect(staged)) as file_conn, file_conn:
+                # The database of the file is thrown away if anything fails
+                file_conn.execute("PRAGMA journal_mode=OFF")
+                file_conn.execute("PRAGMA synchronous=OFF")
+                if not options.track_memory:
+                    rows = parse_txc_to_sql_conn(
+                        txc_file,
+                        file_conn,
+                        options.naptan,
+                        seen=seen,
+                        frequencies=options.frequencies,
+                        shape_tolerance=options.shape_tolerance,
+                        window=options.window,
+                        service_filter=service_filter,
+                        canonical_calendars=options.canonical_calendars,
+                        use_lxml=options.use_lxml,
+                        journey_workers=options.journey_workers,
+                    )
+                    result = FileResult(rows)
+                else:
+                    with MemoryProbe(txc_file) as probe:
+                        rows = parse_txc_to_sql_conn(
+                            txc_file,
+                            file_conn,
+                            options.naptan,
+                            probe,
+                            seen,
+                            frequencies=options.frequencies,
+                            shape_tolerance=options.shape_tolerance,
+                            window=options.window,
+                            service_filter=service_filter,
+                            canonical_calendars=options.canonical_calendars,
+                            use_lxml=options.use_lxml,
+                            journey_workers=options.journey_workers,
+                        )
+                    result = FileResult(rows, probe.record)
+            _publish(conn, staged)
+            seen.commit()
+            return result
+        finally:
+            # Trips of a file that was not staged must not suppress later copies
+            seen.discard()
+            staged.unlink(missing_ok=True)
+
+
+def _run_on_executor(
+    executor: Executor, task: Callable[[Path], FileResult], paths: list[Path]
+) -> list[FileResult]:
+    """
+    Run the task of every file on ``executor``, waiting for all of them before
+    raising the error of any. ``Executor.map`` would only cancel the files that
+    have not started, and leave the others writing to the staging database after
+    the conversion is over.
+    """
+    futures: list[Future[FileResult]] = []
+    try:
+        futures.extend(executor.submit(task, path) for path in paths)
+    finally:
+        wait(futures)
+    return [future.result() for future in futures]
+
+
+def _gil_enabled() -> bool:
+    # Builds before free-threading always have the GIL
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def _check(db: Path) -> None:
+    start = time.perf_counter()
+    with closing(sqlite3.connect(db)) as conn:
+        results = check_staging(conn)
+    print(format_report(results, time.perf_counter() - start))
+
+
+def _export(db: Path, output: Path, compact_ids: bool = False) -> None:
+    if compact_ids:
+        with sqlite3.connect(db) as conn:
+            build_compact_ids(conn)
+            mapping = output.with_name(f"{output.stem}_ids.csv")
+            write_id_mapping(conn, mapping)
+        conn.close()
+        print(f"Compact id mapping written to {mapping}")
+    export_to_zip(db, output, compact_ids)
 
 
 def convert(
@@ -126,6 +465,33 @@ def convert(
     output: StrPath,
     append_to_existing: bool = False,
     num_workers: int = 1,
+    profile_dir: StrPath | None = None,
+    naptan: StrPath | None = None,
+    memory_report: StrPath | None = None,
+    manifest: StrPath | None = None,
+    frequencies: bool = False,
+    shapes: bool = False,
+    shape_tolerance: float = 2.0,
+    transfers: bool = False,
+    transfer_radius: float = 200.0,
+    columnar: ColumnarFormat | None = None,
+    from_date: date | str | None = None,
+    to_date: date | str | None = None,
+    operators: Iterable[str] | None = None,
+    modes: Iterable[str] | None = None,
+    lines: Iterable[str] | None = None,
+    catalog: StrPath | None = None,
+    query: str | None = None,
+    latest_revisions: bool = False,
+    canonical_calendars: bool = False,
+    compact_ids: bool = False,
+    engine: Engine = "processes",
+    journey_workers: int = 1,
+    shard: Shard | str | None = None,
+    shard_by: ShardBy = "hash",
+    stage_only: bool = False,
+    check: bool = False,
+    executor: Executor | None = None,
 ) -> None:
     """
     Converts TransXchange formatted schedule data into GTFS feed.
@@ -144,8 +510,176 @@ def convert(
     worker_cnt : int
         Number of workers to distribute the conversion process. By default the number of
         CPUs is used.
+    profile_dir : str, optional
+        If given, every file is converted under cProfile. The statistics of each
+        worker are dumped to this directory and merged into ``report.txt``, which
+        lists the hottest functions ranked by cumulative time.
+    naptan : str, optional
+        Path to a NaPTAN Stops.csv to use instead of downloading the latest one.
+    memory_report : str, optional
+        If given, the memory use of converting each file is tracked and written to
+        this path, as CSV if it ends in .csv and as JSON otherwise. For every file the
+        report lists its size, journey count and peak RSS, and the memory traced by
+        tracemalloc with its top allocators after each stage of the conversion.
+        Tracing slows the conversion down considerably.
+    manifest : str, optional
+        Manifest written by ``txc2gtfs scan`` for the input files. The files are
+        then converted in the order of their estimated cost, most expensive first,
+        so that a large file does not end up running alone at the end.
+    frequencies : bool (default is False)
+        Replace runs of at least three trips that follow the same journey pattern
+        and calendar at an even headway by their first trip and a row in
+        frequencies.txt with ``exact_times=1``. This shrinks stop_times.txt
+        considerably for high-frequency services.
+    shapes : bool (default is False)
+        Write shapes.txt from the Track geometry of the RouteLinks of each route,
+        and reference the shapes from trips.txt. Routes with identical geometry
+        share a shape; routes without Track data get no shape.
+    shape_tolerance : float (default is 2.0)
+        Tolerance of the Douglas-Peucker simplification of the shapes, in metres.
+        Points closer than this to the simplified line are dropped; 0 keeps every
+        point.
+    transfers : bool (default is False)
+        Write transfers.txt with a walking transfer (``transfer_type=2``) in each
+        direction between every two stops of the feed within ``transfer_radius``
+        of each other. The min_transfer_time is the distance walked at 1.2 m/s.
+        See :mod:`txc2gtfs.transfers`.
+    transfer_radius : float (default is 200.0)
+        Largest distance between the stops of a transfer, in metres.
+    columnar : {"parquet", "arrow"}, optional
+        Also write every GTFS table as Parquet files or Arrow IPC streams to a
+        directory next to the output zip, named after it without its suffix. The
+        columns are typed (times in seconds since midnight, dictionary encoded ids)
+        and the rows sorted by trip_id where the table has one. Requires pyarrow.
+    from_date, to_date : date or str (YYYY-MM-DD), optional
+        Only convert the services whose OperatingPeriod overlaps this window, both
+        ends inclusive, and clip their calendars to it. Files none of whose
+        services overlap the window are skipped after reading their header.
+    operators, modes, lines : list of str, optional
+        Only convert the services of these operators (by the id, OperatorCode or
+        NationalOperatorCode of their RegisteredOperatorRef), of these modes (e.g.
+        "bus", "underground") and with these line names, all compared without
+        regard to case. Files without any such service are skipped after reading
+        their header.
+    catalog : str, optional
+        Catalog written by ``txc2gtfs catalog``. The files to convert are then
+        selected from the catalog, restricted to those under ``input`` if any are
+        given.
+    query : str, optional
+        SQL condition on the ``catalog`` view selecting the files from the catalog,
+        e.g. ``"mode = 'bus' AND end_date >= '2025-01-01'"``. See
+        ``txc2gtfs.catalog`` for its columns.
+    latest_revisions : bool (default is False)
+        Only convert the latest revision of every service: the files are grouped by
+        the ServiceCodes in their header, and only the file with the highest
+        RevisionNumber, then the latest ModificationDateTime, is kept in each
+        group. Files with the same content as another are dropped as well, and
+        the services of a kept file whose latest revision is in another file are
+        left out of it. The revisions are read from ``catalog`` if given, and from
+        the files otherwise.
+    canonical_calendars : bool (default is False)
+        Replace the service_ids, which are otherwise built from the service code,
+        operating period and days of each service, by a compact hash of the
+        calendar: its days of the week, operating period and exception dates.
+        Services with identical calendars then share a single service_id and a
+        single set of rows in calendar.txt and calendar_dates.txt.
+    compact_ids : bool (default is False)
+        Replace the trip, service and route ids of the feed by short base 36 ids,
+        numbering the verbose ids of each kind in sorted order, so that they stay
+        the same across runs over the same input. The mapping back to the verbose
+        ids is written next to the output zip, e.g. ``gtfs_ids.csv`` for
+        ``gtfs.zip``.
+    engine : {"processes", "threads"} (default is "processes")
+        Run the workers as a pool of processes, or of threads in this process.
+        Threads share a single copy of the NaPTAN stops and bank holidays, which
+        are loaded before they start, and parse the files with lxml, which releases
+        the GIL while parsing. They scale best on free-threaded builds of Python.
+        ``memory_report`` and ``profile_dir`` require processes.
+    journey_workers : int (default is 1)
+        Only on free-threaded builds of Python: number of threads converting the
+        VehicleJourneys of each file, in chunks, once the services and sections
+        they share have been read. The chunks are merged in document order, so
+        the feed is the same as with a single thread, and a few very large files
+        can use several cores; profiles only cover the thread of each worker.
+        The conversion of journeys holds the GIL, so with the GIL enabled a
+        single thread is used, with a warning.
+    shard : Shard or str, optional
+        Only convert shard ``i/N`` of the input files, e.g. ``"0/4"`` for the first
+        of four, as one of several machines sharing a conversion. No feed is
+        written: a copy of the staging database is written to ``output`` instead,
+        as a partial database for ``txc2gtfs merge``, which combines those of all
+        shards into the feed. See :mod:`txc2gtfs.shards`.
+    shard_by : {"hash", "cost"} (default is "hash")
+        Assign the files to shards by the hash of their name, or spread them over
+        the shards by their estimated cost from ``manifest``, which is required.
+    stage_only : bool (default is False)
+        Only convert the files into the staging database ``gtfs.db`` next to
+        ``output``, without writing the feed, e.g. to read its tables directly as
+        :func:`txc2gtfs.convert_to_tables` does.
+    check : bool (default is False)
+        Check the staged tables before the feed is written, and print a summary
+        of the problems found: stop_times, trips, routes and frequencies that
+        refer to stops, trips, routes, calendars, agencies or shapes that are
+        missing, trips without stop_times, and trips whose stop_sequences repeat
+        or whose times go backwards. See :mod:`txc2gtfs.check`.
+    executor : Executor, optional
+        Convert the files on this executor instead of on workers started for this
+        conversion alone, e.g. to keep a pool of workers with their reference
+        data loaded across conversions (see :mod:`txc2gtfs.serve`). Its threads
+        or processes should match ``engine``; ``num_workers`` is then ignored.
     """
-    input = _iterate_paths(input)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+    if engine == "threads" and (memory_report is not None or profile_dir is not None):
+        raise ValueError(
+            "Memory reports and profiles are per process, use engine='processes'"
+        )
+    if isinstance(shard, str):
+        shard = Shard.parse(shard)
+    if journey_workers > 1 and _gil_enabled():
+        print(
+            "UserWarning: The GIL is enabled, so journey workers would not run in "
+            "parallel. Converting the journeys of each file on a single thread."
+        )
+        journey_workers = 1
+    if shard is not None and (compact_ids or columnar is not None):
+        raise ValueError("Compact ids and columnar tables are not written for shards")
+    if shard is not None and transfers:
+        # The stops of a transfer may be in different shards
+        raise ValueError("Transfers are not written for shards")
+    if stage_only and (shard is not None or compact_ids or columnar is not None):
+        raise ValueError("Only the staging database is written with stage_only")
+    if shard is not None and shard_by == "cost" and manifest is None:
+        raise ValueError("Sharding by cost requires a manifest")
+
+    paths = list(iterate_paths(input))
+    if catalog is not None:
+        selected = select_paths(catalog, query)
+        if paths:
+            given = {path.resolve() for path in paths}
+            selected = [path for path in selected if path in given]
+        paths = selected
+    latest_services: dict[Path, frozenset[str]] = {}
+    if latest_revisions:
+        revisions = (
+            read_catalog_revisions(catalog, paths)
+            if catalog is not None
+            else read_revisions(paths, num_workers)
+        )
+        selection = select_latest_revisions(revisions)
+        if selection.superseded or selection.duplicates:
+            print(
+                f"Skipping {len(selection.superseded)} superseded and "
+                f"{len(selection.duplicates)} duplicate file(s)"
+            )
+        paths = selection.paths
+        latest_services = selection.services
+    costs = None
+    if manifest is not None:
+        costs = {Path(f.path): f.stop_times_rows for f in read_manifest(manifest)}
+        paths.sort(key=lambda path: costs.get(path.resolve(), 0), reverse=True)
+    if shard is not None:
+        paths = select_shard(paths, shard, shard_by, costs)
     output = Path(output)
 
     # Filepath for temporary gtfs db
@@ -153,19 +687,92 @@ def convert(
 
     # If append to database is false remove previous gtfs-database if it exists
     if not append_to_existing:
-        out_gtfs_db.unlink(missing_ok=True)
+        for suffix in ("", "-wal", "-shm"):
+            out_gtfs_db.with_name(out_gtfs_db.name + suffix).unlink(missing_ok=True)
+
+    window = None
+    if from_date is not None or to_date is not None:
+        window = DateWindow(
+            date.fromisoformat(from_date) if isinstance(from_date, str) else from_date,
+            date.fromisoformat(to_date) if isinstance(to_date, str) else to_date,
+        )
 
-    def do_parse_txc_to_sql(txc_file: Path) -> None:
-        with sqlite3.connect(out_gtfs_db) as conn:
-            conn.execute("PRAGMA journal_mode=WAL")
-            parse_txc_to_sql_conn(txc_file, conn)
+    # The task needs to be picklable so that it can be sent to the workers
+    options = _TaskOptions(
+        db=out_gtfs_db,
+        run_id=uuid.uuid4().hex,
+        naptan=Path(naptan) if naptan is not None else None,
+        track_memory=memory_report is not None,
+        frequencies=frequencies,
+        shape_tolerance=shape_tolerance if shapes else None,
+        window=window,
+        service_filter=ServiceFilter.create(operators, modes, lines),
+        latest_services=latest_services,
+        canonical_calendars=canonical_calendars,
+        use_lxml=engine == "threads",
+        journey_workers=journey_workers,
+    )
+    task: Callable[[Path], FileResult] = partial(_parse_txc_to_db, options)
+    export: Callable[[], None] = partial(
+        _export, out_gtfs_db, output, compact_ids=compact_ids
+    )
+    if profile_dir is not None:
+        profile_dir = Path(profile_dir)
+        prepare_profile_dir(profile_dir)
+        task = ProfiledTask(task, profile_dir)
+        export = ProfiledTask(export, profile_dir)
 
     # Create workers
-    if num_workers > 1:
+    if executor is not None:
+        results = _run_on_executor(executor, task, paths)
+    elif num_workers > 1 and engine == "threads":
+        # Load the reference data that the threads share, before they start
+        get_naptan_stops(options.naptan)
+        get_bank_holidays()
+        with ThreadPoolExecutor(num_workers) as executor:
+            results = list(executor.map(task, paths))
+    elif num_workers > 1:
         with multiprocessing.Pool(num_workers) as pool:
-            pool.map(do_parse_txc_to_sql, input)
+            # Hand out the files one by one if they are ordered by cost
+            chunksize = 1 if manifest is not None else None
+            results = pool.map(task, paths, chunksize)
     else:
-        for txc_file in input:
-            do_parse_txc_to_sql(txc_file)
+        results = [task(txc_file) for txc_file in paths]
+
+    if transfers:
+        with closing(sqlite3.connect(out_gtfs_db)) as conn:
+            count = stage_transfers(conn, transfer_radius)
+        print(f"{count} transfers between stops within {transfer_radius:g} m")
+
+    if check:
+        _check(out_gtfs_db)
+
+    if shard is not None:
+        # The partial database is a compacted copy of the staging database in a
+        # single file, to be copied to wherever the shards are merged
+        output.unlink(missing_ok=True)
+        with sqlite3.connect(out_gtfs_db) as conn:
+            write_shard_manifest(conn, shard, paths)
+            create_merge_indexes(conn)
+            conn.execute("VACUUM INTO ?", (str(output),))
+        conn.close()
+        print(f"Shard {shard} of {len(paths)} file(s) staged in {output}")
+    elif not stage_only:
+        export()
+
+    if columnar is not None:
+        directory = output.with_suffix("")
+        export_to_columnar(out_gtfs_db, directory, columnar, compact_ids=compact_ids)
+        print(f"{columnar.capitalize()} tables written to {directory}")
+
+    if memory_report is not None:
+        memory_report = Path(memory_report)
+        write_memory_report(
+            (result.memory for result in results if result and result.memory),
+            memory_report,
+        )
+        print(f"Memory report written to {memory_report}")
 
-    export_to_zip(out_gtfs_db, output)
+    if profile_dir is not None:
+        report = write_profile_report(profile_dir)
+        print(f"Profile report written to {report}")
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import sqlite3
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS trip_fingerprints (
+    fingerprint BLOB PRIMARY KEY
+)
+"""
+
+
+def get_trip_fingerprint(
+    trip_id: str, service_id: str, template: list[tuple[str, int]]
+) -> bytes:
+    """
+    Fingerprint of a trip: its trip_id, service_id and the (stop_id, offset in
+    seconds) of each of its stops.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{trip_id}\0{service_id}".encode())
+    for stop_id, offset in template:
+        digest.update(f"\0{stop_id}@{offset}".encode())
+    return digest.digest()
+
+
+class TripFingerprints:
+    """
+    Fingerprints of the trips seen during a run.
+
+    Fingerprints of the file being converted are pending until the file has been
+    staged: they are written to the staging database along with its rows, and
+    kept once these are committed. Before every file the fingerprints staged by
+    other workers are read back, so that a trip repeated in several files is only
+    converted once, whichever worker converted it first.
+    """
+
+    def __init__(self) -> None:
+        self._staged: set[bytes] = set()
+        self._pending: set[bytes] = set()
+        self._last_rowid = 0
+
+    def __contains__(self, fingerprint: bytes) -> bool:
+        return fingerprint in self._staged or fingerprint in self._pending
+
+    def __len__(self) -> int:
+        return len(self._staged) + len(self._pending)
+
+    def add(self, fingerprint: bytes) -> None:
+        self._pending.add(fingerprint)
+
+    def sync(self, cur: sqlite3.Cursor) -> None:
+        """Read the fingerprints staged since the last sync"""
+        cur.execute(_CREATE_TABLE)
+        for rowid, fingerprint in cur.execute(
+            "SELECT rowid, fingerprint FROM trip_fingerprints WHERE rowid > ? "
+            "ORDER BY rowid",
+            (self._last_rowid,),
+        ):
+            self._staged.add(fingerprint)
+            self._last_rowid = rowid
+
+    def stage(self, cur: sqlite3.Cursor) -> None:
+        """Write the pending fingerprints along with the rows of their trips"""
+        cur.execute(_CREATE_TABLE)
+        cur.executemany(
+            "INSERT OR IGNORE INTO trip_fingerprints(fingerprint) VALUES (?)",
+            ((fingerprint,) for fingerprint in self._pending),
+        )
+
+    def commit(self) -> None:
+        """Keep the pending fingerprints once the rows of the file are committed"""
+        self._staged |= self._pending
+        self._pending.clear()
+
+    def discard(self) -> None:
+        """Forget the pending fingerprints, e.g. if staging the file failed"""
+        self._pending.clear()
+
+
+class ChunkFingerprints:
+    """
+    Fingerprints of a chunk of the journeys of a document, converted alongside the
+    other chunks.
+
+    Trips are checked against the fingerprints seen before and earlier in the
+    chunk, but only recorded for the chunk: they are added to the fingerprints of
+    the run when the chunks are merged in document order, so that the trips kept
+    do not depend on the order in which the chunks were converted.
+    """
+
+    def __init__(self, seen: TripFingerprints) -> None:
+        self._seen = seen
+        self._added: set[bytes] = set()
+        self.last: bytes | None = None
+
+    def __contains__(self, fingerprint: bytes) -> bool:
+        return fingerprint in self._added or fingerprint in self._seen
+
+    def add(self, fingerprint: bytes) -> None:
+        self._added.add(fingerprint)
+        self.last = fingerprint
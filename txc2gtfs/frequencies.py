@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+
+import numpy as np
+import pandas as pd
+
+# Shortest run of evenly spaced trips that is replaced by a frequency
+_MIN_RUN_LENGTH = 3
+
+_FREQUENCIES_COLS = ["trip_id", "start_time", "end_time", "headway_secs", "exact_times"]
+
+# Trips can only share a frequency if they agree on all of these
+_TRIP_GROUP_COLS = ["route_id", "service_id", "direction_id", "trip_headsign"]
+
+
+def parse_gtfs_time(times: pd.Series) -> pd.Series:
+    """Convert GTFS times (HH:MM:SS, hours may exceed 24) into seconds"""
+    parts = times.str.split(":", n=2, expand=True).astype(int)
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+def format_gtfs_time(seconds: int) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours:02}:{rest // 60:02}:{rest % 60:02}"
+
+
+def _find_runs(
+    starts: np.ndarray, min_length: int
+) -> Generator[tuple[int, int], None, None]:
+    """Yield the (first, last) indices of the runs of evenly spaced ``starts``"""
+    i = 0
+    while i < len(starts) - 1:
+        headway = starts[i + 1] - starts[i]
+        j = i + 1
+        while j < len(starts) - 1 and starts[j + 1] - starts[j] == headway:
+            j += 1
+
+        if headway > 0 and j - i + 1 >= min_length:
+            yield i, j
+            i = j + 1
+        else:
+            i += 1
+
+
+def get_frequencies(
+    stop_times: pd.DataFrame,
+    trips: pd.DataFrame,
+    min_length: int = _MIN_RUN_LENGTH,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Replace runs of evenly spaced trips by frequencies.
+
+    Trips that run on the same route and service calendar, in the same direction,
+    and visit the same stops with the same offsets from their departure follow the
+    same template. Whenever at least ``min_length`` of them depart at an even
+    headway, only the first one of them is kept and the run is described by a
+    frequency with ``exact_times=1``.
+
+    Returns the remaining stop_times and trips, and the frequencies.
+    """
+    stop_times = stop_times.sort_values(["trip_id", "stop_sequence"])
+    arrival = parse_gtfs_time(stop_times["arrival_time"])
+    departure = parse_gtfs_time(stop_times["departure_time"])
+    start = departure.groupby(stop_times["trip_id"]).transform("first")
+
+    # Describe the template of every trip by its stops and their offsets
+    stop_keys = (
+        stop_times["stop_id"].astype(str)
+        + "@"
+        + (arrival - start).astype(str)
+        + "/"
+        + (departure - start).astype(str)
+    )
+    templates = pd.DataFrame(
+        {
+            "template": stop_keys.groupby(stop_times["trip_id"]).agg("|".join),
+            "start": start.groupby(stop_times["trip_id"]).first(),
+        }
+    )
+    templates = templates.join(
+        trips.drop_duplicates(subset=["trip_id"]).set_index("trip_id")[_TRIP_GROUP_COLS]
+    )
+
+    removed: list[str] = []
+    frequencies: list[tuple[str, str, str, int, int]] = []
+    for _, group in templates.groupby(
+        [*_TRIP_GROUP_COLS, "template"], dropna=False, sort=False
+    ):
+        if len(group) < min_length:
+            continue
+
+        group = group.sort_values("start")
+        starts = group["start"].to_numpy()
+        trip_ids = group.index.to_numpy()
+        for first, last in _find_runs(starts, min_length):
+            headway = int(starts[first + 1] - starts[first])
+            frequencies.append(
+                (
+                    trip_ids[first],
+                    format_gtfs_time(starts[first]),
+                    # With exact_times, trips depart at start_time plus multiples
+                    # of the headway before end_time, which must therefore come
+                    # after the last departure but before the next one
+                    format_gtfs_time(starts[last] + 1),
+                    headway,
+                    1,
+                )
+            )
+            removed.extend(trip_ids[first + 1 : last + 1])
+
+    return (
+        stop_times.loc[~stop_times["trip_id"].isin(removed)],
+        trips.loc[~trips["trip_id"].isin(removed)],
+        pd.DataFrame(frequencies, columns=_FREQUENCIES_COLS),
+    )
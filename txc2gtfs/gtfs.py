@@ -7,10 +7,64 @@ from zipfile import ZIP_DEFLATED, ZipFile
 
 import pandas as pd
 
+from .ids import ID_COLUMNS, read_compact_ids
 
-def export_to_zip(db: Path, output: Path) -> None:
-    """Reads the gtfs database and generates an export dictionary for GTFS"""
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        is not None
+    )
+
+
+# Names of the GTFS fields of the staging tables that do not use them already
+COLUMN_NAMES = {
+    "stops": {
+        "id": "stop_id",
+        "name": "stop_name",
+        "lat": "stop_lat",
+        "lon": "stop_lon",
+    },
+    "agency": {
+        "id": "agency_id",
+        "name": "agency_name",
+        "url": "agency_url",
+        "timezone": "agency_timezone",
+        "lang": "agency_lang",
+    },
+    "routes": {
+        "id": "route_id",
+        "agency_id": "agency_id",
+        "private_id": "route_private_id",
+        "long_name": "route_long_name",
+        "short_name": "route_short_name",
+        "type": "route_type",
+        "section_id": "route_section_id",
+    },
+}
+
+
+def export_to_zip(db: Path, output: Path, compact_ids: bool = False) -> None:
+    """
+    Reads the gtfs database and generates an export dictionary for GTFS.
+
+    With ``compact_ids``, the trip, service and route ids are replaced by the
+    compact ids of the ``compact_ids`` table (see :mod:`txc2gtfs.ids`).
+    """
     with ZipFile(output, "w", compression=ZIP_DEFLATED) as zf:
+        ids = None
+
+        def read(table: str, query: str | None = None) -> pd.DataFrame:
+            data = pd.read_sql_query(query or f"SELECT * FROM {table}", conn)
+            if "index" in data.columns:
+                data = data.drop("index", axis=1)
+            if ids is not None:
+                for column, kind in ID_COLUMNS.get(table, {}).items():
+                    if column in data.columns:
+                        data[column] = data[column].map(ids[kind])
+            return data
 
         def write(name: str, data: pd.DataFrame) -> None:
             with zf.open(name, "w") as f:
@@ -23,91 +77,75 @@ def export_to_zip(db: Path, output: Path) -> None:
                 )
 
         with sqlite3.connect(db) as conn:
+            if compact_ids:
+                ids = read_compact_ids(conn)
+
             # Stops
             # -----
-            stops = pd.read_sql_query("SELECT * FROM stops", conn)
+            stops = read("stops")
             # Drop duplicates based on stop_id
-            write(
-                "stops.txt",
-                stops.rename(
-                    columns={
-                        "id": "stop_id",
-                        "name": "stop_name",
-                        "lat": "stop_lat",
-                        "lon": "stop_lon",
-                    }
-                ),
-            )
+            write("stops.txt", stops.rename(columns=COLUMN_NAMES["stops"]))
 
             # Agency
             # ------
-            agency = pd.read_sql_query("SELECT * FROM agency", conn)
+            agency = read("agency")
             # Drop duplicates
-            write(
-                "agency.txt",
-                agency.rename(
-                    columns={
-                        "id": "agency_id",
-                        "name": "agency_name",
-                        "url": "agency_url",
-                        "timezone": "agency_timezone",
-                        "lang": "agency_lang",
-                    }
-                ),
-            )
+            write("agency.txt", agency.rename(columns=COLUMN_NAMES["agency"]))
 
             # Routes
             # ------
-            routes = pd.read_sql_query("SELECT * FROM routes", conn)
+            routes = read("routes")
             # Drop duplicates
-            write(
-                "routes.txt",
-                routes.rename(
-                    columns={
-                        "id": "route_id",
-                        "agency_id": "agency_id",
-                        "private_id": "route_private_id",
-                        "long_name": "route_long_name",
-                        "short_name": "route_short_name",
-                        "type": "route_type",
-                        "section_id": "route_section_id",
-                    }
-                ),
-            )
+            write("routes.txt", routes.rename(columns=COLUMN_NAMES["routes"]))
 
             # Trips
             # -----
-            trips = pd.read_sql_query("SELECT * FROM trips", conn)
-            if "index" in trips.columns:
-                trips = trips.drop("index", axis=1)
+            trips = read("trips")
 
             # Drop duplicates
             write("trips.txt", trips.drop_duplicates(subset=["trip_id"]))
 
             # Stop_times
             # ----------
-            stop_times = pd.read_sql_query("SELECT * FROM stop_times", conn)
-            if "index" in stop_times.columns:
-                stop_times = stop_times.drop("index", axis=1)
+            stop_times = read("stop_times")
 
             # Drop duplicates
             write("stop_times.txt", stop_times.drop_duplicates())
 
             # Calendar
             # --------
-            calendar = pd.read_sql_query("SELECT * FROM calendar", conn)
-            if "index" in calendar.columns:
-                calendar = calendar.drop("index", axis=1)
+            calendar = read("calendar")
             # Drop duplicates
             write("calendar.txt", calendar.drop_duplicates(subset=["service_id"]))
 
             # Calendar dates
             # --------------
-            calendar_dates = pd.read_sql_query("SELECT * FROM calendar_dates", conn)
-            if "index" in calendar_dates.columns:
-                calendar_dates = calendar_dates.drop("index", axis=1)
-            # Drop duplicates
-            write(
-                "calendar_dates.txt",
-                calendar_dates.drop_duplicates(subset=["service_id"]),
-            )
+            # The table only exists if some file had exceptions during a bank holiday
+            if table_exists(conn, "calendar_dates"):
+                calendar_dates = read("calendar_dates")
+                # Drop duplicates, a service may have several exception dates
+                write("calendar_dates.txt", calendar_dates.drop_duplicates())
+
+            # Frequencies
+            # -----------
+            # The table only exists if frequencies were detected
+            if table_exists(conn, "frequencies"):
+                frequencies = read("frequencies")
+                # Drop duplicates
+                write("frequencies.txt", frequencies.drop_duplicates())
+
+            # Shapes
+            # ------
+            # The table only exists if shapes were generated
+            if table_exists(conn, "shapes"):
+                shapes = read(
+                    "shapes",
+                    "SELECT * FROM shapes ORDER BY shape_id, shape_pt_sequence",
+                )
+                write("shapes.txt", shapes)
+
+            # Transfers
+            # ---------
+            # The table only exists if transfers were generated
+            if table_exists(conn, "transfers"):
+                write("transfers.txt", read("transfers"))
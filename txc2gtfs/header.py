@@ -0,0 +1,200 @@
+"""
+Cheap reads of the header of TransXChange files.
+
+The Operators and Services of a document come before its VehicleJourneys, which
+make up most of a large file. The header is read with lxml's incremental parser,
+which only hands the Operators, Services and the sections before them back to
+Python, and stops reading at the end of the Services, so that a file can be
+skipped without building its tree.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+from .util.dates import DateWindow
+from .util.xml import NS, XMLElement, XMLTree, get_text, local_name
+
+if TYPE_CHECKING:
+    from lxml import etree
+
+# Sections that may come before the Services, cleared once they have been parsed
+_SECTIONS = [
+    "ServicedOrganisations",
+    "NptgLocalities",
+    "StopPoints",
+    "StopAreas",
+    "RouteSections",
+    "Routes",
+    "JourneyPatternSections",
+    "Operators",
+]
+
+_OPERATORS = ["Operator", "LicensedOperator"]
+
+
+@dataclass
+class ServiceHeader:
+    code: str
+    start_date: date | None = None
+    end_date: date | None = None
+    operator_ref: str | None = None
+    mode: str | None = None
+    line_names: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Header:
+    revision_number: int | None = None
+    modification_datetime: datetime | None = None
+    services: list[ServiceHeader] = field(default_factory=list)
+    # Codes of every operator (its id, OperatorCode and NationalOperatorCode), by id
+    operators: dict[str, set[str]] = field(default_factory=dict)
+
+
+def _normalize(values: Iterable[str]) -> frozenset[str]:
+    return frozenset(value.casefold() for value in values)
+
+
+@dataclass(frozen=True)
+class ServiceFilter:
+    """
+    Selects services by their operator, mode and line names, compared without
+    regard to case, and by their exact ServiceCodes. Criteria left empty match
+    every service.
+    """
+
+    operators: frozenset[str] = frozenset()
+    modes: frozenset[str] = frozenset()
+    lines: frozenset[str] = frozenset()
+    codes: frozenset[str] = frozenset()
+
+    @classmethod
+    def create(
+        cls,
+        operators: Iterable[str] | None = None,
+        modes: Iterable[str] | None = None,
+        lines: Iterable[str] | None = None,
+    ) -> ServiceFilter | None:
+        """Create a filter, or return None if no criteria are given"""
+        service_filter = cls(
+            _normalize(operators or ()),
+            _normalize(modes or ()),
+            _normalize(lines or ()),
+        )
+        return service_filter if service_filter != cls() else None
+
+    def matches(self, service: ServiceHeader, operators: dict[str, set[str]]) -> bool:
+        """Whether a service matches, given the operators of its document"""
+        if self.codes and service.code not in self.codes:
+            return False
+        if self.operators:
+            ref = service.operator_ref or ""
+            if self.operators.isdisjoint(_normalize(operators.get(ref, {ref}))):
+                return False
+        if self.modes and (service.mode or "bus").casefold() not in self.modes:
+            return False
+        return not self.lines or not self.lines.isdisjoint(
+            _normalize(service.line_names)
+        )
+
+
+def is_selected(
+    service: ServiceHeader,
+    operators: dict[str, set[str]],
+    window: DateWindow | None = None,
+    service_filter: ServiceFilter | None = None,
+) -> bool:
+    """Whether a service operates during the window and matches the filter"""
+    if window is not None and not window.overlaps(service.start_date, service.end_date):
+        return False
+    return service_filter is None or service_filter.matches(service, operators)
+
+
+def _parse_date(text: str | None) -> date | None:
+    return date.fromisoformat(text) if text else None
+
+
+def _parse_datetime(text: str | None) -> datetime | None:
+    try:
+        return datetime.fromisoformat(text) if text else None
+    except ValueError:
+        return None
+
+
+def _read_root(header: Header, root: XMLElement) -> None:
+    revision = root.get("RevisionNumber")
+    header.revision_number = int(revision) if revision and revision.isdigit() else None
+    header.modification_datetime = _parse_datetime(root.get("ModificationDateTime"))
+
+
+def read_service(service: XMLElement) -> ServiceHeader:
+    """Read the header fields of a Service element"""
+    return ServiceHeader(
+        code=get_text(service, "txc:ServiceCode", default=""),
+        start_date=_parse_date(
+            get_text(service, "./txc:OperatingPeriod/txc:StartDate", default=None)
+        ),
+        end_date=_parse_date(
+            get_text(service, "./txc:OperatingPeriod/txc:EndDate", default=None)
+        ),
+        operator_ref=get_text(service, "txc:RegisteredOperatorRef", default=None),
+        mode=get_text(service, "txc:Mode", default=None),
+        line_names=[
+            name.text
+            for name in service.iterfind("./txc:Lines/txc:Line/txc:LineName", NS)
+            if name.text
+        ],
+    )
+
+
+def _read_operator_codes(operator: XMLElement) -> set[str]:
+    codes = {operator.get("id", "")}
+    for path in ("txc:OperatorCode", "txc:NationalOperatorCode"):
+        if code := get_text(operator, path, default=None):
+            codes.add(code)
+    return codes
+
+
+def read_operators(data: XMLTree) -> dict[str, set[str]]:
+    """Read the codes of the operators of a parsed document, by their id"""
+    return {
+        operator.get("id", ""): _read_operator_codes(operator)
+        for name in _OPERATORS
+        for operator in data.iterfind(f"./txc:Operators/txc:{name}", NS)
+    }
+
+
+def read_header(path: Path) -> Header:
+    """
+    Read the revision of a TransXChange file and its Operators and Services,
+    stopping right after them.
+    """
+    from lxml import etree
+
+    header = Header()
+    tags = [f"{{*}}{name}" for name in (*_SECTIONS, *_OPERATORS, "Service", "Services")]
+    elem: etree._Element
+    for i, (_, elem) in enumerate(
+        etree.iterparse(str(path), events=("end",), tag=tags)
+    ):
+        if i == 0:
+            _read_root(header, cast("XMLElement", elem.getroottree().getroot()))
+
+        name = local_name(elem.tag)
+        if name == "Services":
+            # Nothing is needed after the Services
+            break
+        if name == "Service":
+            header.services.append(read_service(cast("XMLElement", elem)))
+        elif name in _OPERATORS:
+            header.operators[elem.get("id", "")] = _read_operator_codes(
+                cast("XMLElement", elem)
+            )
+        elem.clear()
+
+    return header
@@ -0,0 +1,119 @@
+"""
+Compact identifiers for the trips, services and routes of a feed.
+
+The ids built from TransXChange are long, e.g. trip ids join the section, days of
+operation and departure time, and they repeat on every row of stop_times. Compact
+ids number the distinct verbose ids of each kind in sorted order and write the
+numbers in base 36. They only depend on the set of staged ids, not on the order in
+which the workers staged them, so they are stable across runs over the same input.
+
+The mapping is kept in the ``compact_ids`` table of the staging database, which is
+rebuilt before every export, and written to a CSV file next to the feed.
+"""
+
+from __future__ import annotations
+
+import csv
+import sqlite3
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+type IdKind = Literal["trip", "service", "route"]
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Staging table -> column -> kind of the ids it holds
+ID_COLUMNS: dict[str, dict[str, IdKind]] = {
+    "routes": {"id": "route"},
+    "trips": {"route_id": "route", "service_id": "service", "trip_id": "trip"},
+    "stop_times": {"trip_id": "trip"},
+    "calendar": {"service_id": "service"},
+    "calendar_dates": {"service_id": "service"},
+    "frequencies": {"trip_id": "trip"},
+}
+
+# Kind -> staging tables and columns that every id of the kind appears in
+_SOURCES: dict[IdKind, list[tuple[str, str]]] = {
+    "trip": [("trips", "trip_id")],
+    "service": [("trips", "service_id"), ("calendar", "service_id")],
+    "route": [("routes", "id"), ("trips", "route_id")],
+}
+
+
+def to_base36(number: int) -> str:
+    """Write a non-negative integer in base 36, with lowercase digits"""
+    if number < 0:
+        raise ValueError(f"Cannot write negative number {number} in base 36")
+    digits = ""
+    while True:
+        number, digit = divmod(number, 36)
+        digits = _DIGITS[digit] + digits
+        if number == 0:
+            return digits
+
+
+def build_compact_ids(conn: sqlite3.Connection) -> None:
+    """(Re)build the ``compact_ids`` table from the staged trips and services"""
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS compact_ids")
+    cur.execute("""
+CREATE TABLE compact_ids (
+    kind TEXT,
+    id TEXT,
+    compact_id TEXT,
+    PRIMARY KEY(kind, id)
+)
+""")
+    tables = {
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    for kind, sources in _SOURCES.items():
+        selects = [
+            f"SELECT DISTINCT {column} AS id FROM {table} WHERE {column} IS NOT NULL"
+            for table, column in sources
+            if table in tables
+        ]
+        if not selects:
+            continue
+        ids = conn.execute(f"{' UNION '.join(selects)} ORDER BY id").fetchall()
+        cur.executemany(
+            "INSERT INTO compact_ids(kind, id, compact_id) VALUES (?, ?, ?)",
+            ((kind, id, to_base36(i)) for i, (id,) in enumerate(ids)),
+        )
+    conn.commit()
+
+
+def read_compact_ids(conn: sqlite3.Connection) -> dict[IdKind, dict[str, str]]:
+    """Read the compact id of every verbose id, by kind"""
+    compact_ids: dict[IdKind, dict[str, str]] = {kind: {} for kind in _SOURCES}
+    for kind, id, compact_id in conn.execute(
+        "SELECT kind, id, compact_id FROM compact_ids"
+    ):
+        compact_ids[kind][id] = compact_id
+    return compact_ids
+
+
+def write_id_mapping(conn: sqlite3.Connection, path: StrPath) -> None:
+    """Write the mapping from compact back to verbose ids as CSV"""
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["kind", "compact_id", "id"])
+        writer.writerows(
+            conn.execute(
+                "SELECT kind, compact_id, id FROM compact_ids ORDER BY kind, id"
+            )
+        )
+
+
+def compact_id_expression(table: str, column: str) -> str:
+    """SQL expression of the compact id of a column of a staging table"""
+    kind = ID_COLUMNS[table][column]
+    return (
+        f"(SELECT compact_id FROM compact_ids WHERE kind = '{kind}' "
+        f"AND id = {table}.{column})"
+    )
@@ -0,0 +1,157 @@
+"""
+Per-file memory accounting of conversions.
+
+A :class:`MemoryProbe` is active while a single file is converted. It resets the peak
+resident set size of the process when the file is started and records, at the end of
+each stage of the conversion, the peak RSS so far, the memory traced by
+:mod:`tracemalloc` and the source lines holding most of it. The records of all files
+are written to a CSV or JSON report by :func:`write_memory_report`.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import sys
+import tracemalloc
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+# Stages of the conversion of a file, in order
+STAGES = ("xml_tree", "gtfs_info", "tables", "staging")
+
+_TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _reset_peak_rss() -> None:
+    # Linux allows resetting the high water mark of the process, so that the peak
+    # can be attributed to a single file even if a worker converts many of them
+    try:
+        with open("/proc/self/clear_refs", "w") as fp:
+            fp.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss() -> int:
+    """Peak resident set size of the current process, in bytes"""
+    try:
+        with open("/proc/self/status") as fp:
+            for line in fp:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+@dataclass
+class StageMemory:
+    name: str
+    peak_rss: int
+    traced_current: int
+    traced_peak: int
+    top_allocators: list[str]
+
+
+@dataclass
+class FileMemory:
+    path: str
+    input_bytes: int
+    journeys: int = 0
+    gtfs_info_rows: int = 0
+    gtfs_info_bytes: int = 0
+    peak_rss: int = 0
+    stages: list[StageMemory] = field(default_factory=list)
+
+
+class MemoryProbe:
+    """Records the memory use of the conversion of one file, stage by stage."""
+
+    def __init__(self, path: Path, top: int = 10) -> None:
+        self.record = FileMemory(str(path), path.stat().st_size)
+        self.top = top
+
+    def __enter__(self) -> MemoryProbe:
+        _reset_peak_rss()
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.record.peak_rss = _peak_rss()
+        tracemalloc.stop()
+
+    def stage(self, name: str, **counts: int) -> None:
+        """
+        Record the memory use at the end of stage ``name``. Keyword arguments update
+        the counts of the record, e.g. ``journeys``.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+        top_allocators = [
+            f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno} "
+            f"{stat.size}"
+            for stat in snapshot.statistics("lineno")[: self.top]
+        ]
+
+        self.record.stages.append(
+            StageMemory(name, _peak_rss(), current, peak, top_allocators)
+        )
+        for key, value in counts.items():
+            setattr(self.record, key, value)
+
+
+def _short_path(filename: str) -> str:
+    # Keep the package and module, e.g. "pandas/core/frame.py"
+    return os.path.join(*Path(filename).parts[-2:])
+
+
+def _flatten(record: FileMemory) -> dict[str, Any]:
+    row: dict[str, Any] = asdict(record)
+    del row["stages"]
+    for stage in record.stages:
+        row[f"{stage.name}_peak_rss"] = stage.peak_rss
+        row[f"{stage.name}_traced_current"] = stage.traced_current
+        row[f"{stage.name}_traced_peak"] = stage.traced_peak
+        row[f"{stage.name}_top_allocators"] = "; ".join(stage.top_allocators)
+    return row
+
+
+def write_memory_report(records: Iterable[FileMemory], path: Path) -> None:
+    """Write the memory records as CSV if ``path`` ends in .csv, else as JSON"""
+    if path.suffix.lower() != ".csv":
+        with path.open("w", encoding="utf-8") as fp:
+            json.dump([asdict(record) for record in records], fp, indent=2)
+        return
+
+    fieldnames = [f for f in FileMemory.__dataclass_fields__ if f != "stages"]
+    for stage in STAGES:
+        fieldnames += [
+            f"{stage}_peak_rss",
+            f"{stage}_traced_current",
+            f"{stage}_traced_peak",
+            f"{stage}_top_allocators",
+        ]
+
+    with path.open("w", newline="", encoding="utf-8") as fp:
+        writer = csv.DictWriter(fp, fieldnames)
+        writer.writeheader()
+        writer.writerows(_flatten(record) for record in records)
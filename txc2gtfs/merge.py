@@ -0,0 +1,203 @@
+"""
+Merge of the partial staging databases of a sharded conversion into a GTFS feed.
+
+Every table is read from all partial databases at once, each in the order of its
+key, and the sorted streams are merged row by row straight into the CSV files of
+the feed, so that no table is ever held in memory as a whole. Rows repeated across
+the shards are dropped as the export of a single staging database drops them:
+stops, agencies, routes, trips, calendars and shape points by their key, keeping
+the row of the lowest shard, and stop_times, calendar_dates and frequencies if all
+their columns are equal. The partial databases are indexed on these keys when they
+are written, so SQLite can read them in order without sorting.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import io
+import sqlite3
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from .gtfs import COLUMN_NAMES, table_exists
+from .shards import read_shard
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+
+@dataclass(frozen=True)
+class _MergedTable:
+    name: str
+    key: tuple[str, ...]
+    # Rows are only duplicates if all their columns are equal; the key then only
+    # leads the order of the rows
+    whole_row: bool = False
+
+
+_TABLES = {
+    "stops.txt": _MergedTable("stops", ("id",)),
+    "agency.txt": _MergedTable("agency", ("id",)),
+    "routes.txt": _MergedTable("routes", ("id",)),
+    "trips.txt": _MergedTable("trips", ("trip_id",)),
+    "stop_times.txt": _MergedTable(
+        "stop_times", ("trip_id", "stop_sequence"), whole_row=True
+    ),
+    "calendar.txt": _MergedTable("calendar", ("service_id",)),
+    "calendar_dates.txt": _MergedTable(
+        "calendar_dates", ("service_id", "date"), whole_row=True
+    ),
+    "frequencies.txt": _MergedTable(
+        "frequencies", ("trip_id", "start_time"), whole_row=True
+    ),
+    "shapes.txt": _MergedTable("shapes", ("shape_id", "shape_pt_sequence")),
+}
+
+
+def create_merge_indexes(conn: sqlite3.Connection) -> None:
+    """Index the staged tables on the keys the merge reads them by"""
+    for table in _TABLES.values():
+        if table_exists(conn, table.name):
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS merge_{table.name} "
+                f"ON {table.name}({', '.join(table.key)})"
+            )
+    conn.commit()
+
+
+def _sort_key(value: Any) -> tuple[int, Any]:
+    # Order of the values of a column in SQLite: NULL, numbers, text, blobs
+    if value is None:
+        return (0, 0)
+    if isinstance(value, int | float):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, value)
+
+
+def _get_columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    return [
+        name
+        for _, name, *_ in conn.execute(f"PRAGMA table_info({table})")
+        if name != "index"
+    ]
+
+
+def _merge_table(
+    table: _MergedTable, conns: Sequence[sqlite3.Connection]
+) -> tuple[list[str], Iterator[tuple[Any, ...]]] | None:
+    """Columns and merged, deduplicated rows of a table, or None if not staged"""
+    conns = [conn for conn in conns if table_exists(conn, table.name)]
+    if not conns:
+        return None
+
+    columns = _get_columns(conns[0], table.name)
+    for conn in conns[1:]:
+        if sorted(_get_columns(conn, table.name)) != sorted(columns):
+            raise ValueError(
+                f"The {table.name} tables of the partial databases have different "
+                "columns, were they converted with different options?"
+            )
+
+    order = list(table.key)
+    if table.whole_row:
+        order += [column for column in columns if column not in table.key]
+    positions = [columns.index(column) for column in order]
+    sql = (
+        f"SELECT {', '.join(columns)} FROM {table.name} "
+        f"ORDER BY {', '.join(order)}{'' if table.whole_row else ', rowid'}"
+    )
+
+    def key(row: tuple[Any, ...]) -> tuple[tuple[int, Any], ...]:
+        return tuple(_sort_key(row[i]) for i in positions)
+
+    def generate_rows() -> Iterator[tuple[Any, ...]]:
+        # The merge is stable, so of rows with equal keys that of the first
+        # database comes first
+        previous = None
+        for row in heapq.merge(*(conn.execute(sql) for conn in conns), key=key):
+            current = key(row)
+            if current != previous:
+                yield row
+            previous = current
+
+    return columns, generate_rows()
+
+
+def _check_shards(
+    parts: Sequence[StrPath], conns: Sequence[sqlite3.Connection]
+) -> list[int]:
+    """Check that the parts make up all shards, returning their indices"""
+    shards = []
+    for part, conn in zip(parts, conns, strict=True):
+        shard = read_shard(conn)
+        if shard is None:
+            raise ValueError(
+                f"{part} is not a partial staging database, convert with --shard"
+            )
+        shards.append(shard)
+
+    counts = {shard.count for shard in shards}
+    if len(counts) > 1:
+        raise ValueError(
+            f"The partial databases belong to different shardings: {counts}"
+        )
+    indices = [shard.index for shard in shards]
+    duplicates = sorted({i for i in indices if indices.count(i) > 1})
+    if duplicates:
+        raise ValueError(f"Shards {duplicates} are given more than once")
+    missing = sorted(set(range(counts.pop())) - set(indices))
+    if missing:
+        raise ValueError(f"Shards {missing} are missing")
+    return indices
+
+
+def merge_partials(
+    parts: Sequence[StrPath],
+    output: StrPath,
+) -> dict[str, int]:
+    """
+    Merge the partial staging databases of all shards of a conversion into a GTFS
+    zip file, returning the number of rows written to each of its files.
+    """
+    conns = [
+        sqlite3.connect(f"file:{Path(part).resolve()}?mode=ro", uri=True)
+        for part in parts
+    ]
+    rows: dict[str, int] = {}
+    try:
+        shards = _check_shards(parts, conns)
+        # Of rows with equal keys that of the lowest shard is kept, whatever the
+        # order of the parts
+        conns = [
+            conn for _, conn in sorted(zip(shards, conns), key=lambda pair: pair[0])
+        ]
+        with ZipFile(output, "w", compression=ZIP_DEFLATED) as zf:
+            for name, table in _TABLES.items():
+                merged = _merge_table(table, conns)
+                if merged is None:
+                    continue
+                columns, table_rows = merged
+                renames = COLUMN_NAMES.get(table.name, {})
+                with (
+                    zf.open(name, "w") as fp,
+                    io.TextIOWrapper(fp, encoding="utf-8", newline="") as text,
+                ):
+                    writer = csv.writer(
+                        text, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n"
+                    )
+                    writer.writerow([renames.get(column, column) for column in columns])
+                    count = 0
+                    for row in table_rows:
+                        writer.writerow(row)
+                        count += 1
+                rows[name] = count
+    finally:
+        for conn in conns:
+            conn.close()
+    return rows
@@ -0,0 +1,81 @@
+"""
+Function-level profiling of conversion tasks.
+
+Every task is run under a :class:`cProfile.Profile` that is kept per process, so
+that a pool worker accumulates the statistics of all the files it converts. After
+each task the statistics of the worker are dumped to ``worker-<pid>.pstats`` in the
+profile directory. When the run is finished, :func:`write_profile_report` merges the
+statistics of all workers into one report ranked by cumulative time.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+_WORKER_STATS_GLOB = "worker-*.pstats"
+
+# Profiler of the current process, and the process it was created in. A forked
+# worker must not keep adding to the profiler it inherited from its parent.
+_profiler: cProfile.Profile | None = None
+_profiler_pid: int | None = None
+
+
+def _get_profiler() -> cProfile.Profile:
+    global _profiler, _profiler_pid
+
+    if _profiler is None or _profiler_pid != os.getpid():
+        _profiler = cProfile.Profile()
+        _profiler_pid = os.getpid()
+    return _profiler
+
+
+@dataclass(frozen=True)
+class ProfiledTask[**P, R]:
+    """Wraps a task so that it runs under the profiler of the current process."""
+
+    func: Callable[P, R]
+    directory: Path
+
+    def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R:
+        profiler = _get_profiler()
+        profiler.enable()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(self.directory / f"worker-{os.getpid()}.pstats")
+
+
+def prepare_profile_dir(directory: Path) -> None:
+    """Create the profile directory, removing statistics left by a previous run."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for stats_file in directory.glob(_WORKER_STATS_GLOB):
+        stats_file.unlink()
+
+
+def write_profile_report(directory: Path, top: int = 40) -> Path:
+    """
+    Merge the per-worker statistics in ``directory`` into one report.
+
+    The merged statistics are written to ``combined.pstats`` (for use with e.g.
+    ``python -m pstats`` or snakeviz) and the ``top`` functions ranked by cumulative
+    time to ``report.txt``. Returns the path of the report.
+    """
+    stats_files = sorted(directory.glob(_WORKER_STATS_GLOB))
+    if not stats_files:
+        raise FileNotFoundError(f"No profile statistics found in {directory}")
+
+    report = directory / "report.txt"
+    with report.open("w", encoding="utf-8") as fp:
+        stats = pstats.Stats(*(str(f) for f in stats_files), stream=fp)
+        stats.dump_stats(directory / "combined.pstats")
+
+        fp.write(f"Aggregated profile of {len(stats_files)} worker(s)\n")
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+
+    return report
@@ -0,0 +1,136 @@
+"""
+Selection of the latest revision of every service among the input files.
+
+Dumps of TransXChange data often contain several revisions of the same service.
+The files are grouped by the ServiceCodes in their header, and in every group only
+the file with the highest RevisionNumber is kept, the latest ModificationDateTime
+breaking ties. Files with the same content are dropped by their hash beforehand.
+A kept file may still hold superseded revisions of some of its other services,
+which are then left out of its conversion.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .catalog import CatalogEntry, connect, read_entries
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+_EARLIEST = datetime.min.replace(tzinfo=UTC)
+
+
+@dataclass
+class FileRevision:
+    path: Path
+    hash: str
+    revision: int | None = None
+    modified: datetime | None = None
+    service_codes: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_entry(cls, path: Path, entry: CatalogEntry) -> FileRevision:
+        return cls(
+            path,
+            entry.hash,
+            entry.header.revision_number,
+            entry.header.modification_datetime,
+            [service.code for service in entry.header.services],
+        )
+
+    def sort_key(self) -> tuple[int, datetime, str]:
+        modified = self.modified or _EARLIEST
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=UTC)
+        # The path makes the choice deterministic for otherwise equal revisions
+        return (
+            self.revision if self.revision is not None else -1,
+            modified,
+            str(self.path),
+        )
+
+
+@dataclass
+class RevisionSelection:
+    paths: list[Path]
+    superseded: list[Path]
+    duplicates: list[Path]
+    # Codes of the latest services of the kept files that also hold superseded ones
+    services: dict[Path, frozenset[str]] = field(default_factory=dict)
+
+
+def select_latest_revisions(revisions: Iterable[FileRevision]) -> RevisionSelection:
+    """
+    Keep the files that hold the latest revision of at least one of their services.
+
+    Files without any service are kept. The order of the kept files is that of
+    ``revisions``. For the kept files with services whose latest revision is in
+    another file, ``services`` holds the codes of the services to convert.
+    """
+    unique: list[FileRevision] = []
+    duplicates: list[Path] = []
+    hashes: set[str] = set()
+    for revision in revisions:
+        if revision.hash in hashes:
+            duplicates.append(revision.path)
+            continue
+        hashes.add(revision.hash)
+        unique.append(revision)
+
+    latest: dict[str, FileRevision] = {}
+    for revision in unique:
+        for code in revision.service_codes:
+            current = latest.get(code)
+            if current is None or revision.sort_key() > current.sort_key():
+                latest[code] = revision
+
+    kept = {id(revision) for revision in latest.values()}
+    selection = RevisionSelection([], [], duplicates)
+    for revision in unique:
+        if not revision.service_codes or id(revision) in kept:
+            selection.paths.append(revision.path)
+            codes = frozenset(
+                code for code in revision.service_codes if latest[code] is revision
+            )
+            if codes and codes != set(revision.service_codes):
+                selection.services[revision.path] = codes
+        else:
+            selection.superseded.append(revision.path)
+    return selection
+
+
+def read_revisions(paths: list[Path], num_workers: int = 1) -> list[FileRevision]:
+    """Read the revisions of the files from their header, in order"""
+    entries = {entry.path: entry for entry in read_entries(paths, num_workers)}
+    return [
+        FileRevision.from_entry(path, entries[str(path.resolve())]) for path in paths
+    ]
+
+
+def read_catalog_revisions(db: StrPath, paths: list[Path]) -> list[FileRevision]:
+    """Read the revisions of the files from a catalog, in order"""
+    revisions = {str(path.resolve()): FileRevision(path, "") for path in paths}
+    with connect(db) as conn:
+        for path, digest, revision, modified in conn.execute(
+            "SELECT path, hash, revision, modified FROM files"
+        ):
+            if (file_revision := revisions.get(path)) is not None:
+                file_revision.hash = digest
+                file_revision.revision = revision
+                file_revision.modified = (
+                    datetime.fromisoformat(modified) if modified else None
+                )
+        for path, code in conn.execute("SELECT path, code FROM services"):
+            if (file_revision := revisions.get(path)) is not None:
+                file_revision.service_codes.append(code)
+    conn.close()
+
+    missing = [revision.path for revision in revisions.values() if not revision.hash]
+    if missing:
+        raise ValueError(f"Files missing from catalog {db}: {missing[:5]}")
+    return list(revisions.values())
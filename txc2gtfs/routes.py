@@ -68,8 +68,12 @@ CREATE TABLE IF NOT EXISTS routes (
                 # Get route id
                 route_id = r.get("id")
 
-                # Get agency_id
-                row = gtfs_info.loc[gtfs_info["route_id"] == route_id].iloc[0]
+                # Get agency_id. Routes without trips, e.g. because their trips were
+                # duplicates of trips seen before, are skipped.
+                rows = gtfs_info.loc[gtfs_info["route_id"] == route_id]
+                if rows.empty:
+                    continue
+                row = rows.iloc[0]
                 agency_id: str = row["agency_id"]
                 line_name: str = row["line_name"]
 
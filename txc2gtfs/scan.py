@@ -0,0 +1,156 @@
+"""
+Pre-flight scan of TransXChange files.
+
+The scan reads each file in a single streaming pass, without building a tree or any
+DataFrames, and counts the elements that drive the cost of a conversion. From these
+counts it estimates the number of stop_times rows the file produces and the peak
+memory needed to convert it. The results are written to a JSON manifest, which
+``convert`` can use to schedule the most expensive files first.
+"""
+
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .util.xml import local_name
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+_MANIFEST_VERSION = 1
+
+# Rough memory model of a conversion, calibrated against memory reports (see
+# ``convert(memory_report=...)``): a worker with pandas and the NaPTAN stops loaded,
+# the element tree, and what is kept of the per-stop rows of gtfs_info, which are
+# streamed to the staging database in batches, mostly the trips.
+_BASE_WORKER_BYTES = 300 << 20
+_TREE_BYTES_PER_INPUT_BYTE = 6
+_BYTES_PER_STOP_TIME = 250
+
+
+@dataclass
+class FileScan:
+    path: str
+    size: int
+    mtime: float
+    services: int = 0
+    journey_patterns: int = 0
+    sections: int = 0
+    timing_links: int = 0
+    vehicle_journeys: int = 0
+    stops: int = 0
+    stop_times_rows: int = 0
+    peak_memory: int = 0
+
+
+def scan_file(path: Path) -> FileScan:
+    """Count the elements of a TransXChange file in one streaming pass"""
+    stat = path.stat()
+    scan = FileScan(str(path.resolve()), stat.st_size, stat.st_mtime)
+
+    section_links: dict[str, int] = {}
+    pattern_sections: dict[str, list[str]] = {}
+    pattern_journeys: Counter[str] = Counter()
+    stops: set[str] = set()
+
+    section_id = pattern_id = ""
+    # Stack of the open elements; elements are dropped from their parent once they
+    # end below the collections (e.g. VehicleJourneys/VehicleJourney), so that the
+    # memory use does not grow with the file
+    stack: list[ET.Element] = []
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        name = local_name(elem.tag)
+        if event == "start":
+            stack.append(elem)
+            if name == "JourneyPatternSection":
+                section_id = elem.get("id", "")
+                section_links[section_id] = 0
+            elif name == "JourneyPattern":
+                pattern_id = elem.get("id", "")
+                pattern_sections[pattern_id] = []
+            continue
+
+        stack.pop()
+        parent = local_name(stack[-1].tag) if stack else ""
+        match name:
+            case "Service":
+                scan.services += 1
+            case "JourneyPattern":
+                scan.journey_patterns += 1
+            case "JourneyPatternSection":
+                scan.sections += 1
+            case "JourneyPatternTimingLink":
+                scan.timing_links += 1
+                section_links[section_id] += 1
+            case "StopPointRef" if parent in ("From", "To"):
+                stops.add(elem.text or "")
+            case "JourneyPatternSectionRefs" if parent == "JourneyPattern":
+                pattern_sections[pattern_id].append(elem.text or "")
+            case "JourneyPatternRef" if parent == "VehicleJourney":
+                pattern_journeys[elem.text or ""] += 1
+            case "VehicleJourney":
+                scan.vehicle_journeys += 1
+
+        if len(stack) == 2:
+            stack[-1].remove(elem)
+
+    scan.stops = len(stops)
+
+    # Every journey produces a row per timing link, and one for its last stop
+    scan.stop_times_rows = sum(
+        count * (sum(section_links.get(s, 0) for s in pattern_sections.get(jp, [])) + 1)
+        for jp, count in pattern_journeys.items()
+    )
+    scan.peak_memory = (
+        _BASE_WORKER_BYTES
+        + _TREE_BYTES_PER_INPUT_BYTE * scan.size
+        + _BYTES_PER_STOP_TIME * scan.stop_times_rows
+    )
+    return scan
+
+
+def scan_files(paths: Iterable[Path], num_workers: int = 1) -> Iterator[FileScan]:
+    """Scan the files, in parallel if more than one worker is given"""
+    if num_workers <= 1:
+        yield from map(scan_file, paths)
+        return
+
+    import multiprocessing
+
+    with multiprocessing.Pool(num_workers) as pool:
+        yield from pool.imap(scan_file, paths, chunksize=16)
+
+
+def write_manifest(scans: Iterable[FileScan], path: StrPath) -> dict[str, Any]:
+    """Write the scans and their totals to a JSON manifest, returning the totals"""
+    files = [asdict(scan) for scan in scans]
+    totals = {
+        field.name: sum(f[field.name] for f in files)
+        for field in fields(FileScan)
+        if field.name not in ("path", "mtime", "peak_memory")
+    }
+    totals["files"] = len(files)
+    totals["max_peak_memory"] = max((f["peak_memory"] for f in files), default=0)
+
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(
+            {"version": _MANIFEST_VERSION, "totals": totals, "files": files},
+            fp,
+            indent=2,
+        )
+    return totals
+
+
+def read_manifest(path: StrPath) -> list[FileScan]:
+    with open(path, encoding="utf-8") as fp:
+        manifest = json.load(fp)
+
+    if manifest.get("version") != _MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {path}")
+    return [FileScan(**f) for f in manifest["files"]]
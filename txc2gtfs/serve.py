@@ -0,0 +1,336 @@
+"""
+Long-running conversion service.
+
+``txc2gtfs serve`` loads pandas, the NaPTAN stops and the bank holidays once, and
+keeps a pool of workers with the same reference data loaded, so that a job only
+costs its conversion. Jobs are posted as JSON to ``POST /convert``, over HTTP on a
+local port or a Unix socket:
+
+    {"input": ["data/operator.xml"], "output": "out/gtfs.zip", "frequencies": true}
+
+The options of a job are those of :func:`txc2gtfs.convert` that concern its
+files and feed; the workers, engine and NaPTAN stops are those of the service.
+Once the feed is written, the job is answered with the paths it wrote and its
+metrics:
+
+    {"output": "out/gtfs.zip", "paths": ["out/gtfs.zip"], "files": 1,
+     "seconds": 0.41, "staged_rows": {"trips": 120, "stop_times": 720, ...}}
+
+Errors are answered with ``{"error": ...}`` and status 400 for invalid jobs, or
+500 for failed conversions. ``GET /status`` reports the jobs served so far.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import traceback
+from collections.abc import Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .bank_holidays import get_bank_holidays
+from .columnar import TABLES
+from .converter import Engine, convert
+from .gtfs import table_exists
+from .stops import get_naptan_stops
+from .util.paths import iterate_paths
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+# Unix socket path, or host and port
+type Address = str | Path | tuple[str, int]
+
+# Options of convert that a job may set
+_JOB_OPTIONS = frozenset(
+    {
+        "append_to_existing",
+        "manifest",
+        "frequencies",
+        "shapes",
+        "shape_tolerance",
+        "transfers",
+        "transfer_radius",
+        "columnar",
+        "from_date",
+        "to_date",
+        "operators",
+        "modes",
+        "lines",
+        "catalog",
+        "query",
+        "latest_revisions",
+        "canonical_calendars",
+        "compact_ids",
+        "journey_workers",
+    }
+)
+
+
+def _load_reference_data(naptan: Path | None) -> None:
+    get_naptan_stops(naptan)
+    get_bank_holidays()
+
+
+class ConversionService:
+    """
+    Converts the jobs posted to the service on a pool of workers that is kept
+    across jobs, with the reference data loaded before the first job.
+    """
+
+    def __init__(
+        self,
+        engine: Engine = "threads",
+        num_workers: int = 1,
+        naptan: Path | None = None,
+    ) -> None:
+        self.engine = engine
+        self.naptan = naptan
+        self.jobs = 0
+        self.failed = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        # Jobs writing to the same directory share its staging database
+        self._directories: dict[Path, threading.Lock] = {}
+
+        _load_reference_data(naptan)
+        self.executor: Executor
+        if engine == "threads":
+            self.executor = ThreadPoolExecutor(num_workers, thread_name_prefix="worker")
+        else:
+            self.executor = ProcessPoolExecutor(
+                num_workers, initializer=_load_reference_data, initargs=(naptan,)
+            )
+            # Start all processes now rather than with the first job
+            list(self.executor.map(_load_reference_data, [naptan] * num_workers))
+
+    def run(self, job: dict[str, Any]) -> dict[str, Any]:
+        """Convert a job, returning the paths written and its metrics"""
+        job = dict(job)
+        inputs = job.pop("input", None)
+        output = job.pop("output", None)
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not inputs or not isinstance(inputs, list) or not isinstance(output, str):
+            raise ValueError("A job needs an input list of paths and an output path")
+        unknown = set(job) - _JOB_OPTIONS
+        if unknown:
+            raise ValueError(f"Unknown job options {sorted(unknown)}")
+
+        output_path = Path(output).resolve()
+        with self._lock:
+            lock = self._directories.setdefault(output_path.parent, threading.Lock())
+
+        start = time.perf_counter()
+        try:
+            with lock:
+                convert(
+                    inputs,
+                    output_path,
+                    naptan=self.naptan,
+                    engine=self.engine,
+                    executor=self.executor,
+                    **job,
+                )
+                staged_rows = _count_staged_rows(output_path.parent / "gtfs.db")
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self.jobs += 1
+
+        paths = [output_path]
+        if job.get("compact_ids"):
+            paths.append(output_path.with_name(f"{output_path.stem}_ids.csv"))
+        if job.get("columnar"):
+            paths.append(output_path.with_suffix(""))
+        return {
+            "output": str(output_path),
+            "paths": [str(path) for path in paths],
+            "files": len(list(iterate_paths(inputs))),
+            "seconds": round(seconds, 3),
+            "staged_rows": staged_rows,
+        }
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "engine": self.engine,
+            "jobs": self.jobs,
+            "failed": self.failed,
+            "uptime": round(time.monotonic() - self._started, 1),
+        }
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+def _count_staged_rows(db: Path) -> dict[str, int]:
+    with closing(sqlite3.connect(db)) as conn:
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in TABLES
+            if table_exists(conn, table)
+        }
+    return counts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _TCPServer | _UnixServer
+
+    def do_GET(self) -> None:
+        if self.path != "/status":
+            self._reply(404, {"error": f"No such resource {self.path}"})
+            return
+        self._reply(200, self.server.service.status())
+
+    def do_POST(self) -> None:
+        if self.path != "/convert":
+            self._reply(404, {"error": f"No such resource {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length))
+            if not isinstance(job, dict):
+                raise ValueError("A job is a JSON object")
+        except ValueError as e:
+            self._reply(400, {"error": f"Invalid job: {e}"})
+            return
+
+        try:
+            result = self.server.service.run(job)
+        except (ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            traceback.print_exc()
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self._reply(200, result)
+
+    def _reply(self, status: int, body: dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Clients of a Unix socket have no address
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return "unix"
+
+
+class _TCPServer(ThreadingHTTPServer):
+    service: ConversionService
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    service: ConversionService
+
+
+def make_server(
+    address: Address, service: ConversionService
+) -> _TCPServer | _UnixServer:
+    """HTTP server of the service, on a Unix socket path or a (host, port)"""
+    server: _TCPServer | _UnixServer
+    if isinstance(address, tuple):
+        server = _TCPServer(address, _Handler)
+    else:
+        # Left behind by a service that did not shut down cleanly
+        Path(address).unlink(missing_ok=True)
+        server = _UnixServer(str(address), _Handler)
+    server.service = service
+    return server
+
+
+def serve(
+    address: Address,
+    engine: Engine = "threads",
+    num_workers: int = 1,
+    naptan: StrPath | None = None,
+) -> None:
+    """Serve conversion jobs until interrupted"""
+    service = ConversionService(
+        engine, num_workers, Path(naptan) if naptan is not None else None
+    )
+    server = make_server(address, service)
+
+    def stop(signum: int, frame: object) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving conversions on {_format_address(address)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if not isinstance(address, tuple):
+            Path(address).unlink(missing_ok=True)
+
+
+def _format_address(address: Address) -> str:
+    if isinstance(address, tuple):
+        return f"http://{address[0]}:{address[1]}"
+    return f"unix:{address}"
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float | None = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def submit(
+    address: Address,
+    input: Iterable[StrPath],
+    output: StrPath,
+    timeout: float | None = None,
+    **options: Any,
+) -> dict[str, Any]:
+    """
+    Post a conversion job to a running service and wait for its result. Raises
+    RuntimeError with the message of the service if the job failed.
+    """
+    connection: http.client.HTTPConnection
+    if isinstance(address, tuple):
+        connection = http.client.HTTPConnection(*address, timeout=timeout)
+    else:
+        connection = _UnixHTTPConnection(os.fspath(address), timeout)
+
+    job = {"input": [os.fspath(path) for path in input], "output": os.fspath(output)}
+    with closing(connection):
+        connection.request(
+            "POST",
+            "/convert",
+            json.dumps({**job, **options}),
+            {"Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        body = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(f"Conversion failed ({response.status}): {body['error']}")
+    return body
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Generator
+from sqlite3 import Cursor
+
+import numpy as np
+import pandas as pd
+
+from .util.table import Table
+from .util.xml import NS, XMLElement, XMLTree
+
+# Mean radius of the earth, in metres per radian of latitude
+_METRES_PER_DEGREE = 6_371_008.8 * np.pi / 180
+
+
+def get_track(link: XMLElement) -> np.ndarray:
+    """
+    Get the Track of a RouteLink as an array of (lat, lon) rows.
+
+    Locations are read both with the coordinates directly in them and wrapped in a
+    Translation element. Returns an empty array if the link has no geometry.
+    """
+    track = link.find("txc:Track", NS)
+    if track is None:
+        return np.empty((0, 2))
+
+    lats = [float(el.text or "nan") for el in track.iterfind(".//txc:Latitude", NS)]
+    lons = [float(el.text or "nan") for el in track.iterfind(".//txc:Longitude", NS)]
+    if len(lats) != len(lons):
+        raise ValueError(f"Unpaired coordinates in Track of {link.get('id')}")
+    return np.column_stack((lats, lons)) if lats else np.empty((0, 2))
+
+
+def get_route_geometries(data: XMLTree) -> dict[str, np.ndarray]:
+    """Get the geometry of every Route with Track data from its RouteSections"""
+    sections: dict[str, np.ndarray] = {}
+    for section in data.iterfind("./txc:RouteSections/txc:RouteSection", NS):
+        section_id = section.get("id")
+        assert section_id
+        sections[section_id] = np.concatenate(
+            [np.empty((0, 2))]
+            + [get_track(link) for link in section.iterfind("txc:RouteLink", NS)]
+        )
+
+    routes: dict[str, np.ndarray] = {}
+    for route in data.iterfind("./txc:Routes/txc:Route", NS):
+        route_id = route.get("id")
+        assert route_id
+        coords = np.concatenate(
+            [np.empty((0, 2))]
+            + [
+                sections.get(ref.text or "", np.empty((0, 2)))
+                for ref in route.iterfind("txc:RouteSectionRef", NS)
+            ]
+        )
+
+        # Consecutive links share their end points
+        if len(coords) > 1:
+            keep = np.ones(len(coords), dtype=bool)
+            keep[1:] = np.any(np.diff(coords, axis=0) != 0, axis=1)
+            coords = coords[keep]
+        if len(coords) >= 2:
+            routes[route_id] = coords
+
+    return routes
+
+
+def simplify(coords: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Simplify a line of (lat, lon) rows with the Douglas-Peucker algorithm.
+
+    ``tolerance`` is the largest distance, in metres, a removed point may have from
+    the simplified line. The distances of all points of a segment are computed at
+    once on an equirectangular projection, which is accurate at the scale of a
+    route.
+    """
+    if len(coords) < 3 or tolerance <= 0:
+        return coords
+
+    lat0 = np.radians(coords[:, 0].mean())
+    xy = np.column_stack((coords[:, 1] * np.cos(lat0), coords[:, 0]))
+    xy *= _METRES_PER_DEGREE
+
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        a, b = xy[start], xy[end]
+        points = xy[start + 1 : end] - a
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            distances = np.hypot(points[:, 0], points[:, 1])
+        else:
+            distances = np.abs(ab[0] * points[:, 1] - ab[1] * points[:, 0]) / length
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            middle = start + 1 + farthest
+            keep[middle] = True
+            stack.extend(((start, middle), (middle, end)))
+
+    return coords[keep]
+
+
+def get_shape_id(coords: np.ndarray) -> str:
+    """Identify a shape by the hash of its coordinates"""
+    return hashlib.blake2b(
+        np.ascontiguousarray(coords).tobytes(), digest_size=8
+    ).hexdigest()
+
+
+class ShapesTable(Table):
+    """
+    Shapes of the routes, from the Track geometry of their RouteLinks.
+
+    After populating, ``route_shapes`` maps the id of every route with geometry to
+    the id of its shape. Routes with identical simplified geometry share a shape.
+    """
+
+    def __init__(self, cur: Cursor, tolerance: float = 2.0) -> None:
+        self.tolerance = tolerance
+        self.route_shapes: dict[str, str] = {}
+        cur.execute("""
+CREATE TABLE IF NOT EXISTS shapes (
+    shape_id CHAR(16),
+    shape_pt_lat REAL,
+    shape_pt_lon REAL,
+    shape_pt_sequence INTEGER,
+    PRIMARY KEY(shape_id, shape_pt_sequence)
+)
+""")
+
+    def populate(self, cur: Cursor, data: XMLTree, gtfs_info: pd.DataFrame) -> None:
+        shapes: dict[str, np.ndarray] = {}
+        for route_id, coords in get_route_geometries(data).items():
+            coords = simplify(coords, self.tolerance)
+            shape_id = get_shape_id(coords)
+            shapes[shape_id] = coords
+            self.route_shapes[route_id] = shape_id
+
+        def gen_points() -> Generator[tuple[str, float, float, int], None, None]:
+            for shape_id, coords in shapes.items():
+                for sequence, (lat, lon) in enumerate(coords.tolist(), start=1):
+                    yield (shape_id, lat, lon, sequence)
+
+        cur.executemany(
+            "INSERT OR IGNORE INTO shapes(shape_id, shape_pt_lat, shape_pt_lon, "
+            "shape_pt_sequence) VALUES (?, ?, ?, ?)",
+            gen_points(),
+        )
@@ -0,0 +1,127 @@
+"""
+Shards of a conversion that is spread over several machines.
+
+Every node converts one shard of the input files, ``convert(shard="i/N")``, into a
+partial staging database, and ``txc2gtfs merge`` combines the N partial databases
+into the feed (see :mod:`txc2gtfs.merge`). Files are assigned to shards
+deterministically, so every node can select its own files from the same input
+without talking to the others:
+
+- by hash: a file goes to the shard given by the hash of its name, which does not
+  depend on where the input is mounted on each node;
+- by cost: the files are spread over the shards by their estimated number of
+  stop_times rows from a ``txc2gtfs scan`` manifest, most expensive first, each to
+  the shard with the least work so far.
+
+Each partial database records its shard and the files it converted in the
+``shard_manifest`` table, which the merge checks.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+type ShardBy = Literal["hash", "cost"]
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Invalid shard {self}, expected 0 <= i < N")
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @classmethod
+    def parse(cls, text: str) -> Shard:
+        """Parse a shard written as ``i/N``, e.g. ``0/4`` for the first of four"""
+        index, sep, count = text.partition("/")
+        if not sep or not index.strip().isdigit() or not count.strip().isdigit():
+            raise ValueError(f"Invalid shard {text!r}, expected i/N, e.g. 0/4")
+        return cls(int(index), int(count))
+
+
+def get_hash_shard(path: Path, count: int) -> int:
+    """Shard of a file by the hash of its name"""
+    digest = hashlib.blake2b(path.name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest) % count
+
+
+def select_shard(
+    paths: Iterable[Path],
+    shard: Shard,
+    by: ShardBy = "hash",
+    costs: Mapping[Path, int] | None = None,
+) -> list[Path]:
+    """
+    Select the files of a shard, keeping their order. Shards by cost need the
+    estimated ``costs`` of the files by resolved path; files missing from it
+    count as free.
+    """
+    paths = list(paths)
+    if by == "hash":
+        return [
+            path for path in paths if get_hash_shard(path, shard.count) == shard.index
+        ]
+    if costs is None:
+        raise ValueError("Sharding by cost requires the costs of the files")
+
+    # Longest processing time first, breaking ties by name and then shard index so
+    # that every node comes to the same assignment
+    loads = [0] * shard.count
+    selected: set[Path] = set()
+    for path in sorted(
+        paths, key=lambda path: (-costs.get(path.resolve(), 0), path.name, str(path))
+    ):
+        index = min(range(shard.count), key=lambda i: (loads[i], i))
+        loads[index] += costs.get(path.resolve(), 0)
+        if index == shard.index:
+            selected.add(path)
+    return [path for path in paths if path in selected]
+
+
+def write_shard_manifest(
+    conn: sqlite3.Connection, shard: Shard, paths: Iterable[Path]
+) -> None:
+    """Record the shard and the files it converted in a partial database"""
+    cur = conn.cursor()
+    cur.execute("""
+CREATE TABLE IF NOT EXISTS shard_manifest (
+    shard_index INTEGER,
+    shard_count INTEGER,
+    path TEXT
+)
+""")
+    cur.execute("DELETE FROM shard_manifest")
+    cur.executemany(
+        "INSERT INTO shard_manifest(shard_index, shard_count, path) VALUES (?, ?, ?)",
+        ((shard.index, shard.count, str(path)) for path in paths),
+    )
+    # Shards without files still record themselves
+    if cur.execute("SELECT COUNT(*) FROM shard_manifest").fetchone()[0] == 0:
+        cur.execute(
+            "INSERT INTO shard_manifest(shard_index, shard_count, path) "
+            "VALUES (?, ?, NULL)",
+            (shard.index, shard.count),
+        )
+    conn.commit()
+
+
+def read_shard(conn: sqlite3.Connection) -> Shard | None:
+    """Shard of a partial database, or None for a database of a whole conversion"""
+    try:
+        row = conn.execute(
+            "SELECT shard_index, shard_count FROM shard_manifest LIMIT 1"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return Shard(*row) if row is not None else None
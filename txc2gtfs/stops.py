@@ -1,4 +1,8 @@
+from __future__ import annotations
+
 from collections.abc import Generator
+from functools import cache
+from pathlib import Path
 from sqlite3 import Cursor
 from typing import cast
 
@@ -11,11 +15,12 @@ from .util.xml import NS, XMLTree
 _NAPTAN_CSV_URL = "https://beta-naptan.dft.gov.uk/Download/National/csv"
 _COLUMNS = ["ATCOCode", "CommonName", "Latitude", "Longitude"]
 
-def read_naptan_stops() -> pd.DataFrame:
+
+def read_naptan_stops(path: Path | None = None) -> pd.DataFrame:
     """
-    Reads NaPTAN stops, downloading them if necessary.
+    Reads NaPTAN stops from ``path``, or downloads them if no path is given.
     """
-    naptan_fp = download_cached(_NAPTAN_CSV_URL, "Stops.csv")
+    naptan_fp = path or download_cached(_NAPTAN_CSV_URL, "Stops.csv")
 
     return pd.read_csv(
         naptan_fp,
@@ -26,8 +31,22 @@ def read_naptan_stops() -> pd.DataFrame:
     )
 
 
+@cache
+def get_naptan_stops(path: Path | None = None) -> pd.DataFrame:
+    """
+    NaPTAN stops of ``path`` (see :func:`read_naptan_stops`), read once per process
+    and shared by every file and thread. The frame must not be modified.
+    """
+    naptan_stops = read_naptan_stops(path)
+    # Build the index lookup table now, rather than lazily on the first lookup of
+    # one of the threads sharing it
+    _ = naptan_stops.index.is_unique
+    return naptan_stops
+
+
 class StopsTable(Table):
-    def __init__(self, cur: Cursor) -> None:
+    def __init__(self, cur: Cursor, naptan_path: Path | None = None) -> None:
+        self.naptan_path = naptan_path
         cur.execute("""
 CREATE TABLE IF NOT EXISTS stops (
     id CHAR(12) PRIMARY KEY,
@@ -43,7 +62,7 @@ CREATE TABLE IF NOT EXISTS stops (
             raise ValueError("No StopPoints element. Could not parse stop information.")
 
         # Get stop database
-        naptan_stops = read_naptan_stops()
+        naptan_stops = get_naptan_stops(self.naptan_path)
 
         def gen_stoppoint_ids() -> Generator[str, None, None]:
             for point in stop_points.iterfind("./txc:StopPoints/txc:StopPoint", NS):
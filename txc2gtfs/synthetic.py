@@ -0,0 +1,443 @@
+"""
+Generate synthetic TransXChange documents for scaling tests.
+
+The generated documents follow the structure of the TXC 2.1 files published by TfL
+and contain everything the converter reads: StopPoints, RouteSections (optionally with
+Track geometry), Routes, JourneyPatternSections, Operators, Services and
+VehicleJourneys. All documents draw their stops from one shared pool, which is written
+out as a NaPTAN-style CSV so that the stops can be resolved offline.
+
+The documents are written as a stream, so files from a few kilobytes up to gigabytes
+can be produced without holding them in memory. Use :func:`spec_for_size` to find the
+number of vehicle journeys that gives a document of a given size, and
+:func:`write_corpus` to write many documents at once::
+
+    python -m txc2gtfs.synthetic out/ --files 1000 --size 5MB
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import random
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+
+from .calendar_dates import _KNOWN_HOLIDAYS
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+# Operating profiles, in the forms they appear in real data
+_DAYS_OF_WEEK = [
+    ["MondayToFriday"],
+    ["Saturday"],
+    ["Sunday"],
+    ["Weekend"],
+    ["MondayToSaturday"],
+    ["Monday", "Wednesday", "Friday"],
+    ["Tuesday", "Thursday"],
+]
+_NON_OPERATION_DAYS = ["AllBankHolidays", *_KNOWN_HOLIDAYS]
+
+# Bounding box of the generated stops (roughly Greater London)
+_LAT_RANGE = (51.30, 51.70)
+_LON_RANGE = (-0.50, 0.30)
+
+_SIZE_UNITS = {"B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+# Journeys of a pattern depart in distinct minutes of the service day from 05:00
+# to 24:00, as their trip_ids only tell them apart by the minute
+MAX_VEHICLE_JOURNEYS = 19 * 60
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """Shape of a synthetic TransXChange document"""
+
+    #: Number of Services in the document
+    services: int = 1
+    #: Number of JourneyPatterns per Service
+    journey_patterns: int = 2
+    #: Number of JourneyPatternSections per JourneyPattern
+    sections: int = 1
+    #: Number of JourneyPatternTimingLinks per section
+    timing_links: int = 10
+    #: Number of VehicleJourneys per JourneyPattern, at most MAX_VEHICLE_JOURNEYS
+    vehicle_journeys: int = 20
+    #: Number of distinct operating profiles used by the VehicleJourneys
+    operating_profiles: int = 2
+    #: Number of bank holiday exceptions (DaysOfNonOperation) per operating profile
+    bank_holiday_exceptions: int = 1
+    #: Number of Track locations per RouteLink, 0 to leave out the geometry
+    track_points: int = 0
+    #: Size of the shared stop pool, which is also the size of the NaPTAN CSV
+    stops: int = 1000
+    #: First day of the OperatingPeriod
+    start_date: date = date(2025, 1, 6)
+    #: Length of the OperatingPeriod in days
+    days: int = 28
+    #: Value of the Mode element of the Services
+    mode: str = "bus"
+    #: Seed for the random choices, the same spec always gives the same document
+    seed: int = 0
+
+
+def _stop_id(n: int) -> str:
+    return f"9100SYN{n:07}"
+
+
+def _stop_coordinates(spec: SyntheticSpec) -> list[tuple[float, float]]:
+    rng = random.Random(f"stops-{spec.stops}")
+    return [
+        (round(rng.uniform(*_LAT_RANGE), 6), round(rng.uniform(*_LON_RANGE), 6))
+        for _ in range(spec.stops)
+    ]
+
+
+def write_naptan_csv(path: StrPath, spec: SyntheticSpec) -> None:
+    """Write the stop pool of ``spec`` as a NaPTAN Stops.csv"""
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["ATCOCode", "CommonName", "Latitude", "Longitude"])
+        for n, (lat, lon) in enumerate(_stop_coordinates(spec)):
+            writer.writerow([_stop_id(n), f"Synthetic Stop {n}", lat, lon])
+
+
+def write_txc(fp: TextIO, spec: SyntheticSpec, code: str = "SYN-1") -> None:
+    """
+    Write a synthetic TransXChange document to ``fp``.
+
+    ``code`` is used as the prefix of every identifier in the document, so documents
+    with different codes can be combined into one feed.
+    """
+    if spec.vehicle_journeys > MAX_VEHICLE_JOURNEYS:
+        raise ValueError(
+            f"A journey pattern has at most {MAX_VEHICLE_JOURNEYS} vehicle journeys, "
+            "one per minute of the service day, add services instead"
+        )
+    rng = random.Random(f"{spec.seed}-{code}")
+    coordinates = _stop_coordinates(spec)
+    stops_per_pattern = spec.sections * spec.timing_links + 1
+    if stops_per_pattern > spec.stops:
+        raise ValueError(
+            f"A journey pattern visits {stops_per_pattern} stops, but the stop pool "
+            f"only has {spec.stops}"
+        )
+
+    end_date = spec.start_date + timedelta(days=spec.days)
+    services = [f"{code}-{s}" for s in range(1, spec.services + 1)]
+    patterns = [
+        (service, j)
+        for service in services
+        for j in range(1, spec.journey_patterns + 1)
+    ]
+
+    # Every journey pattern follows a contiguous run of stops of the pool
+    first_stop = {
+        pattern: rng.randrange(spec.stops - stops_per_pattern + 1)
+        for pattern in patterns
+    }
+
+    def pattern_stops(pattern: tuple[str, int]) -> range:
+        return range(first_stop[pattern], first_stop[pattern] + stops_per_pattern)
+
+    def direction(j: int) -> str:
+        return "outbound" if j % 2 else "inbound"
+
+    profiles = [
+        (
+            _DAYS_OF_WEEK[p % len(_DAYS_OF_WEEK)],
+            rng.sample(
+                _NON_OPERATION_DAYS,
+                min(spec.bank_holiday_exceptions, len(_NON_OPERATION_DAYS)),
+            ),
+        )
+        for p in range(max(spec.operating_profiles, 1))
+    ]
+
+    def write_operating_profile(days: list[str], non_operation: list[str]) -> None:
+        fp.write("<OperatingProfile><RegularDayType><DaysOfWeek>")
+        fp.write("".join(f"<{day} />" for day in days))
+        fp.write("</DaysOfWeek></RegularDayType>")
+        if non_operation:
+            fp.write("<BankHolidayOperation><DaysOfNonOperation>")
+            fp.write("".join(f"<{day} />" for day in non_operation))
+            fp.write("</DaysOfNonOperation></BankHolidayOperation>")
+        fp.write("</OperatingProfile>")
+
+    fp.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    fp.write(
+        '<TransXChange xmlns="http://www.transxchange.org.uk/" '
+        f'CreationDateTime="{spec.start_date}T00:00:00" '
+        f'ModificationDateTime="{spec.start_date}T00:00:00" Modification="new" '
+        f'RevisionNumber="1" FileName="{code}.xml" SchemaVersion="2.1">\n'
+    )
+
+    # Stops
+    fp.write("<StopPoints>\n")
+    fp.writelines(
+        f"<AnnotatedStopPointRef><StopPointRef>{_stop_id(n)}</StopPointRef>"
+        f"<CommonName>Synthetic Stop {n}</CommonName></AnnotatedStopPointRef>\n"
+        for n in sorted({n for pattern in patterns for n in pattern_stops(pattern)})
+    )
+    fp.write("</StopPoints>\n")
+
+    # Route sections, with links between consecutive stops
+    fp.write("<RouteSections>\n")
+    for service, j in patterns:
+        stops = pattern_stops((service, j))
+        for s in range(spec.sections):
+            fp.write(f'<RouteSection id="RS_{service}-{j}-{s + 1}">')
+            for link in range(spec.timing_links):
+                a = stops[s * spec.timing_links + link]
+                b = a + 1
+                fp.write(
+                    f'<RouteLink id="RL_{service}-{j}-{s + 1}-{link + 1}">'
+                    f"<From><StopPointRef>{_stop_id(a)}</StopPointRef></From>"
+                    f"<To><StopPointRef>{_stop_id(b)}</StopPointRef></To>"
+                    f"<Direction>{direction(j)}</Direction>"
+                )
+                if spec.track_points > 0:
+                    (lat_a, lon_a), (lat_b, lon_b) = coordinates[a], coordinates[b]
+                    fp.write("<Track><Mapping>")
+                    for p in range(spec.track_points):
+                        t = p / max(spec.track_points - 1, 1)
+                        jitter = rng.uniform(-1e-4, 1e-4)
+                        fp.write(
+                            "<Location>"
+                            f"<Longitude>{lon_a + (lon_b - lon_a) * t:.6f}</Longitude>"
+                            f"<Latitude>{lat_a + (lat_b - lat_a) * t + jitter:.6f}"
+                            "</Latitude></Location>"
+                        )
+                    fp.write("</Mapping></Track>")
+                fp.write("</RouteLink>")
+            fp.write("</RouteSection>\n")
+    fp.write("</RouteSections>\n")
+
+    # Routes
+    fp.write("<Routes>\n")
+    for service, j in patterns:
+        fp.write(
+            f'<Route id="R_{service}-{j}"><PrivateCode>R_{service}-{j}</PrivateCode>'
+            f"<Description>Synthetic route {service}-{j}</Description>"
+        )
+        for s in range(spec.sections):
+            fp.write(f"<RouteSectionRef>RS_{service}-{j}-{s + 1}</RouteSectionRef>")
+        fp.write("</Route>\n")
+    fp.write("</Routes>\n")
+
+    # Journey pattern sections, with run times between the stops
+    fp.write("<JourneyPatternSections>\n")
+    for service, j in patterns:
+        stops = pattern_stops((service, j))
+        for s in range(spec.sections):
+            fp.write(f'<JourneyPatternSection id="JPS_{service}-{j}-{s + 1}">')
+            for link in range(spec.timing_links):
+                seq = s * spec.timing_links + link
+                fp.write(
+                    f'<JourneyPatternTimingLink id="JPL_{service}-{j}-{s + 1}-'
+                    f'{link + 1}"><From SequenceNumber="{seq + 1}">'
+                    f"<StopPointRef>{_stop_id(stops[seq])}</StopPointRef></From>"
+                    f'<To SequenceNumber="{seq + 2}">'
+                    f"<StopPointRef>{_stop_id(stops[seq + 1])}</StopPointRef></To>"
+                    f"<RouteLinkRef>RL_{service}-{j}-{s + 1}-{link + 1}</RouteLinkRef>"
+                    f"<RunTime>PT{rng.randint(1, 4)}M</RunTime>"
+                    "</JourneyPatternTimingLink>"
+                )
+            fp.write("</JourneyPatternSection>\n")
+    fp.write("</JourneyPatternSections>\n")
+
+    # Operators
+    fp.write(
+        f'<Operators>\n<Operator id="OId_{code}"><OperatorCode>{code}</OperatorCode>'
+        f"<TradingName>Synthetic Operator {code}</TradingName></Operator>\n"
+        "</Operators>\n"
+    )
+
+    # Services
+    fp.write("<Services>\n")
+    for service in services:
+        fp.write(
+            f"<Service><ServiceCode>{service}</ServiceCode>"
+            f"<PrivateCode>{service}</PrivateCode>"
+            f'<Lines><Line id="{service}"><LineName>{service}</LineName></Line>'
+            "</Lines><OperatingPeriod>"
+            f"<StartDate>{spec.start_date}</StartDate><EndDate>{end_date}</EndDate>"
+            "</OperatingPeriod>"
+        )
+        write_operating_profile(*profiles[0])
+        fp.write(
+            f"<RegisteredOperatorRef>OId_{code}</RegisteredOperatorRef>"
+            f"<Mode>{spec.mode}</Mode>"
+            f"<Description>Synthetic service {service}</Description>"
+            "<StandardService><Origin>Synthetic Origin</Origin>"
+            "<Destination>Synthetic Destination</Destination>"
+        )
+        for j in range(1, spec.journey_patterns + 1):
+            fp.write(
+                f'<JourneyPattern id="JP_{service}-{j}">'
+                f"<Direction>{direction(j)}</Direction>"
+                "<Operational><VehicleType><VehicleTypeCode>DD</VehicleTypeCode>"
+                "<Description>Double Decker</Description></VehicleType></Operational>"
+                f"<RouteRef>R_{service}-{j}</RouteRef>"
+            )
+            for s in range(spec.sections):
+                fp.write(
+                    "<JourneyPatternSectionRefs>"
+                    f"JPS_{service}-{j}-{s + 1}"
+                    "</JourneyPatternSectionRefs>"
+                )
+            fp.write("</JourneyPattern>")
+        fp.write("</StandardService></Service>\n")
+    fp.write("</Services>\n")
+
+    # Vehicle journeys, spread evenly over the service day from 05:00 to 24:00, at
+    # least a minute apart
+    fp.write("<VehicleJourneys>\n")
+    headway = 19 * 60 * 60 / max(spec.vehicle_journeys, 1)
+    for service, j in patterns:
+        for v in range(spec.vehicle_journeys):
+            departure = int(5 * 60 * 60 + v * headway)
+            hours, rest = divmod(departure, 3600)
+            fp.write(
+                f"<VehicleJourney><PrivateCode>{service}-{j}-{v + 1}</PrivateCode>"
+            )
+            write_operating_profile(*profiles[v % len(profiles)])
+            fp.write(
+                f"<VehicleJourneyCode>VJ_{service}-{j}-{v + 1}</VehicleJourneyCode>"
+                f"<ServiceRef>{service}</ServiceRef><LineRef>{service}</LineRef>"
+                f"<JourneyPatternRef>JP_{service}-{j}</JourneyPatternRef>"
+                f"<DepartureTime>{hours:02}:{rest // 60:02}:{rest % 60:02}"
+                "</DepartureTime></VehicleJourney>\n"
+            )
+    fp.write("</VehicleJourneys>\n")
+
+    fp.write("</TransXChange>\n")
+
+
+def _document_size(spec: SyntheticSpec) -> int:
+    buffer = io.StringIO()
+    write_txc(buffer, spec)
+    return len(buffer.getvalue().encode("utf-8"))
+
+
+def spec_for_size(size: int, spec: SyntheticSpec | None = None) -> SyntheticSpec:
+    """
+    Return ``spec`` with the number of vehicle journeys chosen so that the document
+    is about ``size`` bytes. Once the journey patterns are full, at
+    ``MAX_VEHICLE_JOURNEYS`` journeys each, the number of services is multiplied
+    as well. All other parameters are kept.
+
+    The size of the smallest document of the spec (one vehicle journey per pattern)
+    is a lower bound, which is around 3 KB for a minimal spec.
+    """
+    spec = spec or SyntheticSpec()
+    journeys = _fit_vehicle_journeys(size, spec)
+    if journeys > MAX_VEHICLE_JOURNEYS:
+        services = spec.services * -(-journeys // MAX_VEHICLE_JOURNEYS)
+        spec = replace(spec, services=services)
+        journeys = _fit_vehicle_journeys(size, spec)
+    return replace(spec, vehicle_journeys=min(journeys, MAX_VEHICLE_JOURNEYS))
+
+
+def _fit_vehicle_journeys(size: int, spec: SyntheticSpec) -> int:
+    one = _document_size(replace(spec, vehicle_journeys=1))
+    two = _document_size(replace(spec, vehicle_journeys=2))
+    per_journey = max(two - one, 1)
+    return max(1, 1 + (size - one) // per_journey)
+
+
+def write_corpus(
+    directory: StrPath, files: int, spec: SyntheticSpec, prefix: str = "SYN"
+) -> list[Path]:
+    """
+    Write ``files`` synthetic documents and the matching ``Stops.csv`` to
+    ``directory``. Returns the paths of the documents.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    write_naptan_csv(directory / "Stops.csv", spec)
+
+    paths = []
+    for i in range(1, files + 1):
+        code = f"{prefix}-{i:05}"
+        path = directory / f"{code}.xml"
+        with path.open("w", encoding="utf-8") as fp:
+            write_txc(fp, spec, code)
+        paths.append(path)
+    return paths
+
+
+def parse_size(size: str) -> int:
+    """Parse a size like ``512``, ``64KB`` or ``1.5GB`` into bytes"""
+    size = size.strip().upper()
+    for unit in sorted(_SIZE_UNITS, key=len, reverse=True):
+        if size.endswith(unit):
+            return int(float(size.removesuffix(unit)) * _SIZE_UNITS[unit])
+    return int(size)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic TransXChange corpus"
+    )
+    parser.add_argument("output", type=Path, help="Directory to write the corpus to")
+    parser.add_argument("--files", default=1, type=int, help="Number of documents")
+    parser.add_argument(
+        "--size",
+        type=parse_size,
+        help="Approximate size of each document, e.g. 1KB, 50MB or 1GB. Overrides "
+        "--vehicle-journeys",
+    )
+    defaults = SyntheticSpec()
+    for name in (
+        "services",
+        "journey_patterns",
+        "sections",
+        "timing_links",
+        "vehicle_journeys",
+        "operating_profiles",
+        "bank_holiday_exceptions",
+        "track_points",
+        "stops",
+        "days",
+        "seed",
+    ):
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", default=getattr(defaults, name), type=int
+        )
+    parser.add_argument("--mode", default=defaults.mode)
+
+    args = parser.parse_args(argv)
+
+    spec = SyntheticSpec(
+        services=args.services,
+        journey_patterns=args.journey_patterns,
+        sections=args.sections,
+        timing_links=args.timing_links,
+        vehicle_journeys=args.vehicle_journeys,
+        operating_profiles=args.operating_profiles,
+        bank_holiday_exceptions=args.bank_holiday_exceptions,
+        track_points=args.track_points,
+        stops=args.stops,
+        days=args.days,
+        mode=args.mode,
+        seed=args.seed,
+    )
+    if args.size is not None:
+        spec = spec_for_size(args.size, spec)
+
+    paths = write_corpus(args.output, args.files, spec)
+    total = sum(path.stat().st_size for path in paths)
+    print(
+        f"Wrote {len(paths)} document(s), {total / (1 << 20):.1f} MB, to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Conversion of TransXChange files into GTFS tables in memory.
+
+Instead of writing a GTFS zip, only for it to be unzipped and its CSV files parsed
+again, the files are converted into a temporary staging database whose tables are
+read directly, with the types of the columnar export (see
+:mod:`txc2gtfs.columnar`): GTFS times as integer seconds since midnight, ids as
+categories (pandas) or dictionaries (Arrow), and numbers as numbers. Repeated rows
+are dropped as in the feed.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+from collections.abc import Iterable, Iterator
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+
+from .columnar import TABLES, read_frame, read_table
+from .converter import convert
+from .gtfs import table_exists
+from .ids import build_compact_ids
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+    from _typeshed import StrPath
+
+type TableFormat = Literal["pandas", "arrow"]
+
+FORMATS: tuple[TableFormat, ...] = ("pandas", "arrow")
+
+
+def iter_tables(
+    input: Iterable[StrPath],
+    format: TableFormat = "pandas",
+    tables: Iterable[str] | None = None,
+    compact_ids: bool = False,
+    **options: Any,
+) -> Iterator[tuple[str, pd.DataFrame | pa.Table]]:
+    """
+    Convert TransXChange files and generate their GTFS tables one at a time, as
+    (name, table) pairs, e.g. ``("stop_times", DataFrame)``. Only the table being
+    handed out is held in memory; the others stay in the staging database until
+    they are asked for, which is removed once all tables have been generated.
+
+    format : {"pandas", "arrow"} (default is "pandas")
+        Generate DataFrames, or Arrow tables, which require pyarrow.
+    tables : list of str, optional
+        Names of the tables to generate, in this order, out of agency, stops,
+        routes, trips, stop_times, calendar, calendar_dates, frequencies and
+        shapes. By default all tables of the feed are generated. Tables that
+        were not staged, e.g. frequencies without ``frequencies=True``, are left
+        out.
+    compact_ids : bool (default is False)
+        Replace the trip, service and route ids by compact ids, as in ``convert``.
+    **options
+        Options of :func:`txc2gtfs.convert`, e.g. ``num_workers``, ``naptan`` or
+        ``frequencies``, except those of the written feed.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown table format {format!r}, expected {FORMATS}")
+    names = list(TABLES if tables is None else tables)
+    unknown = [name for name in names if name not in TABLES]
+    if unknown:
+        raise ValueError(f"Unknown GTFS tables {unknown}, expected some of {TABLES}")
+
+    with tempfile.TemporaryDirectory(prefix="txc2gtfs-") as workdir:
+        output = Path(workdir) / "gtfs.zip"
+        convert(input, output, stage_only=True, **options)
+        with closing(sqlite3.connect(output.parent / "gtfs.db")) as conn:
+            if compact_ids:
+                build_compact_ids(conn)
+            for name in names:
+                if not table_exists(conn, name):
+                    continue
+                if format == "arrow":
+                    yield name, read_table(conn, name, compact_ids)
+                else:
+                    yield name, read_frame(conn, name, compact_ids)
+
+
+def convert_to_tables(
+    input: Iterable[StrPath],
+    format: TableFormat = "pandas",
+    tables: Iterable[str] | None = None,
+    compact_ids: bool = False,
+    **options: Any,
+) -> dict[str, pd.DataFrame | pa.Table]:
+    """
+    Convert TransXChange files into GTFS tables in memory, by name, e.g.
+    ``convert_to_tables(paths)["stop_times"]``. The arguments are those of
+    :func:`iter_tables`, which generates the tables one at a time instead.
+    """
+    return dict(iter_tables(input, format, tables, compact_ids, **options))
@@ -0,0 +1,123 @@
+"""
+Walking transfers between nearby stops.
+
+TransXChange has no transfers, so they are derived from the locations of the stops
+of the feed: every two stops within ``radius`` metres of each other get a transfer
+of type 2 in each direction, whose min_transfer_time is the time it takes to walk
+the distance between them. Rather than measuring the distance between all pairs of
+stops, the stops are bucketed into a grid of cells ``radius`` wide, so that the
+stops within the radius of a stop are all in its own cell or one of the eight around
+it. The stops of each of these cells are found by a binary search over the stops
+sorted by their cell, and the great-circle distances of all candidate pairs are
+computed at once with the haversine formula.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterator
+
+import numpy as np
+import pandas as pd
+
+# Mean radius of the earth, in metres
+_EARTH_RADIUS = 6_371_008.8
+
+# Walking speed, in metres per second, of a passenger changing between stops
+WALKING_SPEED = 1.2
+
+_COLUMNS = ["from_stop_id", "to_stop_id", "transfer_type", "min_transfer_time"]
+
+
+def haversine(
+    lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray
+) -> np.ndarray:
+    """Great-circle distances, in metres, between arrays of (lat, lon) degrees"""
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def _iter_candidates(
+    lat: np.ndarray, lon: np.ndarray, radius: float
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Pairs of indexes of the stops in the same or neighbouring cells of a grid,
+    one array of pairs per neighbouring cell
+    """
+    # Cells are square on an equirectangular projection, scaled to be at most as
+    # wide as the radius where meridians are closest, so that no stop within the
+    # radius is more than a cell away
+    scale = np.cos(np.radians(np.abs(lat).max()))
+    metres = _EARTH_RADIUS * np.pi / 180
+    column = np.floor(lon * scale * metres / radius).astype(np.int64)
+    row = np.floor(lat * metres / radius).astype(np.int64)
+    column -= column.min()
+    # A row either side of every column, so that neighbouring keys do not wrap
+    row -= row.min() - 1
+    rows = int(row.max()) + 2
+    keys = column * rows + row
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbours = keys + dx * rows + dy
+            start = np.searchsorted(sorted_keys, neighbours, "left")
+            counts = np.searchsorted(sorted_keys, neighbours, "right") - start
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            # Positions of the stops of each neighbouring cell in the sorted order
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            others = order[np.repeat(start, counts) + offsets]
+            yield np.repeat(np.arange(len(keys)), counts), others
+
+
+def get_transfers(
+    stops: pd.DataFrame, radius: float, walking_speed: float = WALKING_SPEED
+) -> pd.DataFrame:
+    """
+    Transfers of type 2 between all stops within ``radius`` metres of each other,
+    from the ``id``, ``lat`` and ``lon`` columns of ``stops``. The
+    min_transfer_time is the distance walked at ``walking_speed``, rounded up to
+    the second.
+    """
+    stops = stops.dropna(subset=["lat", "lon"]).drop_duplicates(subset=["id"])
+    if len(stops) < 2 or radius <= 0:
+        return pd.DataFrame(columns=_COLUMNS)
+    ids = stops["id"].to_numpy()
+    lat = stops["lat"].to_numpy(dtype=float)
+    lon = stops["lon"].to_numpy(dtype=float)
+
+    pairs = []
+    for a, b in _iter_candidates(lat, lon, radius):
+        distances = haversine(lat[a], lon[a], lat[b], lon[b])
+        near = (a != b) & (distances <= radius)
+        pairs.append((a[near], b[near], distances[near]))
+    a, b, distances = (np.concatenate(arrays) for arrays in zip(*pairs, strict=True))
+
+    transfers = pd.DataFrame(
+        {
+            "from_stop_id": ids[a],
+            "to_stop_id": ids[b],
+            "transfer_type": 2,
+            "min_transfer_time": np.ceil(distances / walking_speed).astype(np.int64),
+        }
+    )
+    return transfers.sort_values(["from_stop_id", "to_stop_id"], ignore_index=True)
+
+
+def stage_transfers(conn: sqlite3.Connection, radius: float) -> int:
+    """
+    Replace the staged transfers by those between the staged stops within
+    ``radius`` metres of each other, returning their number
+    """
+    stops = pd.read_sql_query("SELECT id, lat, lon FROM stops", conn)
+    transfers = get_transfers(stops, radius)
+    transfers.to_sql("transfers", conn, index=False, if_exists="replace")
+    conn.commit()
+    return len(transfers)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from collections.abc import Generator, Iterator
+import itertools
+from collections import deque
+from collections.abc import Generator, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
 from typing import Any, Literal, cast
@@ -11,7 +14,14 @@ from txc2gtfs.calendar import get_weekday_info
 from txc2gtfs.calendar_dates import (
     get_non_operation_days,
 )
+from txc2gtfs.fingerprints import (
+    ChunkFingerprints,
+    TripFingerprints,
+    get_trip_fingerprint,
+)
+from txc2gtfs.header import ServiceFilter, read_operators, read_service
 from txc2gtfs.routes import get_mode
+from txc2gtfs.util.dates import DateWindow
 from txc2gtfs.util.xml import NS, XMLElement, XMLTree, get_text
 
 
@@ -164,11 +174,39 @@ _SECTION_TIMES_COLS = [
 ]
 
 
+def get_trip_template(sections: list[XMLElement]) -> list[tuple[str, int]]:
+    """
+    Get the stop_id and run time offset, in seconds, of each stop of the sections,
+    in the order the journey pattern refers to them
+    """
+    template: list[tuple[str, int]] = []
+    offset = 0
+    links = [
+        link
+        for section in sections
+        for link in section.findall("txc:JourneyPatternTimingLink", NS)
+    ]
+    for link in links:
+        template.append((get_text(link, "./txc:From/txc:StopPointRef"), offset))
+        offset += parse_runtime_duration(get_text(link, "txc:RunTime"))
+    # Consecutive sections share the stop between them
+    if links:
+        template.append((get_text(links[-1], "./txc:To/txc:StopPointRef"), offset))
+    return template
+
+
 def process_vehicle_journey(
     journey: XMLElement,
     sections: list[XMLElement],
     services: dict[str, Service],
+    seen: TripFingerprints | ChunkFingerprints | None = None,
 ) -> pd.DataFrame | None:
+    """
+    Generate the stop rows of a VehicleJourney.
+
+    If ``seen`` is given, the trip is skipped (returning None) when a trip with the
+    same fingerprint has been seen before, before any of its rows are built.
+    """
     # Get current date for time reference
     current_date = datetime.now().date()
 
@@ -176,9 +214,11 @@ def process_vehicle_journey(
     # Boarding time in seconds
     boarding_time = 0
 
-    # Get service reference
+    # Get service reference. Services outside of the date window are left out.
     service_ref = get_text(journey, "txc:ServiceRef")
-    service = services[service_ref]
+    service = services.get(service_ref)
+    if service is None:
+        return None
 
     # Get line reference
     line_ref = get_text(journey, "txc:LineRef")
@@ -237,146 +277,160 @@ def process_vehicle_journey(
     departure_time = get_text(journey, "txc:DepartureTime")
     hour, minute, _ = [int(s) for s in departure_time.split(":", maxsplit=2)]
 
-    current_dt: datetime | None = None
-    section_times: pd.DataFrame | None = None
+    # The sections of the journey pattern, in the order of its references. Their
+    # timing links make up a single trip, in which the last stop of a section is
+    # the first of the next.
+    sections_by_id = {section.get("id"): section for section in sections}
+    journey_sections = [
+        sections_by_id[ref] for ref in jp_section_references if ref in sections_by_id
+    ]
+    links = [
+        link
+        for section in journey_sections
+        for link in section.findall("txc:JourneyPatternTimingLink", NS)
+    ]
+    if not links:
+        return None
+
+    # Generate trip_id (same section id might occur with different calendar info,
+    # hence attach weekday info as part of trip_id)
+    section_id = journey_sections[-1].get("id")
+    trip_id = f"{section_id}_{operation_days}_{hour:02}{minute:02}"
+
+    # Skip trips that are identical to one seen before, e.g. in an overlapping file
+    if seen is not None:
+        fingerprint = get_trip_fingerprint(
+            trip_id,
+            f"{service_ref}_{start_date}_{end_date}_{operation_days}",
+            get_trip_template(journey_sections),
+        )
+        if fingerprint in seen:
+            return None
+        seen.add(fingerprint)
 
-    # Iterate over a single departure section
+    current_dt: datetime | None = None
     stop_num = 1
-    for section in sections:
-        # Section reference
-        section_id = section.get("id")
-        assert section_id
-
-        # Generate trip_id (same section id might occur with different calendar info,
-        # hence attach weekday info as part of trip_id)
-        trip_id = f"{section_id}_{operation_days}_{hour:02}{minute:02}"
-
-        # Check that section-ids match
-        if section_id not in jp_section_references:
-            continue
-
-        links = section.findall("txc:JourneyPatternTimingLink", NS)
-
-        def get_duration(link: XMLElement) -> int:
-            # Get leg runtime code
-            runtime = get_text(link, "txc:RunTime")
-
-            # Parse duration in seconds
-            return int(parse_runtime_duration(runtime))
 
-        def gen_timing_links() -> Generator[tuple[Any, ...], None, None]:
-            nonlocal current_dt, stop_num
-
-            # For the given departure section calculate arrival/departure times
-            # for all possible trip departure times
-            for link in links:
-                duration = get_duration(link)
-
-                # Generate datetime for the start time
-                if current_dt is None:
-                    # On the first stop arrival and departure time should be identical
-                    current_dt = datetime.combine(current_date, time(hour, minute))
-                    departure_dt = current_dt
-                    # Timepoint
-                    timepoint = 1
-
-                else:
-                    current_dt = current_dt + timedelta(seconds=duration)
-
-                    # Timepoint
-                    timepoint = 0
-
-                    departure_dt = current_dt + timedelta(seconds=boarding_time)
-
-                # Get hour info
-                arrival_hour = current_dt.hour
-                departure_hour = departure_dt.hour
-
-                # Ensure trips passing midnight are formatted correctly
-                arrival_hour, departure_hour = get_midnight_formatted_times(
-                    arrival_hour,
-                    departure_hour,
-                    hour,
-                    current_date,
-                    current_dt,
-                    departure_dt,
-                )
+    def get_duration(link: XMLElement) -> int:
+        # Get leg runtime code
+        runtime = get_text(link, "txc:RunTime")
+
+        # Parse duration in seconds
+        return int(parse_runtime_duration(runtime))
+
+    def gen_timing_links() -> Generator[tuple[Any, ...], None, None]:
+        nonlocal current_dt, stop_num
+
+        # For the timing links of all sections calculate arrival/departure times
+        # for all possible trip departure times
+        for link in links:
+            duration = get_duration(link)
+
+            # Generate datetime for the start time
+            if current_dt is None:
+                # On the first stop arrival and departure time should be identical
+                current_dt = datetime.combine(current_date, time(hour, minute))
+                departure_dt = current_dt
+                # Timepoint
+                timepoint = 1
+
+            else:
+                current_dt = current_dt + timedelta(seconds=duration)
+
+                # Timepoint
+                timepoint = 0
+
+                departure_dt = current_dt + timedelta(seconds=boarding_time)
+
+            # Get hour info
+            arrival_hour = current_dt.hour
+            departure_hour = departure_dt.hour
+
+            # Ensure trips passing midnight are formatted correctly
+            arrival_hour, departure_hour = get_midnight_formatted_times(
+                arrival_hour,
+                departure_hour,
+                hour,
+                current_date,
+                current_dt,
+                departure_dt,
+            )
 
-                # Convert to string
-                arrival_t = "{arrival_hour}:{minsecs}".format(
-                    arrival_hour=str(arrival_hour).zfill(2),
-                    minsecs=current_dt.strftime("%M:%S"),
-                )
-                departure_t = "{departure_hour}:{minsecs}".format(
-                    departure_hour=str(departure_hour).zfill(2),
-                    minsecs=departure_dt.strftime("%M:%S"),
-                )
+            # Convert to string
+            arrival_t = "{arrival_hour}:{minsecs}".format(
+                arrival_hour=str(arrival_hour).zfill(2),
+                minsecs=current_dt.strftime("%M:%S"),
+            )
+            departure_t = "{departure_hour}:{minsecs}".format(
+                departure_hour=str(departure_hour).zfill(2),
+                minsecs=departure_dt.strftime("%M:%S"),
+            )
 
-                # Parse stop_id for FROM
-                stop_id = get_text(link, "./txc:From/txc:StopPointRef")
+            # Parse stop_id for FROM
+            stop_id = get_text(link, "./txc:From/txc:StopPointRef")
 
-                # Route link reference
-                route_link_ref = get_text(link, "txc:RouteLinkRef")
+            # Route link reference
+            route_link_ref = get_text(link, "txc:RouteLinkRef")
 
-                # Create gtfs_info row
-                yield (
-                    stop_id,
-                    stop_num,
-                    timepoint,
-                    arrival_t,
-                    departure_t,
-                    route_link_ref,
-                    agency_id,
-                    trip_id,
-                    route_id,
-                    vehicle_journey_id,
-                    service_ref,
-                    direction_id,
-                    line.name,
-                    travel_mode,
-                    trip_headsign,
-                    vehicle_type,
-                    start_date,
-                    end_date,
-                    operation_days,
-                    non_operative_days,
-                )
+            # Create gtfs_info row
+            yield (
+                stop_id,
+                stop_num,
+                timepoint,
+                arrival_t,
+                departure_t,
+                route_link_ref,
+                agency_id,
+                trip_id,
+                route_id,
+                vehicle_journey_id,
+                service_ref,
+                direction_id,
+                line.name,
+                travel_mode,
+                trip_headsign,
+                vehicle_type,
+                start_date,
+                end_date,
+                operation_days,
+                non_operative_days,
+            )
 
-                # Update stop number
-                stop_num += 1
-
-        section_times = pd.DataFrame(gen_timing_links(), columns=_SECTION_TIMES_COLS)
-
-        # After timing links have been iterated over,
-        # the last stop needs to be added separately
-        link = links[-1]
-        assert current_dt is not None
-        last_stop = get_last_stop_time_info(
-            link,
-            hour,
-            current_date,
-            current_dt,
-            get_duration(link),
-            stop_num,
-            boarding_time,
-        )
-        last_stop["timepoint"] = 0
-        last_stop["route_link_ref"] = get_text(link, "txc:RouteLinkRef")
-        last_stop["agency_id"] = agency_id
-        last_stop["trip_id"] = trip_id
-        last_stop["route_id"] = route_id
-        last_stop["vehicle_journey_id"] = vehicle_journey_id
-        last_stop["service_ref"] = service_ref
-        last_stop["direction_id"] = direction_id
-        last_stop["line_name"] = line.name
-        last_stop["travel_mode"] = travel_mode
-        last_stop["trip_headsign"] = trip_headsign
-        last_stop["vehicle_type"] = vehicle_type
-        last_stop["start_date"] = start_date
-        last_stop["end_date"] = end_date
-        last_stop["weekdays"] = operation_days
-        last_stop["non_operative_days"] = non_operative_days
-        section_times = pd.concat([section_times, last_stop], ignore_index=True)
+            # Update stop number
+            stop_num += 1
+
+    section_times = pd.DataFrame(gen_timing_links(), columns=_SECTION_TIMES_COLS)
+
+    # After timing links have been iterated over,
+    # the last stop needs to be added separately
+    link = links[-1]
+    assert current_dt is not None
+    last_stop = get_last_stop_time_info(
+        link,
+        hour,
+        current_date,
+        current_dt,
+        get_duration(link),
+        stop_num,
+        boarding_time,
+    )
+    last_stop["timepoint"] = 0
+    last_stop["route_link_ref"] = get_text(link, "txc:RouteLinkRef")
+    last_stop["agency_id"] = agency_id
+    last_stop["trip_id"] = trip_id
+    last_stop["route_id"] = route_id
+    last_stop["vehicle_journey_id"] = vehicle_journey_id
+    last_stop["service_ref"] = service_ref
+    last_stop["direction_id"] = direction_id
+    last_stop["line_name"] = line.name
+    last_stop["travel_mode"] = travel_mode
+    last_stop["trip_headsign"] = trip_headsign
+    last_stop["vehicle_type"] = vehicle_type
+    last_stop["start_date"] = start_date
+    last_stop["end_date"] = end_date
+    last_stop["weekdays"] = operation_days
+    last_stop["non_operative_days"] = non_operative_days
+    section_times = pd.concat([section_times, last_stop], ignore_index=True)
 
     return section_times
 
@@ -422,7 +476,225 @@ def generate_service_id(stop_times: pd.DataFrame) -> pd.DataFrame:
     return stop_times
 
 
-def get_gtfs_info(data: XMLTree) -> pd.DataFrame:
+def get_sections(data: XMLTree) -> list[XMLElement]:
+    """Retrieve all JourneyPatternSections of the document"""
+    return data.findall("./txc:JourneyPatternSections/txc:JourneyPatternSection", NS)
+
+
+def get_services(
+    data: XMLTree,
+    window: DateWindow | None = None,
+    service_filter: ServiceFilter | None = None,
+) -> dict[str, Service]:
+    """
+    Retrieve all Services of the document, keyed by their ServiceCode.
+
+    Services that do not operate during ``window`` or do not match
+    ``service_filter`` are left out.
+    """
+    operators = read_operators(data) if service_filter is not None else {}
+
+    def generate_services() -> Generator[Service, None, None]:
+        for service in data.iterfind("./txc:Services/txc:Service", NS):
+            if service_filter is not None and not service_filter.matches(
+                read_service(service), operators
+            ):
+                continue
+
+            journey_patterns = get_service_journey_patterns(service, window)
+            if journey_patterns.empty:
+                continue
+
+            code = get_text(service, "txc:ServiceCode")
+            yield Service(
+                code=code,
+                journey_patterns=journey_patterns,
+                operation_days=get_weekday_info(service),
+                non_operation_days=get_non_operation_days(service),
+                lines=dict(generate_lines(service)),
+            )
+
+    return {service.code: service for service in generate_services()}
+
+
+# Number of VehicleJourneys whose rows are built and handed on together
+_BATCH_JOURNEYS = 256
+
+# Columns of the GTFS info that the calendar, calendar_dates and routes depend on
+_SUMMARY_COLS = [
+    "service_id",
+    "weekdays",
+    "start_date",
+    "end_date",
+    "non_operative_days",
+    "route_id",
+    "agency_id",
+    "line_name",
+]
+
+
+class ServiceIds:
+    """
+    service_ids of the journeys of a document, assigned batch by batch.
+
+    All journeys operating on the same days share the service_id built from the
+    service, start and end date of the first of them, as in
+    :func:`generate_service_id`.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, str] = {}
+
+    def assign(self, journey_times: pd.DataFrame) -> pd.DataFrame:
+        """Generate the service_id column of a batch of journey rows"""
+        for weekdays, service_ref, start_d, end_d in (
+            journey_times[["weekdays", "service_ref", "start_date", "end_date"]]
+            .dropna(subset=["weekdays"])
+            .drop_duplicates(subset=["weekdays"])
+            .itertuples(index=False)
+        ):
+            self._ids.setdefault(
+                weekdays, f"{service_ref}_{start_d}_{end_d}_{weekdays}"
+            )
+        journey_times["service_id"] = journey_times["weekdays"].map(self._ids)
+        return journey_times
+
+
+class GtfsInfoSummary:
+    """
+    Distinct calendar and route columns of the GTFS info of a document, accumulated
+    batch by batch. It stands in for the full GTFS info when building the calendar,
+    calendar_dates and routes, which only depend on these columns.
+    """
+
+    def __init__(self) -> None:
+        self._frame: pd.DataFrame | None = None
+
+    def add(self, gtfs_info: pd.DataFrame) -> None:
+        rows = gtfs_info[_SUMMARY_COLS].drop_duplicates()
+        if self._frame is not None:
+            rows = pd.concat([self._frame, rows]).drop_duplicates()
+        self._frame = rows.reset_index(drop=True)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            return pd.DataFrame(columns=_SUMMARY_COLS)
+        return self._frame
+
+
+# Journey rows of a chunk, with the fingerprint of the trip of each journey
+type _ChunkRows = list[tuple[bytes | None, pd.DataFrame]]
+
+
+def _process_chunk(
+    journeys: Iterable[XMLElement],
+    sections: list[XMLElement],
+    services: dict[str, Service],
+    seen: TripFingerprints | None,
+) -> _ChunkRows:
+    chunk_seen = ChunkFingerprints(seen) if seen is not None else None
+    rows: _ChunkRows = []
+    for journey in journeys:
+        times = process_vehicle_journey(journey, sections, services, chunk_seen)
+        if times is None:
+            continue
+        fingerprint = None
+        if chunk_seen is not None:
+            fingerprint, chunk_seen.last = chunk_seen.last, None
+        rows.append((fingerprint, times))
+    return rows
+
+
+def _iter_chunks(
+    journeys: Iterator[XMLElement],
+    sections: list[XMLElement],
+    services: dict[str, Service],
+    seen: TripFingerprints | None,
+    chunk_size: int,
+    workers: int,
+) -> Generator[_ChunkRows, None, None]:
+    """
+    Convert chunks of ``chunk_size`` journeys on ``workers`` threads, generating
+    their rows in document order. At most two chunks per worker are in flight.
+    """
+    executor = ThreadPoolExecutor(workers, thread_name_prefix="journeys")
+    pending: deque[Future[_ChunkRows]] = deque()
+    try:
+        for chunk in itertools.batched(journeys, chunk_size):
+            pending.append(
+                executor.submit(_process_chunk, chunk, sections, services, seen)
+            )
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def iter_gtfs_info(
+    data: XMLTree,
+    seen: TripFingerprints | None = None,
+    window: DateWindow | None = None,
+    service_filter: ServiceFilter | None = None,
+    batch_size: int = _BATCH_JOURNEYS,
+    workers: int = 1,
+) -> Generator[pd.DataFrame, None, None]:
+    """
+    Generate the GTFS info of the document (see :func:`get_gtfs_info`) in batches
+    of the rows of at most ``batch_size`` VehicleJourneys, so that only a bounded
+    part of it is held in memory at any time.
+
+    With several ``workers``, chunks of ``batch_size`` journeys are converted on
+    as many threads, once the sections and services shared by all of them have
+    been read. The chunks are merged in document order, dropping trips repeated
+    from an earlier chunk and assigning service_ids, so the result is the same as
+    with a single worker.
+    """
+    sections = get_sections(data)
+    journeys = data.iterfind("./txc:VehicleJourneys/txc:VehicleJourney", NS)
+
+    # Get all service journey pattern info
+    services = get_services(data, window, service_filter)
+    service_ids = ServiceIds()
+
+    if workers > 1:
+        for chunk in _iter_chunks(
+            journeys, sections, services, seen, batch_size, workers
+        ):
+            kept: list[pd.DataFrame] = []
+            for fingerprint, times in chunk:
+                if seen is not None and fingerprint is not None:
+                    if fingerprint in seen:
+                        continue
+                    seen.add(fingerprint)
+                kept.append(times)
+            if kept:
+                yield service_ids.assign(pd.concat(kept, ignore_index=True))
+        return
+
+    journey_times: list[pd.DataFrame] = []
+    for journey in journeys:
+        times = process_vehicle_journey(journey, sections, services, seen)
+        if times is None:
+            continue
+        journey_times.append(times)
+        if len(journey_times) >= batch_size:
+            yield service_ids.assign(pd.concat(journey_times, ignore_index=True))
+            journey_times = []
+
+    if journey_times:
+        yield service_ids.assign(pd.concat(journey_times, ignore_index=True))
+
+
+def get_gtfs_info(
+    data: XMLTree,
+    seen: TripFingerprints | None = None,
+    window: DateWindow | None = None,
+    service_filter: ServiceFilter | None = None,
+    workers: int = 1,
+) -> pd.DataFrame:
     """
     Get GTFS info from TransXChange elements.
 
@@ -440,40 +712,16 @@ def get_gtfs_info(data: XMLTree) -> pd.DataFrame:
         - Trips: <route_id>, service_id, <trip_id>, (+ optional: trip_headsign,
           direction_id, trip_shortname)
         - Routes: <route_id>, agency_id, route_type, route_short_name, route_long_name
-    """
-    sections = data.findall(
-        "./txc:JourneyPatternSections/txc:JourneyPatternSection", NS
-    )
-    journeys = data.iterfind("./txc:VehicleJourneys/txc:VehicleJourney", NS)
-
-    def generate_services() -> Generator[Service, None, None]:
-        for service in data.iterfind("./txc:Services/txc:Service", NS):
-            code = get_text(service, "txc:ServiceCode")
-            yield Service(
-                code=code,
-                journey_patterns=get_service_journey_patterns(service),
-                operation_days=get_weekday_info(service),
-                non_operation_days=get_non_operation_days(service),
-                lines=dict(generate_lines(service)),
-            )
-
-    # Get all service journey pattern info
-    services = {service.code: service for service in generate_services()}
-
-    # Process
-    gtfs_info = pd.concat(
-        process_vehicle_journey(
-            journey,
-            sections,
-            services,
-        )
-        for journey in journeys
-    )
 
-    # Generate service_id column into the table
-    gtfs_info = generate_service_id(gtfs_info)
-
-    return gtfs_info
+    Trips whose fingerprint is in ``seen`` are skipped, as are the trips of services
+    that do not operate during ``window`` or do not match ``service_filter``. The
+    result is empty if all of them were. The VehicleJourneys of large documents can
+    be converted on several threads with ``workers``.
+    """
+    batches = list(iter_gtfs_info(data, seen, window, service_filter, workers=workers))
+    if not batches:
+        return pd.DataFrame(columns=[*_SECTION_TIMES_COLS, "service_id"])
+    return pd.concat(batches, ignore_index=True)
 
 
 def parse_runtime_duration(runtime: str) -> int:
@@ -525,8 +773,16 @@ _JOURNEY_PATTERN_COLUMNS = [
 ]
 
 
-def get_service_journey_patterns(service: XMLElement) -> pd.DataFrame:
-    """Retrieve a DataFrame of all JourneyPatterns of the service"""
+def get_service_journey_patterns(
+    service: XMLElement, window: DateWindow | None = None
+) -> pd.DataFrame:
+    """
+    Retrieve a DataFrame of all JourneyPatterns of the service.
+
+    If the OperatingPeriod of the service does not overlap ``window``, the service
+    has no journey patterns. Otherwise its start and end dates are clipped to the
+    window.
+    """
 
     def process_service(service: XMLElement) -> Generator[tuple[Any, ...], None, None]:
         # Service description
@@ -547,20 +803,22 @@ def get_service_journey_patterns(service: XMLElement) -> pd.DataFrame:
         agency_id = get_text(service, "txc:RegisteredOperatorRef")
 
         # Start and end date
-        start_date = datetime.strftime(
-            datetime.strptime(
-                get_text(service, "./txc:OperatingPeriod/txc:StartDate"), "%Y-%m-%d"
-            ),
-            "%Y%m%d",
+        start = date.fromisoformat(
+            get_text(service, "./txc:OperatingPeriod/txc:StartDate")
         )
-        end_date = None
-        if end_dateget_text := get_text(
+        end = None
+        if end_text := get_text(
             service, "./txc:OperatingPeriod/txc:EndDate", default=None
         ):
-            end_date = datetime.strftime(
-                datetime.strptime(end_dateget_text, "%Y-%m-%d"),
-                "%Y%m%d",
-            )
+            end = date.fromisoformat(end_text)
+
+        if window is not None:
+            if not window.overlaps(start, end):
+                return
+            start, end = window.clip(start, end)
+
+        start_date = start.strftime("%Y%m%d")
+        end_date = end.strftime("%Y%m%d") if end is not None else None
 
         origin = get_text(service, "./txc:StandardService/txc:Origin")
         destination = get_text(service, "./txc:StandardService/txc:Destination")
@@ -569,8 +827,10 @@ def get_service_journey_patterns(service: XMLElement) -> pd.DataFrame:
             # Journey pattern id
             journey_pattern_id = jp.get("id")
 
-            # Section reference
-            section_ref = get_text(jp, "./txc:JourneyPatternSectionRefs")
+            # Section references, one row per section in the order of the pattern
+            section_refs = [
+                ref.text for ref in jp.iterfind("txc:JourneyPatternSectionRefs", NS)
+            ]
 
             # Direction
             direction = get_direction(get_text(jp, "./txc:Direction"))
@@ -590,22 +850,23 @@ def get_service_journey_patterns(service: XMLElement) -> pd.DataFrame:
                 jp, "./txc:Operational/txc:VehicleType/txc:Description", default=None
             )
 
-            yield (
-                journey_pattern_id,
-                service_code,
-                agency_id,
-                line_name,
-                mode,
-                service_description,
-                headsign,
-                section_ref,
-                direction,
-                route_ref,
-                vehicle_type,
-                vehicle_description,
-                start_date,
-                end_date,
-            )
+            for section_ref in section_refs:
+                yield (
+                    journey_pattern_id,
+                    service_code,
+                    agency_id,
+                    line_name,
+                    mode,
+                    service_description,
+                    headsign,
+                    section_ref,
+                    direction,
+                    route_ref,
+                    vehicle_type,
+                    vehicle_description,
+                    start_date,
+                    end_date,
+                )
 
     return pd.DataFrame(
         process_service(service),
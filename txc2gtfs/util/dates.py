@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+
+@dataclass(frozen=True)
+class DateWindow:
+    """Range of dates to convert, both ends inclusive and optional"""
+
+    start: date | None = None
+    end: date | None = None
+
+    def __post_init__(self) -> None:
+        if self.start is not None and self.end is not None and self.start > self.end:
+            raise ValueError(f"Window starts after it ends: {self.start} > {self.end}")
+
+    def overlaps(self, start: date | None, end: date | None) -> bool:
+        """Whether an operating period, open-ended if ``end`` is None, overlaps"""
+        if self.end is not None and start is not None and start > self.end:
+            return False
+        return self.start is None or end is None or end >= self.start
+
+    def clip(self, start: date, end: date | None) -> tuple[date, date | None]:
+        """Restrict an overlapping operating period to the window"""
+        if self.start is not None:
+            start = max(start, self.start)
+        if self.end is not None:
+            end = self.end if end is None else min(end, self.end)
+        return start, end
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from collections.abc import Generator, Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+
+def iterate_paths(input: Iterable[StrPath]) -> Generator[Path, None, None]:
+    """Yield the given files, and the XML files of the given directories"""
+    for path in input:
+        path = Path(path)
+        if path.is_dir():
+            yield from path.glob("*.xml")
+            continue
+        yield path
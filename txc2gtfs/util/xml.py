@@ -1,7 +1,11 @@
-from typing import TYPE_CHECKING, overload
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import TYPE_CHECKING, cast, overload
 
 if TYPE_CHECKING:
-    import xml.etree.ElementTree as ET
+    from _typeshed import StrPath
 
 
 type XMLElement = ET.Element[str]
@@ -10,6 +14,24 @@ type XMLTree = ET.ElementTree[XMLElement]
 NS = {"txc": "http://www.transxchange.org.uk/"}
 
 
+def parse_xml(path: StrPath, use_lxml: bool = False) -> XMLTree:
+    """
+    Parse a document with ElementTree or, with ``use_lxml``, with lxml. lxml releases
+    the GIL while parsing, so that threads can parse files in parallel, and its trees
+    support the same find methods as those of ElementTree.
+    """
+    if use_lxml:
+        from lxml import etree
+
+        return cast("XMLTree", etree.parse(str(Path(path))))
+    return ET.parse(path)
+
+
+def local_name(tag: str) -> str:
+    """Name of an element without its namespace"""
+    return tag.rpartition("}")[2]
+
+
 @overload
 def get_text[T](base: XMLElement, path: str, *, default: T) -> str | T: ...
 